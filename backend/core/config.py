@@ -11,7 +11,147 @@ class Settings(BaseSettings):
     GOOGLE_MODEL_NAME: str = os.getenv("GOOGLE_MODEL_NAME", "gemini-1.5-flash")
     CHROMADB_HOST: str = os.getenv("CHROMADB_HOST", "localhost")
     CHROMADB_PORT: int = int(os.getenv("CHROMADB_PORT", 8000))
+    # Chroma searches go through the async HTTP client (pooled connections) under a per-attempt timeout,
+    # jittered retries and a circuit breaker; the query embedding gets the same policy with its own timeout
+    CHROMA_ASYNC_ENABLED: bool = os.getenv("CHROMA_ASYNC_ENABLED", "true").lower() == "true"
+    CHROMA_TIMEOUT_SECONDS: float = float(os.getenv("CHROMA_TIMEOUT_SECONDS", 5))
+    CHROMA_MAX_CONCURRENCY: int = int(os.getenv("CHROMA_MAX_CONCURRENCY", 16))
+    CHROMA_RETRIES: int = int(os.getenv("CHROMA_RETRIES", 2))
+    CHROMA_RETRY_BACKOFF_SECONDS: float = float(os.getenv("CHROMA_RETRY_BACKOFF_SECONDS", 0.2))
+    CHROMA_BREAKER_FAILURES: int = int(os.getenv("CHROMA_BREAKER_FAILURES", 5))
+    CHROMA_BREAKER_RESET_SECONDS: float = float(os.getenv("CHROMA_BREAKER_RESET_SECONDS", 30))
+    EMBEDDING_TIMEOUT_SECONDS: float = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", 10))
     SOURCE_DOCS_PATH: str = os.getenv("SOURCE_DOCS_PATH", "source_docs")
+    EMBEDDING_MODEL_NAME: str = os.getenv("EMBEDDING_MODEL_NAME", "models/text-embedding-004")
+
+    # Content-addressed embedding cache (in-process LRU + SQLite on disk)
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite")
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", 10000))
+
+    # FlashRank micro-batching (runs off the event loop)
+    RERANK_BATCH_WINDOW_MS: float = float(os.getenv("RERANK_BATCH_WINDOW_MS", 5))
+    RERANK_MAX_BATCH: int = int(os.getenv("RERANK_MAX_BATCH", 8))
+    RERANK_QUEUE_SIZE: int = int(os.getenv("RERANK_QUEUE_SIZE", 64))
+    # ONNX Runtime intra-op threads (0 = runtime default); always 1 with several workers and in the pre-fork preload
+    RERANK_ONNX_THREADS: int = int(os.getenv("RERANK_ONNX_THREADS", 0))
+    # Cross-encoder scores cached per (normalized query, chunk), LRU within the memory cap
+    RERANK_CACHE_ENABLED: bool = os.getenv("RERANK_CACHE_ENABLED", "true").lower() == "true"
+    RERANK_CACHE_MAX_MB: float = float(os.getenv("RERANK_CACHE_MAX_MB", 32))
+    # Cascade reranking: a small cross-encoder scores every candidate, the L-12 model only the survivors
+    RERANK_CASCADE_ENABLED: bool = os.getenv("RERANK_CASCADE_ENABLED", "false").lower() == "true"
+    RERANK_FIRST_STAGE_MODEL: str = os.getenv("RERANK_FIRST_STAGE_MODEL", "ms-marco-TinyBERT-L-2-v2")
+    # Skip the second stage when the first-stage top score is at least SKIP_MIN_SCORE and leads by SKIP_MARGIN
+    RERANK_CASCADE_SKIP_MARGIN: float = float(os.getenv("RERANK_CASCADE_SKIP_MARGIN", 0.35))
+    RERANK_CASCADE_SKIP_MIN_SCORE: float = float(os.getenv("RERANK_CASCADE_SKIP_MIN_SCORE", 0.9))
+    # Otherwise drop candidates more than PRUNE_MARGIN below the top, keeping MIN_KEEP..MAX_KEEP of them
+    RERANK_CASCADE_PRUNE_MARGIN: float = float(os.getenv("RERANK_CASCADE_PRUNE_MARGIN", 0.5))
+    RERANK_CASCADE_MIN_KEEP: int = int(os.getenv("RERANK_CASCADE_MIN_KEEP", 4))
+    RERANK_CASCADE_MAX_KEEP: int = int(os.getenv("RERANK_CASCADE_MAX_KEEP", 10))
+
+    # Query routing: questions naming books, a testament or the non-Bible sources search only that slice
+    QUERY_ROUTER_ENABLED: bool = os.getenv("QUERY_ROUTER_ENABLED", "true").lower() == "true"
+    # A filtered search returning fewer candidates than this is redone over the whole collection
+    ROUTER_MIN_CANDIDATES: int = int(os.getenv("ROUTER_MIN_CANDIDATES", 6))
+    # Route the remaining questions by the nearest corpus centroid (needs the local vector index)
+    ROUTER_CENTROIDS_ENABLED: bool = os.getenv("ROUTER_CENTROIDS_ENABLED", "false").lower() == "true"
+    ROUTER_CENTROID_MARGIN: float = float(os.getenv("ROUTER_CENTROID_MARGIN", 0.02))
+
+    # Incremental ingestion state (next to the lexical index)
+    INGEST_MANIFEST_PATH: str = os.getenv("INGEST_MANIFEST_PATH", "data/index/ingest_manifest.json")
+    INGEST_JOURNAL_PATH: str = os.getenv("INGEST_JOURNAL_PATH", "data/index/ingest_journal.jsonl")
+
+    # Streaming ingestion pipeline
+    INGEST_PARSE_WORKERS: int = int(os.getenv("INGEST_PARSE_WORKERS", 2))
+    INGEST_EMBED_CONCURRENCY: int = int(os.getenv("INGEST_EMBED_CONCURRENCY", 2))
+    # 0 disables the limiter; Gemini Free Tier allows ~1500 embedding requests/minute
+    INGEST_EMBED_REQUESTS_PER_MINUTE: float = float(os.getenv("INGEST_EMBED_REQUESTS_PER_MINUTE", 300))
+    # MinHash/LSH near-duplicate elimination of non-scripture chunks before embedding
+    INGEST_DEDUP_ENABLED: bool = os.getenv("INGEST_DEDUP_ENABLED", "true").lower() == "true"
+    # Estimated Jaccard similarity of word 3-grams above which a chunk becomes an alias of an earlier one
+    INGEST_DEDUP_THRESHOLD: float = float(os.getenv("INGEST_DEDUP_THRESHOLD", 0.85))
+    INGEST_DEDUP_NUM_PERM: int = int(os.getenv("INGEST_DEDUP_NUM_PERM", 128))
+    INGEST_DEDUP_INDEX_PATH: str = os.getenv("INGEST_DEDUP_INDEX_PATH", "data/index/dedup_minhash.npz")
+    # Per-file chunk counts kept up to date by the ingestion, served by GET /admin/corpus-stats
+    CORPUS_STATS_PATH: str = os.getenv("CORPUS_STATS_PATH", "data/index/corpus_stats.json")
+    # Required in the X-Admin-Token header by the /admin endpoints, which are disabled (404) while it is empty
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    # Serving: gunicorn workers (backend/gunicorn.conf.py); read-only state is loaded once before forking
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))
+
+    # Startup: components warm up in the background with retries (exponential backoff);
+    # required ones keep retrying at the capped backoff after STARTUP_RETRIES
+    STARTUP_RETRIES: int = int(os.getenv("STARTUP_RETRIES", 5))
+    STARTUP_RETRY_BACKOFF_SECONDS: float = float(os.getenv("STARTUP_RETRY_BACKOFF_SECONDS", 2))
+    # Optional file with one frequent question per line, preloaded into the in-memory query cache
+    WARMUP_QUERIES_PATH: str = os.getenv("WARMUP_QUERIES_PATH", "")
+
+    # Retrieval: "vector" (MMR only), "lexical" (BM25 only) or "hybrid" (RRF of both)
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "hybrid")
+    LEXICAL_INDEX_PATH: str = os.getenv("LEXICAL_INDEX_PATH", "data/index/bm25.json.gz")
+    LEXICAL_TOP_K: int = int(os.getenv("LEXICAL_TOP_K", 20))
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", 12))
+    RRF_K: int = int(os.getenv("RRF_K", 60))
+
+    # Prompt context: reranked chunks are admitted by score until this many tokens (~4 chars each)
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1800))
+
+    # Single-flight: identical in-flight questions without history share one generation
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+    # SSE streaming: content chunks coalesced per frame (0 disables), heartbeat comments while idle
+    SSE_COALESCE_MS: float = float(os.getenv("SSE_COALESCE_MS", 30))
+    SSE_COALESCE_MAX_CHARS: int = int(os.getenv("SSE_COALESCE_MAX_CHARS", 256))
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+    SSE_DISCONNECT_POLL_SECONDS: float = float(os.getenv("SSE_DISCONNECT_POLL_SECONDS", 0.5))
+
+    # Vector store: "chroma" (remote MMR) or "local" (memory-mapped snapshot, falls back to Chroma if missing)
+    VECTOR_STORE_BACKEND: str = os.getenv("VECTOR_STORE_BACKEND", "local")
+    LOCAL_VECTOR_INDEX_PATH: str = os.getenv("LOCAL_VECTOR_INDEX_PATH", "data/index/scripture_vectors")
+    # "scripture" snapshots the Bible chunks only (other chunks still come from Chroma); "all" snapshots everything
+    LOCAL_VECTOR_SCOPE: str = os.getenv("LOCAL_VECTOR_SCOPE", "scripture")
+    LOCAL_VECTOR_QUANTIZATION: str = os.getenv("LOCAL_VECTOR_QUANTIZATION", "int8")
+    # 0 keeps the full embedding dimensionality
+    LOCAL_VECTOR_PCA_DIM: int = int(os.getenv("LOCAL_VECTOR_PCA_DIM", 0))
+
+    # Speculative retrieval concurrent with query reformulation
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "true").lower() == "true"
+    SPECULATION_LEXICAL_THRESHOLD: float = float(os.getenv("SPECULATION_LEXICAL_THRESHOLD", 0.8))
+    SPECULATION_EMBEDDING_THRESHOLD: float = float(os.getenv("SPECULATION_EMBEDDING_THRESHOLD", 0.9))
+
+    # Direct scripture-reference fast path (bypasses vector search and reranking)
+    REFERENCE_FAST_PATH_ENABLED: bool = os.getenv("REFERENCE_FAST_PATH_ENABLED", "true").lower() == "true"
+    REFERENCE_MAX_VERSES: int = int(os.getenv("REFERENCE_MAX_VERSES", 60))
+
+    # Compact verse store (memory-mapped); reranked Bible chunks grow by up to N neighbor verses
+    # on each side, then to the end of the sentence, within a per-chunk token cap (0 disables)
+    VERSE_STORE_PATH: str = os.getenv("VERSE_STORE_PATH", "data/index/verse_store")
+    VERSE_EXPANSION_RADIUS: int = int(os.getenv("VERSE_EXPANSION_RADIUS", 2))
+    VERSE_EXPANSION_MAX_TOKENS: int = int(os.getenv("VERSE_EXPANSION_MAX_TOKENS", 300))
+
+    # Session history: "memory" (LRU/TTL/byte budget) or "sqlite" (hot LRU + write-through to disk)
+    # (defaults to sqlite with several workers, so every worker sees every turn)
+    SESSION_STORE_BACKEND: str = os.getenv(
+        "SESSION_STORE_BACKEND", "sqlite" if int(os.getenv("WEB_CONCURRENCY", 1)) > 1 else "memory"
+    )
+    SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "data/sessions/sessions.sqlite")
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", 10000))
+    SESSION_TTL_SECONDS: int = int(os.getenv("SESSION_TTL_SECONDS", 3600))
+    SESSION_MAX_BYTES: int = int(os.getenv("SESSION_MAX_BYTES", 256 * 1024 * 1024))
+    SESSION_RETENTION_SECONDS: int = int(os.getenv("SESSION_RETENTION_SECONDS", 30 * 24 * 3600))
+
+    # History compaction (token budget per prompt)
+    HISTORY_KEEP_TURNS: int = int(os.getenv("HISTORY_KEEP_TURNS", 3))
+    HISTORY_QA_TOKEN_BUDGET: int = int(os.getenv("HISTORY_QA_TOKEN_BUDGET", 2000))
+    HISTORY_REFORMULATE_TURNS: int = int(os.getenv("HISTORY_REFORMULATE_TURNS", 2))
+
+    # Semantic answer cache (keyed on the standalone query embedding)
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.92))
+    ANSWER_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 24 * 3600))
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 2000))
+    ANSWER_CACHE_MAX_BYTES: int = int(os.getenv("ANSWER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,21 @@
+import hashlib
+from typing import Any, Dict
+
+
+def content_hash(*parts: Any) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(str(part).encode("utf-8"))
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+def chunk_id(page_content: str, metadata: Dict[str, Any]) -> str:
+    """Stable chunk identifier derived from its source, location and text."""
+    return content_hash(
+        metadata.get("source", ""),
+        metadata.get("book", ""),
+        metadata.get("chapter", ""),
+        metadata.get("verses", ""),
+        page_content,
+    )[:32]
@@ -0,0 +1,201 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Latency buckets (seconds) spanning a cache hit (~ms) to a long Gemini answer (~30s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RATE_BUCKETS = (5, 10, 20, 40, 60, 80, 100, 150, 200, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return self.header() + [
+                f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in self._values.items()
+            ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts (+Inf last), sum, count)
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    le_label = f'le="{le}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le_label)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Read at scrape time from a callback returning a number or {label value: number}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callback: Optional[Callable[[], Union[float, Dict[str, float]]]] = None
+
+    def set_function(self, callback: Callable[[], Union[float, Dict[str, float]]]) -> None:
+        self._callback = callback
+
+    def render(self) -> List[str]:
+        if self._callback is None:
+            return []
+        try:
+            value = self._callback()
+        except Exception:
+            # A component that is not up yet just has no sample
+            return []
+        lines = self.header()
+        if isinstance(value, dict):
+            for label_value, sample in value.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, (label_value,))} {float(sample)}")
+        else:
+            lines.append(f"{self.name} {float(value)}")
+        return lines
+
+
+class Registry:
+    """Minimal Prometheus text-format registry (no client library, per process)."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_duration_seconds", "Time spent in each step of the /chat pipeline.", ("stage",)
+)
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "rag_time_to_first_token_seconds", "Time from request start to the first answer chunk."
+)
+TOKENS_PER_SECOND = REGISTRY.histogram(
+    "rag_generation_tokens_per_second", "Estimated answer tokens per second while streaming.", buckets=RATE_BUCKETS
+)
+REQUESTS = REGISTRY.counter(
+    "rag_requests_total", "Chat requests by outcome (completed, cache_hit, cancelled, error).", ("outcome",)
+)
+DEPENDENCY_CALLS = REGISTRY.counter(
+    "rag_dependency_calls_total",
+    "Attempts against remote dependencies by outcome (ok, timeout, error, rejected by the open circuit).",
+    ("dependency", "outcome"),
+)
+RERANK_CASCADE = REGISTRY.counter(
+    "rag_rerank_cascade_total", "Cascade rerank requests by outcome (skipped, pruned, full).", ("outcome",)
+)
+QUERY_ROUTES = REGISTRY.counter(
+    "rag_query_routes_total",
+    "Filtered retrievals by route and outcome (filtered, or fallback to the whole collection).",
+    ("route", "outcome"),
+)
+
+
+class StageTimer:
+    """
+    Per-request stage timings (ms), also recorded into the stage histogram.
+    With `observe=False` they are only buffered, for work whose result may be
+    discarded; `merge` records them into the request timer once it is used.
+    """
+
+    def __init__(self, observe: bool = True):
+        self.started = time.perf_counter()
+        self.observe = observe
+        self.timings: Dict[str, float] = {}
+
+    def record(self, stage: str, ms: float) -> None:
+        self.timings[stage] = self.timings.get(stage, 0.0) + ms
+        if self.observe:
+            STAGE_SECONDS.observe(ms / 1000, stage=stage)
+
+    def merge(self, other: "StageTimer") -> None:
+        for stage, ms in other.timings.items():
+            self.record(stage, ms)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
@@ -0,0 +1,138 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from backend.core.metrics import DEPENDENCY_CALLS
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the dependency while its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed attempts, so callers fail
+    fast instead of queueing on a dead dependency. After `reset_seconds` a single
+    trial call is let through (half-open): success closes the circuit, failure
+    opens it for another `reset_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        # The caller went away; that says nothing about the dependency
+        self._trial_in_flight = False
+
+
+class ResilientCaller:
+    """
+    Call policy for one remote dependency: at most `max_concurrency` calls in
+    flight, a timeout per attempt, up to `retries` extra attempts with full-jitter
+    exponential backoff, and a circuit breaker around all of it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout_seconds: float = 5.0,
+        max_concurrency: int = 16,
+        retries: int = 2,
+        backoff_seconds: float = 0.2,
+        max_backoff_seconds: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.calls = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def _record(self, outcome: str) -> None:
+        DEPENDENCY_CALLS.inc(dependency=self.name, outcome=outcome)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                self.rejected += 1
+                self._record("rejected")
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            try:
+                async with self._semaphore:
+                    result = await asyncio.wait_for(fn(), self.timeout_seconds)
+            except asyncio.CancelledError:
+                self.breaker.record_cancelled()
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                    self._record("timeout")
+                else:
+                    self.errors += 1
+                    self._record("error")
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                await asyncio.sleep(random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)))
+                continue
+            self.breaker.record_success()
+            self._record("ok")
+            return result
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "retried": self.retried,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+            "times_opened": self.breaker.times_opened,
+        }
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+HEARTBEAT_FRAME = ": ping\n\n"
+
+
+def sse_frame(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+class SSEStreamer:
+    """
+    Turns the RAG event stream into SSE frames.
+
+    - Content chunks are coalesced for up to `coalesce_ms` (or `coalesce_max_chars`)
+      into one frame, instead of one json.dumps + write per LLM token.
+    - A comment frame is sent after `heartbeat_seconds` of silence, so proxies keep
+      the connection open while retrieval or the first token is slow.
+    - The client is polled for disconnects; the producer (and with it the upstream
+      LLM stream) is cancelled as soon as nobody is reading.
+    """
+
+    def __init__(
+        self,
+        coalesce_ms: float = 30,
+        coalesce_max_chars: int = 256,
+        heartbeat_seconds: float = 15,
+        disconnect_poll_seconds: float = 0.5,
+        queue_size: int = 64,
+    ):
+        self.coalesce_ms = coalesce_ms
+        self.coalesce_max_chars = coalesce_max_chars
+        self.heartbeat_seconds = heartbeat_seconds
+        self.disconnect_poll_seconds = disconnect_poll_seconds
+        self.queue_size = queue_size
+
+        self.streams = 0
+        self.active = 0
+        self.disconnects = 0
+        self.frames_sent = 0
+        self.content_events = 0
+        self.heartbeats = 0
+
+    async def stream(
+        self,
+        events: AsyncIterator[dict],
+        is_disconnected: Callable[[], Awaitable[bool]],
+    ) -> AsyncIterator[str]:
+        self.streams += 1
+        self.active += 1
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def produce() -> None:
+            try:
+                async for event in events:
+                    await queue.put(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in stream: {e}")
+                await queue.put({"type": "error", "data": str(e)})
+            await queue.put(_DONE)
+
+        producer = asyncio.create_task(produce())
+        buffer = []
+        buffered_chars = 0
+        flush_at = None
+        last_sent = next_poll = loop.time()
+
+        def flush() -> str:
+            nonlocal buffer, buffered_chars, flush_at
+            frame = sse_frame({"type": "content", "data": "".join(buffer)})
+            buffer, buffered_chars, flush_at = [], 0, None
+            self.frames_sent += 1
+            return frame
+
+        try:
+            while True:
+                now = loop.time()
+                deadlines = [next_poll, last_sent + self.heartbeat_seconds]
+                if flush_at is not None:
+                    deadlines.append(flush_at)
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=max(min(deadlines) - now, 0))
+                except asyncio.TimeoutError:
+                    event = None
+
+                now = loop.time()
+                if now >= next_poll:
+                    next_poll = now + self.disconnect_poll_seconds
+                    if await is_disconnected():
+                        self.disconnects += 1
+                        return
+
+                if event is None:
+                    if flush_at is not None and now >= flush_at:
+                        yield flush()
+                        last_sent = now
+                    elif now - last_sent >= self.heartbeat_seconds:
+                        self.heartbeats += 1
+                        yield HEARTBEAT_FRAME
+                        last_sent = now
+                    continue
+
+                if event is _DONE:
+                    if buffer:
+                        yield flush()
+                    return
+
+                if event.get("type") == "content" and self.coalesce_ms > 0:
+                    self.content_events += 1
+                    buffer.append(event["data"])
+                    buffered_chars += len(event["data"])
+                    if flush_at is None:
+                        flush_at = now + self.coalesce_ms / 1000
+                    if buffered_chars >= self.coalesce_max_chars or now >= flush_at:
+                        yield flush()
+                        last_sent = now
+                    continue
+
+                if event.get("type") == "content":
+                    self.content_events += 1
+                if buffer:
+                    yield flush()
+                self.frames_sent += 1
+                yield sse_frame(event)
+                last_sent = now
+        finally:
+            self.active -= 1
+            # Also reached when the server cancels the response on disconnect
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "streams": self.streams,
+            "active": self.active,
+            "disconnects": self.disconnects,
+            "frames_sent": self.frames_sent,
+            "content_events": self.content_events,
+            "events_per_frame": self.content_events / self.frames_sent if self.frames_sent else 0.0,
+            "heartbeats": self.heartbeats,
+        }
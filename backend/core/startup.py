@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ComponentState:
+    required: bool = True
+    status: str = "pending"  # pending | warming | ready | failed
+    attempts: int = 0
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+
+class Warmup:
+    """
+    Builds slow components off the request path, each in a worker thread with
+    retries and exponential backoff, and records per-component readiness and
+    timings for /ready and the startup profile.
+
+    Optional components give up after `retries` attempts. Required ones are then
+    marked failed (so /ready says why) but keep retrying every `max_backoff_seconds`:
+    a dependency that comes back later (Chroma restarted, model download
+    reachable again) makes the worker ready without a restart.
+    """
+
+    def __init__(self, retries: int = 5, backoff_seconds: float = 2.0, max_backoff_seconds: float = 30.0):
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.components: Dict[str, ComponentState] = {}
+        self.started = time.perf_counter()
+
+    def register(self, name: str, required: bool = True) -> None:
+        self.components.setdefault(name, ComponentState(required=required))
+
+    async def run(self, name: str, loader: Callable[[], Any], required: bool = True) -> Any:
+        """Returns the loaded component; None only for an optional one that ran out of retries."""
+        self.register(name, required)
+        state = self.components[name]
+        state.status = "warming"
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            state.attempts = attempt
+            try:
+                result = await asyncio.to_thread(loader)
+            except Exception as e:
+                state.error = str(e)
+                state.elapsed_ms = (time.perf_counter() - started) * 1000
+                if attempt == self.retries:
+                    state.status = "failed"
+                    logger.error(f"Warm-up of {name} failed after {attempt} attempts: {e}")
+                    if not required:
+                        return None
+                delay = min(self.backoff_seconds * 2 ** (attempt - 1), self.max_backoff_seconds)
+                logger.warning(f"Warm-up of {name} failed ({e}), retrying in {delay:.0f}s...")
+                await asyncio.sleep(delay)
+                continue
+            state.status = "ready"
+            state.error = None
+            state.elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"{name} ready in {state.elapsed_ms:.0f} ms.")
+            return result
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.components) and all(
+            state.status == "ready" for state in self.components.values() if state.required
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "uptime_ms": (time.perf_counter() - self.started) * 1000,
+            "components": {
+                name: {
+                    "status": state.status,
+                    "required": state.required,
+                    "attempts": state.attempts,
+                    "elapsed_ms": round(state.elapsed_ms, 1),
+                    "error": state.error,
+                }
+                for name, state in self.components.items()
+            },
+        }
@@ -0,0 +1,36 @@
+import re
+import unicodedata
+from typing import List
+
+# Short Portuguese stopword list for lexical matching (accent-folded)
+STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "ela", "elas",
+    "ele", "eles", "em", "entre", "era", "essa", "esse", "esta", "este", "eu", "foi", "ha",
+    "isso", "isto", "ja", "lhe", "mais", "mas", "me", "mesmo", "meu", "minha", "na", "nao",
+    "nas", "nem", "no", "nos", "o", "os", "ou", "para", "pela", "pelas", "pelo", "pelos",
+    "por", "qual", "quais", "quando", "que", "quem", "se", "sem", "ser", "seu", "seus", "so",
+    "sua", "suas", "tambem", "te", "tem", "um", "uma", "umas", "uns", "voce",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting Portuguese prose
+    return len(text) // 4 + 1
+
+
+def fold(text: str) -> str:
+    """Lowercases and strips accents ("Êxodo" -> "exodo")."""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent-folded word tokens without Portuguese stopwords, with plurals folded ("apostolos" -> "apostolo")."""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", fold(text)):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith("s"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
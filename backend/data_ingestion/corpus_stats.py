@@ -0,0 +1,186 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def iter_collection(
+    collection, include: List[str], where: Optional[Dict[str, Any]] = None, page_size: int = 1000
+) -> Iterator[Tuple[str, Optional[str], Dict[str, Any], Any]]:
+    """
+    (id, document, metadata, embedding) for every chunk, fetched `page_size` at a
+    time: neither Chroma nor the client ever holds the whole collection.
+    Fields left out of `include` come back as None.
+    """
+    offset = 0
+    while True:
+        page = collection.get(where=where, limit=page_size, offset=offset, include=include)
+        ids = page["ids"]
+        if not ids:
+            return
+        documents = page.get("documents")
+        metadatas = page.get("metadatas")
+        embeddings = page.get("embeddings")
+        for i, cid in enumerate(ids):
+            yield (
+                cid,
+                documents[i] if documents is not None else None,
+                (metadatas[i] if metadatas is not None else None) or {},
+                embeddings[i] if embeddings is not None else None,
+            )
+        offset += len(ids)
+
+
+class ChunkCounter:
+    """
+    Chunk counts and text size per source, book and type; merged across files into the corpus totals.
+
+    With `embeddings`, it also counts the chunks stored with a vector: the ingestion
+    counts them as its batches are upserted (and the chunks of batches whose embedding
+    failed), a scan by reading the stored vectors back. Near-duplicate aliases have no
+    vector of their own; they are counted apart and served by their canonical chunk.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, embeddings: bool = False):
+        self.data = data or {
+            "chunks": 0,
+            "chars": 0,
+            "aliases": 0,
+            "by_source": {},
+            "by_book": {},
+            "by_type": {},
+        }
+        if embeddings:
+            self.data.setdefault("embedded", 0)
+
+    def add(self, text: str, metadata: Dict[str, Any], embedded: Optional[bool] = None) -> None:
+        chars = len(text or "")
+        self.data["chunks"] += 1
+        self.data["chars"] += chars
+        if embedded is not None and "embedded" in self.data:
+            self.data["embedded"] += int(embedded)
+        for group, key in (
+            ("by_source", metadata.get("source", "unknown")),
+            ("by_type", metadata.get("type", "other")),
+            ("by_book", metadata.get("book")),
+        ):
+            if key is None:
+                continue
+            entry = self.data[group].setdefault(str(key), {"chunks": 0, "chars": 0})
+            entry["chunks"] += 1
+            entry["chars"] += chars
+
+    def add_alias(self) -> None:
+        # A near-duplicate represented by a canonical chunk (not stored, not embedded)
+        self.data["aliases"] += 1
+
+    def add_embedded(self, count: int, failed: bool = False) -> None:
+        """Chunks already counted by add() that were upserted with a vector (or whose batch gave up)."""
+        key = "embedding_failed" if failed else "embedded"
+        self.data[key] = self.data.get(key, 0) + count
+
+    def merge(self, other: Dict[str, Any], sign: int = 1) -> None:
+        """Adds another counter's data (`sign=-1` takes it back out, e.g. a file re-ingested or deleted)."""
+        for key in ("chunks", "chars", "aliases", "embedded", "embedding_failed"):
+            if key in other or key in self.data:
+                self.data[key] = self.data.get(key, 0) + sign * other.get(key, 0)
+        for group in ("by_source", "by_book", "by_type"):
+            for key, entry in other.get(group, {}).items():
+                mine = self.data[group].setdefault(key, {"chunks": 0, "chars": 0})
+                mine["chunks"] += sign * entry["chunks"]
+                mine["chars"] += sign * entry["chars"]
+                if mine["chunks"] <= 0:
+                    del self.data[group][key]
+
+    def summary(self) -> Dict[str, Any]:
+        chunks = self.data["chunks"]
+        summary = {**self.data, "avg_chunk_chars": round(self.data["chars"] / chunks, 1) if chunks else 0.0}
+        if "embedded" in self.data:
+            # Over every recorded chunk, those of failed batches included
+            summary["embedding_coverage"] = round(self.data["embedded"] / chunks, 4) if chunks else 0.0
+        return summary
+
+
+class CorpusStatsSidecar:
+    """
+    Corpus statistics kept next to the ingest manifest: one ChunkCounter per
+    source file, replaced whenever the pipeline re-ingests that file, and the
+    running corpus totals, updated as files are recorded or removed. The
+    counters track embedding coverage (see ChunkCounter).
+
+    The totals are saved on their own at `path` (a small JSON, whatever the
+    size of the collection); the per-file counters, only needed by the next
+    ingestion, go to `<path>.files`.
+    """
+
+    def __init__(self, path: str, files: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = path
+        self.files = files or {}
+        self.totals = ChunkCounter(embeddings=True)
+        for data in self.files.values():
+            self.totals.merge(data)
+
+    @property
+    def files_path(self) -> str:
+        return f"{self.path}.files"
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CorpusStatsSidecar"]:
+        sidecar = cls(path)
+        if not os.path.exists(path) or not os.path.exists(sidecar.files_path):
+            return None
+        with open(sidecar.files_path, "r", encoding="utf-8") as f:
+            files = json.load(f)
+        if any("embedded" not in data for data in files.values()):
+            # Written before coverage was tracked: rebuilt by re-parsing every file
+            return None
+        return cls(path, files)
+
+    def record(self, rel_path: str, counter: ChunkCounter) -> None:
+        self.remove(rel_path)
+        self.files[rel_path] = counter.data
+        self.totals.merge(counter.data)
+
+    def remove(self, rel_path: str) -> None:
+        data = self.files.pop(rel_path, None)
+        if data is not None:
+            self.totals.merge(data, sign=-1)
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.totals.summary(), "files": len(self.files)}
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Per-file part first: a summary on disk always has its files next to it
+        _write_json(self.files_path, self.files)
+        _write_json(self.path, {"updated_at": time.time(), **self.summary()})
+
+
+def _write_json(path: str, payload: Any) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_summary(path: str) -> Optional[Dict[str, Any]]:
+    """The corpus totals saved by the last ingestion, or None before the first one."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scan_collection(collection, page_size: int = 1000, embeddings: bool = False) -> Dict[str, Any]:
+    """
+    The same statistics computed from the collection itself, page by page.
+    With `embeddings`, the embedding coverage is checked on the stored vectors
+    (heavier: every vector crosses the wire).
+    """
+    counter = ChunkCounter(embeddings=embeddings)
+    include = ["documents", "metadatas"] + (["embeddings"] if embeddings else [])
+    for _, document, metadata, embedding in iter_collection(collection, include, page_size=page_size):
+        counter.add(document, metadata, embedded=embedding is not None if embeddings else None)
+    return counter.summary()
@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.core.text import fold
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows <= num_perm minimizing false positives + false negatives around `threshold`."""
+    below = np.linspace(0.0, threshold, 64)
+    above = np.linspace(threshold, 1.0, 64)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            # Probability of becoming candidates, integrated below (false positives) and above (misses) the threshold
+            false_positive = float(np.mean(1 - (1 - below ** rows) ** bands)) * threshold
+            false_negative = float(np.mean((1 - above ** rows) ** bands)) * (1 - threshold)
+            if false_positive + false_negative < best_error:
+                best, best_error = (bands, rows), false_positive + false_negative
+    return best
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Accent-folded word n-grams: editions differing in accents, punctuation or line breaks still match."""
+    words = re.findall(r"[a-z0-9]+", fold(text))
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHashDeduplicator:
+    """
+    Near-duplicate detection across the non-scripture chunks (several editions
+    of the same classic, re-exported books): MinHash signatures over word
+    shingles, banded LSH to find candidates, and the estimated Jaccard
+    similarity against `threshold` to confirm them.
+
+    The first chunk seen stays canonical and is embedded and stored; later
+    near-duplicates are skipped and recorded as its aliases (chunk id, file and
+    source), so the canonical chunk can cite every edition it stands for. The
+    state is saved next to the ingest manifest, so incremental runs keep
+    deduplicating against chunks ingested before.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.RandomState(seed)
+        # Below 2**31, so a * hash + b (32-bit shingle hashes) never overflows uint64
+        self._a = rng.randint(1, 1 << 31, num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, num_perm).astype(np.uint64)
+
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.sources: Dict[str, str] = {}
+        self.buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        # alias chunk id -> {"canonical", "file", "source"}
+        self.aliases: Dict[str, Dict[str, str]] = {}
+        # Canonical chunks whose alias list changed since the last save (their metadata needs an update)
+        self.changed: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles(text, self.shingle_size)), dtype=np.uint64
+        )
+        if not len(hashes):
+            return np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint32)
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, cid: str, text: str, source: str, signature: Optional[np.ndarray] = None) -> None:
+        """Registers a stored chunk as canonical."""
+        if cid in self.signatures:
+            return
+        signature = self.signature(text) if signature is None else signature
+        self.signatures[cid] = signature
+        self.sources[cid] = source
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(cid)
+
+    def canonical_of(self, cid: str, text: str, source: str, rel_path: str) -> Optional[str]:
+        """
+        The id of the stored chunk `text` nearly duplicates (recording the alias),
+        or None after registering the chunk as a new canonical one.
+        """
+        if cid in self.signatures:
+            return None
+        alias = self.aliases.get(cid)
+        if alias and alias["canonical"] in self.signatures:
+            return alias["canonical"]
+
+        signature = self.signature(text)
+        best, best_similarity = None, self.threshold
+        for candidate in {c for key in self._band_keys(signature) for c in self.buckets.get(key, ())}:
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is None:
+            self.add(cid, text, source, signature)
+            return None
+        self.aliases[cid] = {"canonical": best, "file": rel_path, "source": source}
+        self.changed.add(best)
+        return best
+
+    def forget_file(self, rel_path: str) -> None:
+        """Drops the aliases recorded for a file (it is being re-ingested or was deleted)."""
+        for cid in [cid for cid, alias in self.aliases.items() if alias["file"] == rel_path]:
+            self.changed.add(self.aliases.pop(cid)["canonical"])
+
+    def remove(self, ids: List[str]) -> Set[str]:
+        """Unregisters deleted canonical chunks; returns the files whose aliases pointed at them."""
+        removed = set(ids) & set(self.signatures)
+        for cid in removed:
+            signature = self.signatures.pop(cid)
+            self.sources.pop(cid, None)
+            for key in self._band_keys(signature):
+                bucket = self.buckets.get(key)
+                if bucket and cid in bucket:
+                    bucket.remove(cid)
+                    if not bucket:
+                        del self.buckets[key]
+        orphaned = set()
+        for cid in [cid for cid, alias in self.aliases.items() if alias["canonical"] in removed]:
+            orphaned.add(self.aliases.pop(cid)["file"])
+        self.changed -= removed
+        return orphaned
+
+    def alias_sources(self, ids: Iterable[str]) -> Dict[str, List[str]]:
+        """Sources (other than its own) each canonical chunk stands for, in one pass over the aliases."""
+        found: Dict[str, Set[str]] = {cid: set() for cid in ids}
+        for alias in self.aliases.values():
+            sources = found.get(alias["canonical"])
+            if sources is not None and alias["source"] != self.sources.get(alias["canonical"]):
+                sources.add(alias["source"])
+        return {cid: sorted(sources) for cid, sources in found.items()}
+
+    # --- Persistence ---
+    def save(self, path: str) -> None:
+        """Signatures as .npz plus the sources and aliases as JSON inside it, written atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        ids = list(self.signatures)
+        state = {
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "shingle_size": self.shingle_size,
+            "sources": [self.sources.get(cid, "") for cid in ids],
+            "aliases": self.aliases,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array(ids, dtype="S32"),
+                signatures=np.array([self.signatures[cid] for cid in ids], dtype=np.uint32).reshape(-1, self.num_perm),
+                state=np.frombuffer(json.dumps(state, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 3) -> "MinHashDeduplicator":
+        """Raises ValueError when the saved state was built with other settings (it must be rebuilt)."""
+        dedup = cls(threshold, num_perm, shingle_size)
+        with np.load(path) as data:
+            state = json.loads(data["state"].tobytes().decode("utf-8"))
+            if (state["threshold"], state["num_perm"], state["shingle_size"]) != (threshold, num_perm, shingle_size):
+                raise ValueError("near-duplicate index was built with different settings")
+            for cid, signature, source in zip(data["ids"], data["signatures"], state["sources"]):
+                dedup.add(cid.decode("ascii"), "", source, signature)
+        dedup.aliases = state["aliases"]
+        return dedup
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "canonical_chunks": len(self.signatures),
+            "aliases": len(self.aliases),
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+        }
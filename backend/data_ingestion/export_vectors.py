@@ -0,0 +1,44 @@
+from backend.core.config import settings
+from backend.data_ingestion.corpus_stats import iter_collection
+from backend.services.local_vector_index import LocalVectorIndex
+
+
+def export_local_index(client, page_size: int = 1000) -> LocalVectorIndex:
+    """Snapshots embeddings + metadata from Chroma into the memory-mapped local index."""
+    collection = client.get_collection("scripture_corpus", embedding_function=None)
+    where = {"type": "scripture"} if settings.LOCAL_VECTOR_SCOPE == "scripture" else None
+
+    ids, texts, metadatas, vectors = [], [], [], []
+    chunks = iter_collection(collection, ["documents", "metadatas", "embeddings"], where=where, page_size=page_size)
+    for cid, text, metadata, vector in chunks:
+        ids.append(cid)
+        texts.append(text)
+        metadatas.append(metadata)
+        vectors.append(vector)
+
+    if not ids:
+        raise ValueError("Nothing to export: the collection has no matching chunks.")
+
+    index = LocalVectorIndex.build(
+        vectors,
+        ids,
+        texts,
+        metadatas,
+        model=settings.EMBEDDING_MODEL_NAME,
+        scope=settings.LOCAL_VECTOR_SCOPE,
+        quantization=settings.LOCAL_VECTOR_QUANTIZATION,
+        pca_dim=settings.LOCAL_VECTOR_PCA_DIM,
+    )
+    index.save(settings.LOCAL_VECTOR_INDEX_PATH)
+    stats = index.stats()
+    print(
+        f"Local vector index saved to {settings.LOCAL_VECTOR_INDEX_PATH} "
+        f"({stats['chunks']} chunks, {stats['dimensions']}d {stats['quantization']}, {stats['bytes'] / 1e6:.1f} MB)."
+    )
+    return index
+
+
+if __name__ == "__main__":
+    import chromadb
+
+    export_local_index(chromadb.HttpClient(host=settings.CHROMADB_HOST, port=settings.CHROMADB_PORT))
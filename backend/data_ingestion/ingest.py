@@ -1,222 +1,189 @@
 import os
-import glob
-from typing import List
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
+import asyncio
 from backend.core.config import settings
-
-import json
-from langchain_core.documents import Document
-
-def load_bible_structured(json_path: str) -> List[Document]:
-    print(f"Loading Bible Structure from {json_path}...")
-    documents = []
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
-        bible_data = json.load(f)
-        
-    for book in bible_data:
-        book_name = book.get("name")
-        chapters = book.get("chapters", [])
-        
-        for chapter_idx, chapter_verses in enumerate(chapters):
-            chapter_num = chapter_idx + 1
-            
-            # Semantic Chunking: Group verses (e.g., 5 verses per chunk)
-            chunk_size = 5
-            for i in range(0, len(chapter_verses), chunk_size):
-                verses_chunk = chapter_verses[i : i + chunk_size]
-                start_verse = i + 1
-                end_verse = i + len(verses_chunk)
-                verses_ref = f"{start_verse}-{end_verse}" if start_verse != end_verse else f"{start_verse}"
-                
-                # Create Content with explicit context header
-                content_header = f"[{book_name} {chapter_num}:{verses_ref}]\n"
-                
-                verse_text_block = ""
-                for v_idx, text in enumerate(verses_chunk):
-                    verse_num = start_verse + v_idx
-                    verse_text_block += f"{verse_num}. {text}\n"
-                    
-                full_content = content_header + verse_text_block
-                
-                doc = Document(
-                    page_content=full_content,
-                    metadata={
-                        "source": "Bible (ACF)",
-                        "book": book_name,
-                        "chapter": chapter_num,
-                        "verses": verses_ref,
-                        "type": "scripture" 
-                    }
-                )
-                documents.append(doc)
-                
-    print(f"  Bible processed: {len(documents)} semantic chunks created.")
-    return documents
-
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
-
-class CustomEpubLoader:
-    def __init__(self, file_path: str):
-        self.file_path = file_path
-
-    def load(self) -> List[Document]:
-        try:
-            book = epub.read_epub(self.file_path)
-            documents = []
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    # Ignore navigation files if possible, but simplest is just check text content
-                    try:
-                        content = item.get_content().decode('utf-8')
-                        soup = BeautifulSoup(content, 'html.parser')
-                        text = soup.get_text()
-                        if len(text.strip()) > 50: # Filter empty/tiny chapters
-                             documents.append(Document(
-                                 page_content=text,
-                                 metadata={"source": os.path.basename(self.file_path)}
-                             ))
-                    except:
-                        continue 
-            return documents
-        except Exception as e:
-            print(f"Error loading EPUB {self.file_path}: {e}")
-            return []
-
-def load_documents(source_dir: str) -> List[Document]:
-    documents = []
-    
-    # 1. SPECIAL: Structured Bible JSON
-    bible_json_path = os.path.join(source_dir, "bible_data.json")
-    if os.path.exists(bible_json_path):
-        documents.extend(load_bible_structured(bible_json_path))
-    
-    # 2. Load PDFs
-    for file_path in glob.glob(os.path.join(source_dir, "**/*.pdf"), recursive=True):
-        print(f"Loading {file_path}...")
-        loader = PyPDFLoader(file_path)
-        documents.extend(loader.load())
-    
-    # 3. Load EPUBs
-    for file_path in glob.glob(os.path.join(source_dir, "**/*.epub"), recursive=True):
-        print(f"Loading {file_path}...")
-        loader = CustomEpubLoader(file_path)
-        documents.extend(loader.load())
-
-    # 4. Load Markdown files (Skip bible_complete.md to avoid double ingestion)
-    for file_path in glob.glob(os.path.join(source_dir, "**/*.md"), recursive=True):
-         if "bible_complete.md" in file_path and os.path.exists(bible_json_path):
-             print(f"Skipping {file_path} (Using structured JSON instead)")
-             continue
-             
-         print(f"Loading {file_path}...")
-         loader = TextLoader(file_path)
-         documents.extend(loader.load())
-    
-    return documents
-
-def split_documents(documents: List[Document]):
-    # Separate pre-chunked (Bible) from raw docs
-    pre_chunked = [doc for doc in documents if doc.metadata.get("type") == "scripture"]
-    raw_docs = [doc for doc in documents if doc.metadata.get("type") != "scripture"]
-    
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-        is_separator_regex=False,
-    )
-    
-    split_raw = text_splitter.split_documents(raw_docs)
-    
-    # Combine both
-    return pre_chunked + split_raw
+from backend.services.embedding_cache import build_embeddings
+from backend.services.lexical_index import BM25Index
+from backend.data_ingestion.manifest import IngestManifest, CheckpointJournal
+from backend.data_ingestion.pipeline import IngestionPipeline
+from backend.data_ingestion.dedup import MinHashDeduplicator
+from backend.data_ingestion.corpus_stats import CorpusStatsSidecar, iter_collection
+from backend.data_ingestion.export_vectors import export_local_index
+from backend.services.verse_store import VerseStore
+from backend.data_ingestion.loaders import iter_source_files
 
 def ingest_data():
     if not settings.GOOGLE_API_KEY:
         print("Error: GOOGLE_API_KEY is missing.")
         return
 
-    print("Loading documents...")
-    docs = load_documents(settings.SOURCE_DOCS_PATH)
-    if not docs:
+    source_files = iter_source_files(settings.SOURCE_DOCS_PATH)
+    if not source_files:
         print("No documents found in source_docs/")
         return
-        
-    print(f"Loaded {len(docs)} documents.")
-    
+
     print("Initializing Embeddings...")
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=settings.GOOGLE_API_KEY)
+    embeddings = build_embeddings()
     
     print("Connecting to ChromaDB...")
     import chromadb
     client = chromadb.HttpClient(host=settings.CHROMADB_HOST, port=settings.CHROMADB_PORT)
     
-    vector_store = Chroma(
-        client=client,
-        collection_name="scripture_corpus",
-        embedding_function=embeddings,
+    # --- INCREMENTAL STATE ---
+    # The manifest records (file, mtime, hash, chunk IDs) of everything already ingested;
+    # the journal records batches committed by a run that did not finish.
+    manifest = IngestManifest.load(settings.INGEST_MANIFEST_PATH)
+    journal = CheckpointJournal(settings.INGEST_JOURNAL_PATH)
+
+    legacy_keys = set()
+    if not manifest.bootstrapped:
+        legacy_keys = load_legacy_keys(client)
+
+    # The BM25 index is updated incrementally and saved once at the end; rebuild it from
+    # every file if it is missing or a previous run died before saving it
+    dirty_marker = f"{settings.LEXICAL_INDEX_PATH}.dirty"
+    rebuild_lexical = not os.path.exists(settings.LEXICAL_INDEX_PATH) or os.path.exists(dirty_marker)
+    # The near-duplicate index shares that lifecycle: every file is re-parsed when either one is missing
+    deduplicator = None
+    if settings.INGEST_DEDUP_ENABLED:
+        deduplicator = None if rebuild_lexical else load_deduplicator(settings.INGEST_DEDUP_INDEX_PATH)
+        if deduplicator is None:
+            rebuild_lexical = True
+            deduplicator = MinHashDeduplicator(settings.INGEST_DEDUP_THRESHOLD, settings.INGEST_DEDUP_NUM_PERM)
+    # So does the corpus stats sidecar (per-file counts, saved with the other indexes at the end of the run)
+    corpus_stats = None if rebuild_lexical else CorpusStatsSidecar.load(settings.CORPUS_STATS_PATH)
+    if corpus_stats is None:
+        rebuild_lexical = True
+        corpus_stats = CorpusStatsSidecar(settings.CORPUS_STATS_PATH)
+    lexical_index = BM25Index() if rebuild_lexical else BM25Index.load(settings.LEXICAL_INDEX_PATH)
+    os.makedirs(os.path.dirname(dirty_marker) or ".", exist_ok=True)
+    open(dirty_marker, "w").close()
+
+    collection = client.get_or_create_collection("scripture_corpus", embedding_function=None)
+    if deduplicator is not None and not len(deduplicator):
+        # Chunks already stored stay canonical whatever order the files are parsed in
+        seeded = seed_deduplicator(collection, deduplicator)
+        print(f"Near-duplicate index rebuilt from {seeded} stored chunks.")
+
+    pipeline = IngestionPipeline(
+        collection=collection,
+        embeddings=embeddings,
+        manifest=manifest,
+        journal=journal,
+        lexical_index=lexical_index,
+        source_dir=settings.SOURCE_DOCS_PATH,
+        rebuild_lexical=rebuild_lexical,
+        legacy_keys=legacy_keys,
+        parse_workers=settings.INGEST_PARSE_WORKERS,
+        embed_concurrency=settings.INGEST_EMBED_CONCURRENCY,
+        requests_per_minute=settings.INGEST_EMBED_REQUESTS_PER_MINUTE,
+        # Ingest in smaller batches to avoid timeouts
+        batch_size=50,
+        deduplicator=deduplicator,
+        corpus_stats=corpus_stats,
     )
-    
-    # --- DUPLICATE PROTECTION ---
+
+    print(f"Ingesting {len(source_files)} source files...")
+    stats = asyncio.run(pipeline.run(source_files))
+
+    manifest.bootstrapped = True
+    manifest.save()
+    journal.clear()
+
+    lexical_index.save(settings.LEXICAL_INDEX_PATH)
+    if deduplicator is not None:
+        deduplicator.save(settings.INGEST_DEDUP_INDEX_PATH)
+    corpus_stats.save()
+    os.remove(dirty_marker)
+    print(f"Lexical index saved to {settings.LEXICAL_INDEX_PATH} ({len(lexical_index)} chunks).")
+    if deduplicator is not None:
+        report_duplicates(stats, pipeline.embedding_dim, deduplicator)
+    summary = corpus_stats.summary()
+    print(
+        f"Corpus stats saved to {settings.CORPUS_STATS_PATH} ({summary['chunks']} chunks from {summary['files']} files, "
+        f"{summary['chars'] / 1e6:.1f}M characters, {summary['embedding_coverage']:.1%} embedded)."
+    )
+    if stats["chunks_failed"]:
+        print(
+            f"⚠️  {stats['chunks_failed']} chunks in {stats['batches_failed']} batches could not be embedded; "
+            "their files will be ingested again on the next run."
+        )
+
+    if stats["chunks_upserted"] == 0 and stats["chunks_deleted"] == 0 and stats["chunks_failed"] == 0:
+        print("✅ No new documents to ingest. Everything is up to date!")
+    else:
+        print(
+            f"Ingestion complete! {stats['files_parsed']} files parsed, "
+            f"{stats['chunks_upserted']} chunks upserted, {stats['chunks_deleted']} deleted."
+        )
+
+    # Compact verse store for neighbor expansion (cheap to rebuild, so always refreshed)
+    bible_json_path = os.path.join(settings.SOURCE_DOCS_PATH, "bible_data.json")
+    if os.path.exists(bible_json_path):
+        verse_store = VerseStore.from_json(bible_json_path)
+        verse_store.save(settings.VERSE_STORE_PATH)
+        print(f"Verse store saved to {settings.VERSE_STORE_PATH} ({len(verse_store)} verses).")
+
+    # Refresh the in-process vector snapshot whenever the collection changed
+    changed = stats["chunks_upserted"] or stats["chunks_deleted"]
+    if settings.VECTOR_STORE_BACKEND == "local" and (changed or not os.path.exists(settings.LOCAL_VECTOR_INDEX_PATH)):
+        try:
+            export_local_index(client)
+        except Exception as e:
+            print(f"Warning: could not export the local vector index ({e}). The API will use Chroma.")
+
+def load_deduplicator(path: str):
+    """The saved near-duplicate index; None when it is missing or was built with other settings."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return MinHashDeduplicator.load(path, settings.INGEST_DEDUP_THRESHOLD, settings.INGEST_DEDUP_NUM_PERM)
+    except Exception as e:
+        print(f"Rebuilding the near-duplicate index ({e}).")
+        return None
+
+def seed_deduplicator(collection, deduplicator: MinHashDeduplicator) -> int:
+    """Registers the non-scripture chunks already in the collection as canonical."""
+    seeded = 0
+    chunks = iter_collection(collection, ["documents", "metadatas"], where={"type": {"$ne": "scripture"}})
+    for cid, text, meta, _ in chunks:
+        deduplicator.add(cid, text or "", meta.get("source", "unknown"))
+        if meta.get("alias_sources"):
+            # Rewritten from the aliases found again during this run
+            deduplicator.changed.add(cid)
+        seeded += 1
+    return seeded
+
+def report_duplicates(stats: dict, embedding_dim: int, deduplicator: MinHashDeduplicator) -> None:
+    skipped = stats["duplicates_skipped"]
+    # Text as stored by Chroma plus one float32 vector per chunk (HNSW links not counted)
+    saved_bytes = stats["duplicate_bytes"] + skipped * embedding_dim * 4
+    dedup_stats = deduplicator.stats()
+    print(
+        f"Near-duplicates: {skipped} chunks skipped this run ({skipped} embeddings, "
+        f"~{saved_bytes / 1024 / 1024:.2f} MB of storage saved); "
+        f"{dedup_stats['aliases']} aliases of {dedup_stats['canonical_chunks']} canonical chunks in total."
+    )
+
+def load_legacy_keys(client) -> set:
+    """(source, book) pairs of a collection ingested before the manifest existed."""
     print("Checking for existing documents...")
     try:
-        # Get all metadatas to find unique sources
         collection = client.get_collection("scripture_corpus")
-        # We need to fetch metadata to check for existing books
-        existing_data = collection.get(include=["metadatas"])
-        
+        if collection.count() == 0:
+            return set()
+        # Metadata only, a page at a time (one full-collection get() stalls Chroma on large corpora)
         existing_keys = set()
-        for meta in existing_data.get("metadatas", []):
+        for _, _, meta, _ in iter_collection(collection, ["metadatas"]):
             if meta:
                 source = meta.get("source", "unknown")
                 book = meta.get("book", None) # Bible chunks have 'book'
                 existing_keys.add((source, book))
-        
+
         print(f"Found {len(existing_keys)} existing unique (source, book) entries in database.")
+        return existing_keys
     except Exception as e:
         print(f"Warning: Could not check duplicates ({e}). Assuming empty DB.")
-        existing_keys = set()
-
-    # Filter docs
-    new_docs = []
-    skipped_count = 0
-    for doc in docs:
-        source = doc.metadata.get("source", "unknown")
-        book = doc.metadata.get("book", None)
-        
-        if (source, book) in existing_keys:
-            skipped_count += 1
-        else:
-            new_docs.append(doc)
-            
-    if skipped_count > 0:
-        print(f"⚠️  Skipping {skipped_count} chunks (already ingested).")
-    
-    if not new_docs:
-        print("✅ No new documents to ingest. Everything is up to date!")
-        return
-
-    print(f"Preparing to ingest {len(new_docs)} new chunks...")
-    chunks = split_documents(new_docs) 
-    print(f"Split into {len(chunks)} chunks.")
-    
-    print("Ingesting into ChromaDB...")
-    
-    # Process in smaller batches to avoid timeouts
-    batch_size = 50 
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i : i + batch_size]
-        print(f"Ingesting batch {i // batch_size + 1}/{len(chunks) // batch_size + 1} ({len(batch)} chunks)...")
-        # Retry logic is handled by langchain/tenacity mostly, but smaller batch helps
-        vector_store.add_documents(documents=batch)
-        
-    print("Ingestion complete!")
+        return set()
 
 if __name__ == "__main__":
     ingest_data()
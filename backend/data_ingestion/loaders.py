@@ -0,0 +1,147 @@
+import os
+import glob
+from typing import Iterable, Iterator, List
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import json
+from langchain_core.documents import Document
+
+def load_bible_structured(json_path: str) -> List[Document]:
+    print(f"Loading Bible Structure from {json_path}...")
+    documents = []
+    
+    with open(json_path, 'r', encoding='utf-8') as f:
+        bible_data = json.load(f)
+        
+    for book in bible_data:
+        book_name = book.get("name")
+        chapters = book.get("chapters", [])
+        
+        for chapter_idx, chapter_verses in enumerate(chapters):
+            chapter_num = chapter_idx + 1
+            
+            # Semantic Chunking: Group verses (e.g., 5 verses per chunk)
+            chunk_size = 5
+            for i in range(0, len(chapter_verses), chunk_size):
+                verses_chunk = chapter_verses[i : i + chunk_size]
+                start_verse = i + 1
+                end_verse = i + len(verses_chunk)
+                verses_ref = f"{start_verse}-{end_verse}" if start_verse != end_verse else f"{start_verse}"
+                
+                # Create Content with explicit context header
+                content_header = f"[{book_name} {chapter_num}:{verses_ref}]\n"
+                
+                verse_text_block = ""
+                for v_idx, text in enumerate(verses_chunk):
+                    verse_num = start_verse + v_idx
+                    verse_text_block += f"{verse_num}. {text}\n"
+                    
+                full_content = content_header + verse_text_block
+                
+                doc = Document(
+                    page_content=full_content,
+                    metadata={
+                        "source": "Bible (ACF)",
+                        "book": book_name,
+                        "chapter": chapter_num,
+                        "verses": verses_ref,
+                        "type": "scripture" 
+                    }
+                )
+                documents.append(doc)
+                
+    print(f"  Bible processed: {len(documents)} semantic chunks created.")
+    return documents
+
+import ebooklib
+from ebooklib import epub
+from bs4 import BeautifulSoup
+
+class CustomEpubLoader:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def load(self) -> List[Document]:
+        try:
+            book = epub.read_epub(self.file_path)
+            documents = []
+            for item in book.get_items():
+                if item.get_type() == ebooklib.ITEM_DOCUMENT:
+                    # Ignore navigation files if possible, but simplest is just check text content
+                    try:
+                        content = item.get_content().decode('utf-8')
+                        soup = BeautifulSoup(content, 'html.parser')
+                        text = soup.get_text()
+                        if len(text.strip()) > 50: # Filter empty/tiny chapters
+                             documents.append(Document(
+                                 page_content=text,
+                                 metadata={"source": os.path.basename(self.file_path)}
+                             ))
+                    except:
+                        continue 
+            return documents
+        except Exception as e:
+            print(f"Error loading EPUB {self.file_path}: {e}")
+            return []
+
+def iter_source_files(source_dir: str) -> List[str]:
+    files = []
+
+    # 1. SPECIAL: Structured Bible JSON
+    bible_json_path = os.path.join(source_dir, "bible_data.json")
+    if os.path.exists(bible_json_path):
+        files.append(bible_json_path)
+
+    # 2. PDFs, 3. EPUBs
+    files.extend(glob.glob(os.path.join(source_dir, "**/*.pdf"), recursive=True))
+    files.extend(glob.glob(os.path.join(source_dir, "**/*.epub"), recursive=True))
+
+    # 4. Markdown files (Skip bible_complete.md to avoid double ingestion)
+    for file_path in glob.glob(os.path.join(source_dir, "**/*.md"), recursive=True):
+        if "bible_complete.md" in file_path and os.path.exists(bible_json_path):
+            print(f"Skipping {file_path} (Using structured JSON instead)")
+            continue
+        files.append(file_path)
+
+    return files
+
+def load_file(file_path: str) -> List[Document]:
+    if file_path.endswith(".json"):
+        return load_bible_structured(file_path)
+
+    print(f"Loading {file_path}...")
+    if file_path.endswith(".pdf"):
+        return PyPDFLoader(file_path).load()
+    if file_path.endswith(".epub"):
+        return CustomEpubLoader(file_path).load()
+    return TextLoader(file_path).load()
+
+def load_documents(source_dir: str) -> List[Document]:
+    documents = []
+    for file_path in iter_source_files(source_dir):
+        documents.extend(load_file(file_path))
+    return documents
+
+def iter_chunks(documents: Iterable[Document]) -> Iterator[Document]:
+    """Yields chunks one document at a time, so callers never hold the whole split corpus."""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        length_function=len,
+        is_separator_regex=False,
+    )
+    for doc in documents:
+        # Bible documents are already pre-chunked by verse windows
+        if doc.metadata.get("type") == "scripture":
+            yield doc
+        else:
+            yield from text_splitter.split_documents([doc])
+
+def split_documents(documents: List[Document]):
+    # Separate pre-chunked (Bible) from raw docs
+    pre_chunked = [doc for doc in documents if doc.metadata.get("type") == "scripture"]
+    raw_docs = [doc for doc in documents if doc.metadata.get("type") != "scripture"]
+    
+    # Combine both
+    return pre_chunked + list(iter_chunks(raw_docs))
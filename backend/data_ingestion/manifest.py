@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Set, Tuple
+
+
+def file_hash(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class IngestManifest:
+    """
+    Local record of what is already in the vector store, one entry per source file:
+    {"mtime", "size", "hash", "chunk_ids"}. Entries created from a pre-manifest
+    collection carry "legacy": True and no chunk IDs (their chunks have random IDs).
+    """
+
+    def __init__(self, path: str, files: Dict[str, dict] = None, bootstrapped: bool = False):
+        self.path = path
+        self.files: Dict[str, dict] = files or {}
+        # True once a full run has reconciled the manifest with a pre-manifest collection
+        self.bootstrapped = bootstrapped
+
+    @classmethod
+    def load(cls, path: str) -> "IngestManifest":
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path, data.get("files", {}), data.get("bootstrapped", False))
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files, "bootstrapped": self.bootstrapped}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def is_unchanged(self, rel_path: str, stat: os.stat_result) -> bool:
+        entry = self.files.get(rel_path)
+        return bool(entry) and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size
+
+    def record(self, rel_path: str, stat: os.stat_result, digest: str, chunk_ids: List[str]) -> None:
+        self.files[rel_path] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "hash": digest,
+            "chunk_ids": chunk_ids,
+        }
+
+
+class CheckpointJournal:
+    """
+    Append-only log of batches committed to the vector store for files whose
+    manifest entry has not been written yet. After a crash, the next run skips
+    the chunk IDs recorded here instead of re-embedding them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict[Tuple[str, str], Set[str]]:
+        committed: Dict[Tuple[str, str], Set[str]] = {}
+        if not os.path.exists(self.path):
+            return committed
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from the crash that left this journal behind
+                    continue
+                committed.setdefault((record["file"], record["hash"]), set()).update(record["ids"])
+        return committed
+
+    def append(self, rel_path: str, digest: str, ids: List[str]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"file": rel_path, "hash": digest, "ids": ids}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
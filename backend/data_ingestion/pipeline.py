@@ -0,0 +1,422 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from backend.core.hashing import chunk_id
+from backend.core.rate_limit import TokenBucket
+from backend.data_ingestion.corpus_stats import ChunkCounter, CorpusStatsSidecar
+from backend.data_ingestion.dedup import MinHashDeduplicator
+from backend.data_ingestion.loaders import iter_chunks, load_file
+from backend.data_ingestion.manifest import CheckpointJournal, IngestManifest, file_hash
+from backend.services.lexical_index import BM25Index
+
+_DONE = object()
+
+
+@dataclass
+class FileState:
+    rel_path: str
+    stat: os.stat_result
+    digest: str
+    old_ids: Set[str] = field(default_factory=set)
+    chunk_ids: List[str] = field(default_factory=list)
+    pending_batches: int = 0
+    split_done: bool = False
+    # Chunks of batches whose embedding gave up after the retries: not stored in this run
+    failed_ids: Set[str] = field(default_factory=set)
+    counts: ChunkCounter = field(default_factory=lambda: ChunkCounter(embeddings=True))
+
+
+@dataclass
+class Batch:
+    file: FileState
+    ids: List[str]
+    chunks: List[Document]
+    vectors: Optional[List[List[float]]] = None
+
+
+def clean_metadata(metadata: dict) -> dict:
+    # Chroma only accepts scalar, non-null metadata values
+    return {k: v for k, v in metadata.items() if isinstance(v, (str, int, float, bool))}
+
+
+class IngestionPipeline:
+    """
+    Streaming ingestion: parse (process pool) -> split (generator) ->
+    embed (N concurrent batches behind a token bucket) -> write (Chroma upserts
+    overlapped with the next embedding batches).
+
+    Every stage hands work over through a bounded queue, so peak memory is
+    bounded by the pipeline depth rather than by the size of the corpus.
+
+    With a `deduplicator`, near-duplicate non-scripture chunks are dropped at
+    the split stage (never embedded or stored); the canonical chunk gets their
+    sources in its `alias_sources` metadata at the end of the run.
+
+    With `corpus_stats`, each file's chunk counts are recorded in the stats
+    sidecar when the file is recorded in the manifest; the caller saves it
+    once the run is over. Embedding coverage is counted at the write stage:
+    chunks upserted with a vector, against every chunk recorded.
+
+    A batch whose embedding still fails after `max_retries` does not stop the
+    run: its chunks are counted as failed and the file is left marked for
+    re-ingestion, so the next run embeds what is missing.
+    """
+
+    def __init__(
+        self,
+        collection,
+        embeddings,
+        manifest: IngestManifest,
+        journal: CheckpointJournal,
+        lexical_index: BM25Index,
+        source_dir: str,
+        rebuild_lexical: bool = False,
+        legacy_keys: Optional[Set[Tuple[str, Optional[str]]]] = None,
+        parse_workers: int = 2,
+        embed_concurrency: int = 2,
+        requests_per_minute: float = 0,
+        batch_size: int = 50,
+        max_retries: int = 3,
+        deduplicator: Optional[MinHashDeduplicator] = None,
+        corpus_stats: Optional[CorpusStatsSidecar] = None,
+    ):
+        self.collection = collection
+        self.embeddings = embeddings
+        self.manifest = manifest
+        self.journal = journal
+        self.lexical_index = lexical_index
+        self.source_dir = source_dir
+        self.rebuild_lexical = rebuild_lexical
+        self.legacy_keys = legacy_keys or set()
+        self.parse_workers = parse_workers
+        self.embed_concurrency = embed_concurrency
+        self.rate_limiter = TokenBucket.per_minute(requests_per_minute, burst=embed_concurrency)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.deduplicator = deduplicator
+        self.corpus_stats = corpus_stats
+
+        self.resumed = journal.load()
+        self.stats = {
+            "files_parsed": 0,
+            "chunks_upserted": 0,
+            "chunks_deleted": 0,
+            "batches": 0,
+            "batches_failed": 0,
+            "chunks_failed": 0,
+            "duplicates_skipped": 0,
+            "duplicate_bytes": 0,
+            "files_requeued": 0,
+        }
+        self.embedding_dim = 0
+        self.requeued: Set[str] = set()
+
+    async def run(self, files: List[str]) -> Dict[str, int]:
+        if self.resumed:
+            print(f"Resuming interrupted ingestion ({sum(len(ids) for ids in self.resumed.values())} chunks already committed).")
+
+        seen = {os.path.relpath(f, self.source_dir) for f in files}
+        pending = files
+        while True:
+            await self._run_stages(pending)
+            await self._remove_deleted_files(seen)
+            await self._update_aliases()
+            # Files whose near-duplicates lost their canonical chunk during this pass go through once more
+            pending = [f for f in files if os.path.relpath(f, self.source_dir) in self.requeued]
+            self.requeued.clear()
+            if not pending:
+                return self.stats
+
+    async def _run_stages(self, files: List[str]) -> None:
+        parsed_q: asyncio.Queue = asyncio.Queue(maxsize=self.parse_workers)
+        embed_q: asyncio.Queue = asyncio.Queue(maxsize=self.embed_concurrency * 2)
+        write_q: asyncio.Queue = asyncio.Queue(maxsize=self.embed_concurrency * 2)
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            parser = asyncio.create_task(self._parse_stage(files, pool, parsed_q))
+            splitter = asyncio.create_task(self._split_stage(parsed_q, embed_q))
+            embedders = [asyncio.create_task(self._embed_stage(embed_q, write_q)) for _ in range(self.embed_concurrency)]
+            writer = asyncio.create_task(self._write_stage(write_q))
+
+            async def drain() -> None:
+                await splitter
+                for _ in embedders:
+                    await embed_q.put(_DONE)
+                await asyncio.gather(*embedders)
+                await write_q.put(_DONE)
+
+            tasks = [parser, splitter, writer, asyncio.create_task(drain()), *embedders]
+            # Any failing stage aborts the run; the journal keeps what was already written
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            failed = [t for t in done if not t.cancelled() and t.exception()]
+            if failed:
+                for task in tasks:
+                    task.cancel()
+                raise failed[0].exception()
+
+    # --- Stage 1: parsing (process pool, bounded number of files in flight) ---
+    async def _parse_stage(self, files: List[str], pool: ProcessPoolExecutor, parsed_q: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.parse_workers)
+
+        async def parse_one(file_path: str) -> None:
+            try:
+                rel_path = os.path.relpath(file_path, self.source_dir)
+                stat = os.stat(file_path)
+                entry = self.manifest.files.get(rel_path)
+                if self.manifest.is_unchanged(rel_path, stat) and not self.rebuild_lexical:
+                    return
+
+                digest = await asyncio.to_thread(file_hash, file_path)
+                if entry and entry.get("hash") == digest and not self.rebuild_lexical:
+                    # Touched but not edited
+                    entry.update({"mtime": stat.st_mtime, "size": stat.st_size})
+                    return
+
+                documents = await loop.run_in_executor(pool, load_file, file_path)
+                self.stats["files_parsed"] += 1
+                # Hand over before releasing the slot: this is what bounds memory
+                await parsed_q.put((FileState(rel_path, stat, digest), documents))
+            except Exception as e:
+                print(f"Error parsing {file_path}: {e}")
+            finally:
+                slots.release()
+
+        tasks = []
+        for file_path in files:
+            await slots.acquire()
+            tasks.append(asyncio.create_task(parse_one(file_path)))
+        await asyncio.gather(*tasks)
+        await parsed_q.put(_DONE)
+
+    # --- Stage 2: splitting + manifest diff (generator, one batch at a time) ---
+    async def _split_stage(self, parsed_q: asyncio.Queue, embed_q: asyncio.Queue) -> None:
+        while True:
+            item = await parsed_q.get()
+            if item is _DONE:
+                return
+            state, documents = item
+            entry = self.manifest.files.get(state.rel_path)
+            unchanged = bool(entry) and entry.get("hash") == state.digest
+
+            if not entry and self.legacy_keys and all(
+                (d.metadata.get("source", "unknown"), d.metadata.get("book", None)) in self.legacy_keys
+                for d in documents
+            ):
+                # --- DUPLICATE PROTECTION (pre-manifest collections) ---
+                print(f"⚠️  Skipping {state.rel_path} (already ingested before the manifest existed).")
+                chunks = list(iter_chunks(documents))
+                self.lexical_index.add_documents(chunks)
+                for chunk in chunks:
+                    state.counts.add(chunk.page_content, chunk.metadata, embedded=True)
+                self.manifest.record(state.rel_path, state.stat, state.digest, [])
+                self.manifest.files[state.rel_path]["legacy"] = True
+                self._record_stats(state)
+                self.manifest.save()
+                continue
+
+            if entry and entry.get("legacy") and not unchanged:
+                # Legacy chunks have random IDs; remove them by source, then continue as a fresh file
+                for source in {d.metadata.get("source") for d in documents}:
+                    await asyncio.to_thread(self.collection.delete, where={"source": source})
+                self.manifest.record(state.rel_path, state.stat, "", [])
+                self.manifest.save()
+                entry = self.manifest.files[state.rel_path]
+
+            state.old_ids = set(entry.get("chunk_ids", [])) if entry else set()
+            committed = self.resumed.get((state.rel_path, state.digest), set())
+            if self.deduplicator is not None and not unchanged:
+                # Its aliases are recomputed below
+                self.deduplicator.forget_file(state.rel_path)
+
+            seen: Set[str] = set()
+            batch_ids: List[str] = []
+            batch_chunks: List[Document] = []
+            for chunk in iter_chunks(documents):
+                cid = chunk_id(chunk.page_content, chunk.metadata)
+                if cid in seen:
+                    continue
+                seen.add(cid)
+                if self.deduplicator is not None and self._is_duplicate(state, cid, chunk, cid in committed, not unchanged):
+                    state.counts.add_alias()
+                    continue
+                state.chunk_ids.append(cid)
+                stored = unchanged or cid in state.old_ids or cid in committed
+                # Chunks sent to be embedded are counted by the write stage
+                state.counts.add(chunk.page_content, chunk.metadata, embedded=stored)
+                if self.rebuild_lexical or not unchanged:
+                    self.lexical_index.add_documents([chunk], ids=[cid])
+                if stored:
+                    continue
+
+                batch_ids.append(cid)
+                batch_chunks.append(chunk)
+                if len(batch_ids) >= self.batch_size:
+                    state.pending_batches += 1
+                    await embed_q.put(Batch(state, batch_ids, batch_chunks))
+                    batch_ids, batch_chunks = [], []
+                    # Let the other stages run between batches of a large file
+                    await asyncio.sleep(0)
+
+            if batch_ids:
+                state.pending_batches += 1
+                await embed_q.put(Batch(state, batch_ids, batch_chunks))
+
+            state.split_done = True
+            if unchanged:
+                # Parsed only to rebuild the lexical index (and the stats sidecar)
+                self._record_stats(state)
+                continue
+            if state.pending_batches == 0:
+                await self._finalize(state)
+
+    def _is_duplicate(self, state: FileState, cid: str, chunk: Document, stored: bool, count: bool) -> bool:
+        if chunk.metadata.get("type") == "scripture":
+            # Parallel passages (Psalms 14/53, Kings/Chronicles) stay apart: each is cited by its own book and verses
+            return False
+        source = chunk.metadata.get("source", "unknown")
+        if stored:
+            # Written by the interrupted run being resumed
+            self.deduplicator.add(cid, chunk.page_content, source)
+            return False
+        if self.deduplicator.canonical_of(cid, chunk.page_content, source, state.rel_path) is None:
+            return False
+        if count:
+            self.stats["duplicates_skipped"] += 1
+            self.stats["duplicate_bytes"] += len(chunk.page_content.encode("utf-8"))
+        return True
+
+    # --- Stage 3: embedding (N concurrent batches, shared token bucket) ---
+    async def _embed_stage(self, embed_q: asyncio.Queue, write_q: asyncio.Queue) -> None:
+        while True:
+            batch = await embed_q.get()
+            if batch is _DONE:
+                return
+            texts = [chunk.page_content for chunk in batch.chunks]
+            for attempt in range(self.max_retries):
+                await self.rate_limiter.acquire()
+                try:
+                    batch.vectors = await self.embeddings.aembed_documents(texts)
+                    self.embedding_dim = self.embedding_dim or len(batch.vectors[0])
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries - 1:
+                        # Handed to the writer without vectors, which records the gap
+                        print(f"Embedding batch of {batch.file.rel_path} failed after {self.max_retries} attempts ({e}).")
+                        batch.vectors = None
+                        break
+                    print(f"Embedding batch failed ({e}), retrying...")
+                    await asyncio.sleep(2 ** attempt)
+            await write_q.put(batch)
+
+    # --- Stage 4: writing (overlaps with the next embedding batches) ---
+    async def _write_stage(self, write_q: asyncio.Queue) -> None:
+        while True:
+            batch = await write_q.get()
+            if batch is _DONE:
+                return
+            if batch.vectors is None:
+                batch.file.failed_ids.update(batch.ids)
+                batch.file.counts.add_embedded(len(batch.ids), failed=True)
+                self.stats["batches_failed"] += 1
+                self.stats["chunks_failed"] += len(batch.ids)
+            else:
+                # Deterministic IDs make this an upsert, so replaying a batch is harmless
+                await asyncio.to_thread(
+                    self.collection.upsert,
+                    ids=batch.ids,
+                    embeddings=batch.vectors,
+                    documents=[chunk.page_content for chunk in batch.chunks],
+                    metadatas=[clean_metadata(chunk.metadata) for chunk in batch.chunks],
+                )
+                self.journal.append(batch.file.rel_path, batch.file.digest, batch.ids)
+                batch.file.counts.add_embedded(len(batch.ids))
+                self.stats["batches"] += 1
+                self.stats["chunks_upserted"] += len(batch.ids)
+                print(f"  {batch.file.rel_path}: wrote {len(batch.ids)} chunks ({self.stats['chunks_upserted']} total).")
+
+            batch.file.pending_batches -= 1
+            if batch.file.split_done and batch.file.pending_batches == 0:
+                await self._finalize(batch.file)
+
+    async def _finalize(self, state: FileState) -> None:
+        """Deletes stale chunks and records the file once all of its batches are written."""
+        stale = list(state.old_ids - set(state.chunk_ids))
+        if stale:
+            await asyncio.to_thread(self.collection.delete, ids=stale)
+            self.lexical_index.remove(stale)
+            self.stats["chunks_deleted"] += len(stale)
+            self._unregister(stale)
+        if state.failed_ids:
+            print(
+                f"{state.rel_path}: {len(state.failed_ids)} of {len(state.chunk_ids)} chunks not embedded, "
+                f"left for the next ingestion ({len(stale)} stale removed)."
+            )
+        else:
+            print(f"{state.rel_path}: up to date ({len(state.chunk_ids)} chunks, {len(stale)} stale removed).")
+        stored_ids = [cid for cid in state.chunk_ids if cid not in state.failed_ids]
+        self.manifest.record(state.rel_path, state.stat, state.digest, stored_ids)
+        if state.rel_path in self.requeued or state.failed_ids:
+            # Lost a canonical chunk while this file was in flight, or some of its batches failed
+            self._mark_for_reingestion(state.rel_path)
+        self._record_stats(state)
+        self.manifest.save()
+
+    def _record_stats(self, state: FileState) -> None:
+        if self.corpus_stats is not None:
+            self.corpus_stats.record(state.rel_path, state.counts)
+
+    async def _remove_deleted_files(self, seen: Set[str]) -> None:
+        for rel_path in [p for p in self.manifest.files if p not in seen]:
+            stale = self.manifest.files[rel_path].get("chunk_ids", [])
+            if stale:
+                print(f"{rel_path}: removed from source_docs, deleting {len(stale)} chunks.")
+                await asyncio.to_thread(self.collection.delete, ids=stale)
+                self.lexical_index.remove(stale)
+                self.stats["chunks_deleted"] += len(stale)
+                self._unregister(stale)
+            if self.deduplicator is not None:
+                self.deduplicator.forget_file(rel_path)
+            if self.corpus_stats is not None:
+                self.corpus_stats.remove(rel_path)
+            del self.manifest.files[rel_path]
+
+    # --- Near-duplicate bookkeeping ---
+    def _unregister(self, deleted_ids: List[str]) -> None:
+        """Deleted canonical chunks leave their aliases without a stored copy: those files are ingested again."""
+        if self.deduplicator is None:
+            return
+        for rel_path in self.deduplicator.remove(deleted_ids) - self.requeued:
+            self.requeued.add(rel_path)
+            self.stats["files_requeued"] += 1
+            self._mark_for_reingestion(rel_path)
+            print(f"{rel_path}: its near-duplicate chunks lost their canonical copy, queued for re-ingestion.")
+
+    def _mark_for_reingestion(self, rel_path: str) -> None:
+        entry = self.manifest.files.get(rel_path)
+        if entry:
+            # Fails both the mtime/size and the hash checks; chunk_ids stay for the stale diff
+            entry.update({"mtime": None, "hash": ""})
+
+    async def _update_aliases(self) -> None:
+        """Writes `alias_sources` on the canonical chunks whose aliases changed (Chroma and BM25)."""
+        if self.deduplicator is None or not self.deduplicator.changed:
+            return
+        alias_sources = self.deduplicator.alias_sources(self.deduplicator.changed & self.deduplicator.signatures.keys())
+        ids = list(alias_sources)
+        # None removes the key once a canonical chunk has no aliases left
+        metadatas = [{"alias_sources": "; ".join(sources) if sources else None} for sources in alias_sources.values()]
+        for start in range(0, len(ids), self.batch_size):
+            await asyncio.to_thread(
+                self.collection.update,
+                ids=ids[start:start + self.batch_size],
+                metadatas=metadatas[start:start + self.batch_size],
+            )
+        for cid, metadata in zip(ids, metadatas):
+            self.lexical_index.update_metadata(cid, metadata)
+        self.deduplicator.changed.clear()
@@ -1,40 +1,59 @@
+import argparse
 import chromadb
 from backend.core.config import settings
-import sys
+from backend.data_ingestion.corpus_stats import read_summary, scan_collection
+
+def print_summary(summary: dict):
+    print(f"📊 Total de Fragmentos (Chunks): {summary['chunks']}")
+    print(f"📝 Texto: {summary['chars']:,} caracteres (média {summary['avg_chunk_chars']} por chunk)")
+    if "embedding_coverage" in summary:
+        print(f"🧮 Cobertura de embeddings: {summary['embedding_coverage']:.1%}")
+    if summary.get("embedding_failed"):
+        print(f"⚠️  Chunks sem embedding (lotes que falharam, refeitos na próxima ingestão): {summary['embedding_failed']}")
+    if summary.get("aliases"):
+        print(f"♻️  Quase-duplicatas representadas por um chunk canônico: {summary['aliases']}")
+
+    print("\n🏷️  Por tipo:")
+    for kind, entry in sorted(summary["by_type"].items()):
+        print(f"   - {kind}: {entry['chunks']} chunks")
+
+    print("\n📚 Arquivos Indexados:")
+    if not summary["by_source"]:
+        print("   (Nenhuma fonte encontrada nos metadados)")
+    for source, entry in sorted(summary["by_source"].items()):
+        print(f"   - {source}: {entry['chunks']} chunks, {entry['chars']:,} caracteres")
+
+    if summary["by_book"]:
+        print(f"\n📖 Livros da Bíblia: {len(summary['by_book'])}")
+
+def inspect(scan: bool = False, embeddings: bool = False, page_size: int = 1000):
+    # The ingestion keeps a stats sidecar up to date; reading it costs nothing
+    summary = None if scan or embeddings else read_summary(settings.CORPUS_STATS_PATH)
+    if summary is not None:
+        print(f"📄 Estatísticas da última ingestão ({settings.CORPUS_STATS_PATH}); use --scan para ler o banco.")
+        print_summary(summary)
+        return
 
-def inspect():
     print("🔍 Conectando ao ChromaDB...")
     try:
         client = chromadb.HttpClient(host=settings.CHROMADB_HOST, port=settings.CHROMADB_PORT)
         collection = client.get_collection("scripture_corpus")
-        
-        count = collection.count()
-        print(f"📊 Total de Fragmentos (Chunks): {count}")
-        
-        if count == 0:
+
+        if collection.count() == 0:
             print("⚠️  O banco de dados está vazio.")
             return
 
-        # Fetch metadata to see sources (limit to first 10000 to be safe, though usually fine)
-        # We just want unique sources
-        print("📂 Analisando fontes...")
-        result = collection.get(include=["metadatas"])
-        metadatas = result.get("metadatas", [])
-        
-        sources = set()
-        for meta in metadatas:
-            if meta and "source" in meta:
-                sources.add(meta["source"])
-        
-        print("\n📚 Arquivos Indexados:")
-        if not sources:
-            print("   (Nenhuma fonte encontrada nos metadados)")
-        else:
-            for source in sorted(sources):
-                print(f"   - {source}")
-                
+        # Page by page, so neither Chroma nor this process holds the whole collection
+        print(f"📂 Analisando o banco em páginas de {page_size}...")
+        print_summary(scan_collection(collection, page_size=page_size, embeddings=embeddings))
+
     except Exception as e:
         print(f"❌ Erro ao inspecionar banco: {e}")
 
 if __name__ == "__main__":
-    inspect()
+    parser = argparse.ArgumentParser(description="Resumo do corpus indexado.")
+    parser.add_argument("--scan", action="store_true", help="Percorre o Chroma em vez de ler o arquivo de estatísticas")
+    parser.add_argument("--embeddings", action="store_true", help="Confere os vetores armazenados (implica --scan)")
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+    inspect(scan=args.scan, embeddings=args.embeddings, page_size=args.page_size)
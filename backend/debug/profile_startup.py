@@ -0,0 +1,90 @@
+"""
+Cold-start profile: import time of the API module (python -X importtime) and,
+optionally, the background warm-up of every RAG component.
+
+    python backend/debug/profile_startup.py [--warmup] [--max-import-ms 1500]
+
+Exits non-zero when the API import exceeds --max-import-ms, so a heavy import
+sneaking back onto the startup path fails CI instead of slowing every deploy.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+
+def profile_imports(module: str, top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed.")
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    # (nesting is shown by indenting the package name)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        indent = len(raw_name) - len(raw_name.lstrip(" "))
+        rows.append((int(cumulative_us), int(self_us), raw_name.strip(), indent))
+    if not rows:
+        return 0.0
+
+    total_ms = next((cumulative / 1000 for cumulative, _, name, _ in rows if name == module), 0.0)
+    print(f"\n⏱️  import {module}: {total_ms:.0f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    top_indent = min(row[3] for row in rows)
+    top_level = [row[:3] for row in rows if row[3] <= top_indent + 2]
+    for cumulative, self_us, name in sorted(top_level, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    return total_ms
+
+
+async def profile_warmup():
+    from backend.core.config import settings
+    from backend.core.startup import Warmup
+
+    def build():
+        from backend.services.rag_service import RAGService
+        return RAGService()
+
+    warmup = Warmup(retries=1)
+    started = time.perf_counter()
+    service = await warmup.run("rag_service", build)
+    if service is not None:
+        steps = service.warmup_steps()
+        await asyncio.gather(*(warmup.run(name, loader, required) for name, loader, required in steps))
+    total_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n🔥 Warm-up: {total_ms:.0f} ms (ready={warmup.ready}, chroma={settings.CHROMADB_HOST}:{settings.CHROMADB_PORT})")
+    for name, state in warmup.report()["components"].items():
+        error = f"  ({state['error']})" if state["error"] else ""
+        print(f"   {name:<12} {state['status']:<7} {state['elapsed_ms']:>8.0f} ms{error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile backend cold start")
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-import-ms", type=float, default=0, help="fail if the import takes longer (0 = report only)")
+    parser.add_argument("--warmup", action="store_true", help="also build the RAG service components (needs .env and Chroma)")
+    args = parser.parse_args()
+
+    total_ms = profile_imports(args.module, args.top)
+    if args.warmup:
+        asyncio.run(profile_warmup())
+
+    if args.max_import_ms and total_ms > args.max_import_ms:
+        raise SystemExit(f"❌ import {args.module} took {total_ms:.0f} ms (budget {args.max_import_ms:.0f} ms).")
+
+
+if __name__ == "__main__":
+    main()
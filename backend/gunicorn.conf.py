@@ -0,0 +1,39 @@
+"""
+Multi-worker serving:
+
+    WEB_CONCURRENCY=4 gunicorn -c backend/gunicorn.conf.py backend.main:app
+
+The app is imported once in the master (preload_app), which then loads the
+read-only state (FlashRank weights, BM25, verse data, local vector index; see
+backend/services/preload.py) and freezes it out of the garbage collector before
+forking, so workers share those pages copy-on-write. Everything mutable (the
+RAG service itself, sockets, SQLite connections, threads, asyncio objects) is
+still built per worker, by the startup warm-up after the fork.
+
+Per-worker state that must be shared goes through disk: sessions use the
+SQLite store (the default with WEB_CONCURRENCY > 1), embeddings the SQLite
+cache. The answer cache, single-flight and /metrics stay per worker.
+"""
+import gc
+import os
+
+from backend.core.config import settings
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# SSE answers stream for a while; the uvicorn worker heartbeats independently of requests
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    # Runs in the master after the app import, right before the workers are spawned
+    import backend.main
+
+    backend.main.preload_shared_state()
+    # Keep the collector from touching (and so un-sharing) every preloaded object in each worker
+    gc.freeze()
+    server.log.info(f"Shared state preloaded; forking {server.num_workers} workers.")
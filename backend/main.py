@@ -1,7 +1,16 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from backend.services.rag_service import RAGService
+from typing import Literal, Optional
+from backend.core.config import settings
+from backend.core.sse import SSEStreamer
+from backend.core.startup import Warmup
+from backend.core.metrics import REGISTRY
+from backend.data_ingestion.corpus_stats import read_summary
+import asyncio
 import logging
+import os
+import secrets
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,44 +31,146 @@ app.add_middleware(
 class QueryRequest(BaseModel):
     query: str
     session_id: str = "default_session"
+    # Overrides settings.RETRIEVAL_MODE for this request
+    retrieval_mode: Optional[Literal["vector", "lexical", "hybrid"]] = None
 
 class QueryResponse(BaseModel):
     answer: str
     sources: list
 
-# Initialize RAG Service (Lazy loading or at startup)
+# RAG Service is built in the background after startup; /ready reports when it can serve
 rag_service = None
+warmup = Warmup(retries=settings.STARTUP_RETRIES, backoff_seconds=settings.STARTUP_RETRY_BACKOFF_SECONDS)
+warmup_task = None
+sse_streamer = SSEStreamer(
+    coalesce_ms=settings.SSE_COALESCE_MS,
+    coalesce_max_chars=settings.SSE_COALESCE_MAX_CHARS,
+    heartbeat_seconds=settings.SSE_HEARTBEAT_SECONDS,
+    disconnect_poll_seconds=settings.SSE_DISCONNECT_POLL_SECONDS,
+)
+
+# Scrape-time gauges (no sample until the service is up)
+def _cache_hit_ratios():
+    ratios = {}
+    if rag_service.answer_cache:
+        ratios["answer"] = rag_service.answer_cache.stats()["hit_rate"]
+    if hasattr(rag_service.embeddings, "store"):
+        store = rag_service.embeddings.store.stats()
+        lookups = store["memory_hits"] + store["disk_hits"] + store["misses"]
+        ratios["embedding"] = (store["memory_hits"] + store["disk_hits"]) / lookups if lookups else 0.0
+    if rag_service.rerank_cache is not None:
+        ratios["rerank"] = rag_service.rerank_cache.stats()["hit_rate"]
+    return ratios
+
+REGISTRY.gauge("rag_streams_in_flight", "SSE streams currently open.").set_function(lambda: sse_streamer.active)
+REGISTRY.gauge("rag_sessions", "Sessions held in memory.").set_function(
+    lambda: rag_service.sessions.memory_stats()["sessions"]
+)
+REGISTRY.gauge("rag_session_store_bytes", "Bytes of chat history held in memory.").set_function(
+    lambda: rag_service.sessions.memory_stats()["bytes"]
+)
+REGISTRY.gauge("rag_rerank_queue_depth", "Rerank requests waiting for the ONNX thread.").set_function(
+    lambda: rag_service.rerank_batcher.stats()["queue_depth"]
+)
+REGISTRY.gauge("rag_cache_hit_ratio", "Lifetime hit ratio per cache.", ("cache",)).set_function(_cache_hit_ratios)
+REGISTRY.gauge("rag_component_ready", "1 when a warm-up component is ready.", ("component",)).set_function(
+    lambda: {name: float(state.status == "ready") for name, state in warmup.components.items()}
+)
+
+def preload_shared_state():
+    # Called by gunicorn in the master before forking (backend/gunicorn.conf.py); workers reuse the result
+    from backend.services.preload import preload
+    return preload()
+
+def build_rag_service():
+    # Deferred: the service module pulls in LangChain, Gemini, numpy and friends
+    from backend.services.preload import preloaded
+    from backend.services.rag_service import RAGService
+    return RAGService(preloaded=preloaded())
+
+async def warm_up():
+    global rag_service
+    warmup.register("rag_service")
+    # Required components retry until they load, so this only returns once the service is complete
+    service = await warmup.run("rag_service", build_rag_service)
+    steps = service.warmup_steps()
+    for name, _, required in steps:
+        warmup.register(name, required)
+    # Chroma, the ONNX ranker, the indexes and the query cache warm up concurrently
+    await asyncio.gather(*(warmup.run(name, loader, required) for name, loader, required in steps))
+    rag_service = service
+    logger.info(f"RAG Service warm-up finished (ready={warmup.ready}).")
 
 @app.on_event("startup")
 async def startup_event():
-    global rag_service
-    try:
-        rag_service = RAGService()
-        logger.info("RAG Service initialized successfully.")
-    except Exception as e:
-        logger.error(f"Failed to initialize RAG Service: {e}")
-        # In a real app, you might want to stop startup or retry
+    global warmup_task
+    # Accept connections right away; requests get 503 until the required components are ready
+    warmup_task = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if warmup_task and not warmup_task.done():
+        # Still retrying a required component
+        warmup_task.cancel()
+    if rag_service:
+        # Background history summaries still running
+        await rag_service.history_compactor.aclose()
 
-import json
 from fastapi.responses import StreamingResponse
 
 @app.post("/chat")
-async def chat_endpoint(request: QueryRequest):
+async def chat_endpoint(request: QueryRequest, http_request: Request):
+    if not rag_service or not warmup.ready:
+         raise HTTPException(status_code=503, detail="RAG Service not ready")
+    
+    # Pass session_id to get_answer_stream; "X-Debug-Timings: 1" appends a stage-timings event
+    debug = http_request.headers.get("x-debug-timings", "").lower() in ("1", "true", "yes")
+    events = rag_service.get_answer_stream(
+        request.query, request.session_id, retrieval_mode=request.retrieval_mode, debug=debug
+    )
+    # Server-Sent Events (data: JSON\n\n); generation is cancelled if the client disconnects
+    return StreamingResponse(
+        sse_streamer.stream(events, http_request.is_disconnected), media_type="text/event-stream"
+    )
+
+@app.get("/stats")
+def stats_endpoint():
     if not rag_service:
          raise HTTPException(status_code=503, detail="RAG Service not initialized")
-    
-    async def event_generator():
-        try:
-            # Pass session_id to get_answer_stream
-            async for chunk in rag_service.get_answer_stream(request.query, request.session_id):
-                # Send as Server-Sent Events (SSE) data: JSON\n\n
-                yield f"data: {json.dumps(chunk)}\n\n"
-        except Exception as e:
-            logger.error(f"Error in stream: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'data': str(e)})}\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    stats = rag_service.get_stats()
+    stats["streaming"] = {**sse_streamer.stats(), "cancelled_generations": rag_service.cancelled_generations}
+    return stats
+
+# Sidecar written by the ingestion; re-read only when the file changes
+_corpus_stats = {"mtime": None, "summary": None}
+
+@app.get("/admin/corpus-stats")
+def corpus_stats_endpoint(x_admin_token: Optional[str] = Header(default=None)):
+    # Fails closed: without a configured token the admin endpoints do not exist
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        mtime = os.path.getmtime(settings.CORPUS_STATS_PATH)
+    except OSError:
+        raise HTTPException(status_code=404, detail="No corpus stats yet; run the ingestion")
+    if mtime != _corpus_stats["mtime"]:
+        _corpus_stats.update(mtime=mtime, summary=read_summary(settings.CORPUS_STATS_PATH))
+    return _corpus_stats["summary"]
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # Prometheus text exposition format; values are per worker process
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def readiness_check():
+    report = warmup.report()
+    report["ready"] = report["ready"] and rag_service is not None
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
 
 @app.get("/health")
 def health_check():
+    # Liveness only: the process is up and serving; see /ready for the components
     return {"status": "ok"}
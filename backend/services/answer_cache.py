@@ -0,0 +1,131 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: List[str]
+    embedding: np.ndarray
+    created_at: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed on the embedding of the standalone query.
+    A lookup is a hit when the cosine similarity between the incoming query
+    and a cached query is above `threshold`. Entries are evicted LRU-first
+    whenever the entry count or the memory budget is exceeded, and expire
+    after `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl_seconds: int = 24 * 3600,
+        max_entries: int = 2000,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._bytes = 0
+
+        # Stacked (normalized) embeddings, rebuilt lazily after any mutation
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry.size_bytes
+        self._matrix = None
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            entry_id for entry_id, entry in self._entries.items()
+            if now - entry.created_at > self.ttl_seconds
+        ]
+        for entry_id in expired:
+            self._remove(entry_id)
+            self.expirations += 1
+
+    def lookup(self, embedding: List[float]) -> Optional[CachedAnswer]:
+        self._purge_expired()
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[i].embedding for i in self._matrix_ids])
+
+        similarities = self._matrix @ self._normalize(embedding)
+        best = int(np.argmax(similarities))
+        if float(similarities[best]) < self.threshold:
+            self.misses += 1
+            return None
+
+        entry_id = self._matrix_ids[best]
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return self._entries[entry_id]
+
+    def store(self, embedding: List[float], answer: str, sources: List[str]) -> None:
+        vector = self._normalize(embedding)
+        size_bytes = (
+            vector.nbytes
+            + len(answer.encode("utf-8"))
+            + sum(len(s.encode("utf-8")) for s in sources)
+        )
+        if size_bytes > self.max_bytes:
+            return
+
+        entry = CachedAnswer(answer=answer, sources=list(sources), embedding=vector, size_bytes=size_bytes)
+        self._entries[self._next_id] = entry
+        self._next_id += 1
+        self._bytes += size_bytes
+        self._matrix = None
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self._matrix = None
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "threshold": self.threshold,
+        }
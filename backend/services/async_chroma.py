@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.core.resilience import ResilientCaller
+from backend.services.local_vector_index import maximal_marginal_relevance, normalize_rows, parse_query_result
+from backend.services.metadata_filter import Where
+
+COLLECTION_NAME = "scripture_corpus"
+
+
+async def connect_http_collection(host: str, port: int, max_connections: int):
+    """Chroma's async HTTP client: one pooled httpx.AsyncClient per event loop."""
+    import chromadb
+    from chromadb.config import Settings
+
+    client = await chromadb.AsyncHttpClient(
+        host=host,
+        port=port,
+        settings=Settings(
+            anonymized_telemetry=False,
+            chroma_http_max_connections=max_connections,
+            chroma_http_max_keepalive_connections=max_connections,
+        ),
+    )
+    return await client.get_collection(COLLECTION_NAME)
+
+
+class ThreadedCollection:
+    """
+    Async `query()` over a synchronous (e.g. in-process) Chroma collection, run on
+    a worker thread: the stand-in the benchmarks and local runs plug in instead
+    of the HTTP client.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.collection.query, **kwargs)
+
+
+class AsyncChromaRetriever:
+    """
+    Drop-in for the LangChain Chroma MMR retriever (`ainvoke(query) -> docs`)
+    that never blocks a thread on the network: the query embedding and the
+    Chroma search are both awaited natively, each through its own ResilientCaller
+    (timeout, bounded concurrency, jittered retries, circuit breaker).
+
+    The collection is created on first use, inside the serving event loop.
+    `sync_collection` only backs the synchronous `invoke()`.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Any]],
+        embeddings,
+        search_caller: ResilientCaller,
+        embed_caller: ResilientCaller,
+        sync_collection=None,
+        k: int = 20,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.7,
+    ):
+        self._connect = connect
+        self.embeddings = embeddings
+        self.search_caller = search_caller
+        self.embed_caller = embed_caller
+        self.sync_collection = sync_collection
+        self.k = k
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+        self._collection = None
+        self._connecting: Optional[asyncio.Lock] = None
+
+    async def _get_collection(self):
+        if self._collection is None:
+            self._connecting = self._connecting or asyncio.Lock()
+            async with self._connecting:
+                if self._collection is None:
+                    self._collection = await self._connect()
+        return self._collection
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        """`collection.query(**kwargs)` under the search policy (connecting counts as part of the call)."""
+
+        async def attempt():
+            collection = await self._get_collection()
+            return await collection.query(**kwargs)
+
+        return await self.search_caller.call(attempt)
+
+    async def embed_query(self, query: str) -> List[float]:
+        return await self.embed_caller.call(lambda: self.embeddings.aembed_query(query))
+
+    def _select(self, query_embedding: List[float], result: Dict[str, Any]) -> List[Document]:
+        docs, vectors = parse_query_result(result)
+        if not docs:
+            return []
+        query = normalize_rows(np.asarray([query_embedding], dtype=np.float32))[0]
+        selected = maximal_marginal_relevance(query, normalize_rows(vectors), self.k, self.lambda_mult)
+        return [docs[i] for i in selected]
+
+    def _query_kwargs(self, query_embedding: List[float], where: Optional[Where] = None) -> Dict[str, Any]:
+        kwargs = {
+            "query_embeddings": [query_embedding],
+            "n_results": self.fetch_k,
+            "include": ["documents", "metadatas", "embeddings"],
+        }
+        if where:
+            kwargs["where"] = where
+        return kwargs
+
+    async def ainvoke(self, query: str, where: Optional[Where] = None) -> List[Document]:
+        query_embedding = await self.embed_query(query)
+        result = await self.query(**self._query_kwargs(query_embedding, where))
+        return self._select(query_embedding, result)
+
+    def invoke(self, query: str) -> List[Document]:
+        query_embedding = self.embeddings.embed_query(query)
+        return self._select(query_embedding, self.sync_collection.query(**self._query_kwargs(query_embedding)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "chroma",
+            "search": self.search_caller.stats(),
+            "query_embedding": self.embed_caller.stats(),
+        }
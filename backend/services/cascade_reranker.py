@@ -0,0 +1,90 @@
+from typing import Dict, Tuple
+
+from backend.core.metrics import RERANK_CASCADE
+from backend.services.rerank_batcher import Passages, RerankBatcher
+
+
+class CascadeReranker:
+    """
+    Two-stage reranking: a small cross-encoder scores every candidate, and the
+    L-12 cross-encoder only scores the ones that survive.
+
+    - Skip: when the first-stage winner leads the runner-up by `skip_margin`
+      (and scores at least `skip_min_score`), its order is final.
+    - Prune: otherwise candidates more than `prune_margin` below the first-stage
+      top are dropped before the second stage, keeping between `min_keep` and
+      `max_keep`. Pruned candidates are returned after the survivors (their
+      first-stage score minus 1, below any second-stage score) so the context
+      packer can still use them if the budget has room.
+    """
+
+    def __init__(
+        self,
+        first_stage: RerankBatcher,
+        second_stage: RerankBatcher,
+        skip_margin: float = 0.35,
+        skip_min_score: float = 0.9,
+        prune_margin: float = 0.5,
+        min_keep: int = 4,
+        max_keep: int = 10,
+    ):
+        self.first_stage = first_stage
+        self.second_stage = second_stage
+        self.skip_margin = skip_margin
+        self.skip_min_score = skip_min_score
+        self.prune_margin = prune_margin
+        self.min_keep = min_keep
+        self.max_keep = max_keep
+
+        self.requests = 0
+        self.skipped = 0
+        self.pruned_requests = 0
+        self.full_requests = 0
+        self.candidates = 0
+        self.second_stage_candidates = 0
+
+    def _record(self, outcome: str) -> None:
+        RERANK_CASCADE.inc(outcome=outcome)
+
+    async def rerank(self, query: str, passages: Passages) -> Tuple[Passages, Dict[str, float]]:
+        """Returns the reranked passages and the stage timings (ms)."""
+        first, first_timings = await self.first_stage.rerank(query, passages)
+        timings = {"rerank_first_stage_ms": first_timings.queue_wait_ms + first_timings.inference_ms}
+        self.requests += 1
+        self.candidates += len(first)
+
+        top = float(first[0]["score"]) if first else 0.0
+        runner_up = float(first[1]["score"]) if len(first) > 1 else 0.0
+        if len(first) <= 1 or (top >= self.skip_min_score and top - runner_up >= self.skip_margin):
+            self.skipped += 1
+            self._record("skipped")
+            return first, timings
+
+        keep = sum(1 for p in first if top - float(p["score"]) <= self.prune_margin)
+        keep = max(self.min_keep, min(self.max_keep, keep))
+        survivors, pruned = first[:keep], first[keep:]
+        if pruned:
+            self.pruned_requests += 1
+            self._record("pruned")
+        else:
+            self.full_requests += 1
+            self._record("full")
+        self.second_stage_candidates += len(survivors)
+
+        second, second_timings = await self.second_stage.rerank(query, survivors)
+        timings["rerank_queue_ms"] = second_timings.queue_wait_ms
+        timings["rerank_ms"] = second_timings.inference_ms
+        return second + [{**p, "score": float(p["score"]) - 1.0} for p in pruned], timings
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "skipped": self.skipped,
+            "pruned": self.pruned_requests,
+            "full": self.full_requests,
+            "skip_rate": self.skipped / self.requests if self.requests else 0.0,
+            "avg_candidates": self.candidates / self.requests if self.requests else 0.0,
+            "avg_second_stage_candidates": (
+                self.second_stage_candidates / (self.requests - self.skipped) if self.requests > self.skipped else 0.0
+            ),
+        }
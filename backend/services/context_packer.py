@@ -0,0 +1,184 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from backend.core.text import estimate_tokens
+
+_VERSE_LINE = re.compile(r"^(\d+)\. (.*)$")
+# Citation line + blank line that format_docs adds around every chunk
+_CHUNK_OVERHEAD_TOKENS = 8
+
+
+@dataclass
+class _Entry:
+    doc: Document
+    score: float
+    # verse number -> text, for scripture chunks that parse as "N. text" lines
+    verses: Optional[Dict[int, str]] = None
+
+
+@dataclass
+class _Group:
+    score: float
+    docs: List[Document] = field(default_factory=list)
+
+
+def parse_verses(doc: Document) -> Optional[Dict[int, str]]:
+    if doc.metadata.get("type") != "scripture" or not doc.metadata.get("book"):
+        return None
+    verses = {}
+    for line in doc.page_content.splitlines():
+        match = _VERSE_LINE.match(line.strip())
+        if match:
+            verses[int(match.group(1))] = match.group(2)
+    return verses or None
+
+
+def verse_runs(verses: Dict[int, str]) -> List[List[int]]:
+    """Splits verse numbers into runs of consecutive verses."""
+    runs: List[List[int]] = []
+    for number in sorted(verses):
+        if runs and number == runs[-1][-1] + 1:
+            runs[-1].append(number)
+        else:
+            runs.append([number])
+    return runs
+
+
+def overlap_length(first: str, second: str, min_overlap: int, max_overlap: int) -> int:
+    """Length of the longest suffix of `first` that is also a prefix of `second`."""
+    for size in range(min(len(first), len(second), max_overlap), min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return size
+    return 0
+
+
+class ContextPacker:
+    """
+    Turns reranked chunks into the prompt context:
+    - consecutive verse windows of the same chapter become one citation range
+      ([João 3:11-15] + [João 3:16-20] -> [João 3:11-20]);
+    - splitter chunks of the same source/page lose the text they share with
+      each other (RecursiveCharacterTextSplitter overlap);
+    - chunks are admitted greedily by rerank score until `token_budget` is full.
+
+    Pinned documents (explicit references) always go in, ahead of the rest.
+    """
+
+    def __init__(self, token_budget: int = 1800, min_overlap_chars: int = 40, max_overlap_chars: int = 400):
+        self.token_budget = token_budget
+        self.min_overlap_chars = min_overlap_chars
+        self.max_overlap_chars = max_overlap_chars
+
+        self.requests = 0
+        self.chunks_packed = 0
+        self.chunks_merged = 0
+        self.chunks_dropped = 0
+        self.overlap_chars_removed = 0
+        self.tokens_packed = 0
+
+    @staticmethod
+    def tokens(docs: List[Document]) -> int:
+        return sum(estimate_tokens(doc.page_content) + _CHUNK_OVERHEAD_TOKENS for doc in docs)
+
+    def _merge_scripture(self, entries: List[_Entry]) -> List[_Group]:
+        chapters: Dict[Tuple[str, str], List[_Entry]] = {}
+        for entry in entries:
+            key = (entry.doc.metadata["book"], str(entry.doc.metadata.get("chapter", "")))
+            chapters.setdefault(key, []).append(entry)
+
+        groups = []
+        for (book, chapter), chapter_entries in chapters.items():
+            verses: Dict[int, str] = {}
+            best_score: Dict[int, float] = {}
+            for entry in chapter_entries:
+                for number, text in entry.verses.items():
+                    verses.setdefault(number, text)
+                    best_score[number] = max(best_score.get(number, entry.score), entry.score)
+            base = chapter_entries[0].doc.metadata
+            for run in verse_runs(verses):
+                verses_ref = f"{run[0]}-{run[-1]}" if len(run) > 1 else f"{run[0]}"
+                content = f"[{book} {chapter}:{verses_ref}]\n" + "".join(f"{n}. {verses[n]}\n" for n in run)
+                doc = Document(page_content=content, metadata={**base, "verses": verses_ref})
+                groups.append(_Group(max(best_score[n] for n in run), [doc]))
+        return groups
+
+    def _merge_prose(self, entries: List[_Entry]) -> Tuple[List[_Group], int]:
+        groups: List[_Group] = []
+        removed = 0
+        for entry in entries:
+            text = entry.doc.page_content
+            key = (entry.doc.metadata.get("source"), entry.doc.metadata.get("page"))
+            merged = False
+            for group in groups:
+                current = group.docs[0]
+                if (current.metadata.get("source"), current.metadata.get("page")) != key:
+                    continue
+                if text in current.page_content:
+                    removed += len(text)
+                    merged = True
+                elif current.page_content in text:
+                    removed += len(current.page_content)
+                    group.docs[0] = Document(page_content=text, metadata=entry.doc.metadata)
+                    merged = True
+                else:
+                    # Neighbouring splitter chunks: stitch them together without the shared text
+                    after = overlap_length(current.page_content, text, self.min_overlap_chars, self.max_overlap_chars)
+                    before = 0 if after else overlap_length(
+                        text, current.page_content, self.min_overlap_chars, self.max_overlap_chars
+                    )
+                    if after:
+                        group.docs[0] = Document(page_content=current.page_content + text[after:], metadata=current.metadata)
+                    elif before:
+                        group.docs[0] = Document(page_content=text + current.page_content[before:], metadata=entry.doc.metadata)
+                    removed += after or before
+                    merged = bool(after or before)
+                if merged:
+                    group.score = max(group.score, entry.score)
+                    break
+            if not merged:
+                groups.append(_Group(entry.score, [entry.doc]))
+        return groups, removed
+
+    def _merge(self, entries: List[_Entry]) -> Tuple[List[Document], int]:
+        scripture = [e for e in entries if e.verses]
+        prose = [e for e in entries if not e.verses]
+        prose_groups, removed = self._merge_prose(prose)
+        groups = self._merge_scripture(scripture) + prose_groups
+        # Most relevant first; pinned entries carry an infinite score
+        groups.sort(key=lambda group: group.score, reverse=True)
+        return [doc for group in groups for doc in group.docs], removed
+
+    def pack(self, ranked: List[Tuple[Document, float]], pinned: Optional[List[Document]] = None) -> List[Document]:
+        entries = [_Entry(doc, float("inf"), parse_verses(doc)) for doc in pinned or []]
+        packed, removed = self._merge(entries)
+        dropped = 0
+        for doc, score in ranked:
+            trial_entries = entries + [_Entry(doc, score, parse_verses(doc))]
+            trial, trial_removed = self._merge(trial_entries)
+            if self.tokens(trial) > self.token_budget:
+                # A later, shorter (or fully overlapping) chunk may still fit
+                dropped += 1
+                continue
+            entries, packed, removed = trial_entries, trial, trial_removed
+
+        self.requests += 1
+        self.chunks_packed += len(entries)
+        self.chunks_merged += len(entries) - len(packed)
+        self.chunks_dropped += dropped
+        self.overlap_chars_removed += removed
+        self.tokens_packed += self.tokens(packed)
+        return packed
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "token_budget": self.token_budget,
+            "requests": self.requests,
+            "chunks_packed": self.chunks_packed,
+            "chunks_merged": self.chunks_merged,
+            "chunks_dropped": self.chunks_dropped,
+            "overlap_chars_removed": self.overlap_chars_removed,
+            "avg_tokens": self.tokens_packed / self.requests if self.requests else 0.0,
+        }
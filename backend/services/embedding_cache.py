@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from backend.core.config import settings
+
+
+def embedding_key(model: str, task: str, text: str) -> str:
+    # Query and document embeddings use different task types on the provider,
+    # so the task is part of the content address.
+    return hashlib.sha256(f"{model}\x00{task}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Two-tier (in-process LRU + SQLite) store of vectors by content hash."""
+
+    def __init__(self, path: Optional[str], max_memory_entries: int = 10000):
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    @property
+    def persistent(self) -> bool:
+        return self._conn is not None
+
+    def get_from_memory(self, keys: List[str]) -> Dict[str, List[float]]:
+        """The LRU tier only: never touches SQLite, so it is safe on the event loop."""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory and key not in found:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+        return found
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    disk_keys.append(key)
+
+            if self._conn and disk_keys:
+                # SQLite caps the number of bound parameters per statement
+                for i in range(0, len(disk_keys), 500):
+                    batch = disk_keys[i : i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f", blob).tolist()
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+
+            self.misses += len([k for k in set(keys) if k not in found])
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._conn and items:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array("f", vector).tobytes()) for key, vector in items.items()],
+                )
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends cache misses to the provider.
+    A batch of N texts costs one provider call for the uncached subset.
+    """
+
+    def __init__(self, inner: Embeddings, model: str, store: EmbeddingStore):
+        self.inner = inner
+        self.model = model
+        self.store = store
+
+    @staticmethod
+    def _missing(keys: List[str], texts: List[str], found: Dict[str, List[float]]) -> Dict[str, str]:
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return missing
+
+    def _split(self, texts: List[str], task: str):
+        keys = [embedding_key(self.model, task, text) for text in texts]
+        found = self.store.get_many(keys)
+        return keys, found, self._missing(keys, texts, found)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts, "document")
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self.store.put_many(new_items)
+            found.update(new_items)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model, "query", text)
+        found = self.store.get_many([key])
+        if key not in found:
+            found[key] = self.inner.embed_query(text)
+            self.store.put_many({key: found[key]})
+        return found[key]
+
+    # The async paths run on the event loop: SQLite reads, commits and waits on
+    # the ingestion's write lock go to a worker thread; LRU hits stay inline.
+    async def _aget_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not self.store.persistent:
+            return self.store.get_many(keys)
+        found = self.store.get_from_memory(keys)
+        rest = [key for key in keys if key not in found]
+        if rest:
+            found.update(await asyncio.to_thread(self.store.get_many, rest))
+        return found
+
+    async def _aput_many(self, items: Dict[str, List[float]]) -> None:
+        if self.store.persistent:
+            await asyncio.to_thread(self.store.put_many, items)
+        else:
+            self.store.put_many(items)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model, "document", text) for text in texts]
+        found = await self._aget_many(keys)
+        missing = self._missing(keys, texts, found)
+        if missing:
+            vectors = await self.inner.aembed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            await self._aput_many(new_items)
+            found.update(new_items)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model, "query", text)
+        found = await self._aget_many([key])
+        if key not in found:
+            found[key] = await self.inner.aembed_query(text)
+            await self._aput_many({key: found[key]})
+        return found[key]
+
+
+_shared_store: Optional[EmbeddingStore] = None
+
+
+def build_embeddings(model: Optional[str] = None) -> Embeddings:
+    """
+    Builds the provider embeddings used by ingestion, the RAG service and the
+    evaluation runner, wrapped in the shared content-addressed cache.
+    """
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    global _shared_store
+    model = model or settings.EMBEDDING_MODEL_NAME
+    embeddings = GoogleGenerativeAIEmbeddings(model=model, google_api_key=settings.GOOGLE_API_KEY)
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return embeddings
+
+    if _shared_store is None:
+        _shared_store = EmbeddingStore(
+            path=settings.EMBEDDING_CACHE_PATH or None,
+            max_memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+        )
+    return CachedEmbeddings(embeddings, model=model, store=_shared_store)
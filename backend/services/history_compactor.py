@@ -0,0 +1,123 @@
+import asyncio
+from typing import List, Set
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from backend.core.text import estimate_tokens
+from backend.services.session_store import SessionStore
+
+
+def message_tokens(messages: List[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(m.content)) for m in messages)
+
+
+def truncate_message(message: BaseMessage, max_chars: int) -> BaseMessage:
+    content = str(message.content)
+    if len(content) <= max_chars:
+        return message
+    return message.__class__(content=content[:max_chars].rstrip() + " [...]")
+
+
+class HistoryCompactor:
+    """
+    Builds the history each prompt actually needs instead of the full transcript:
+    - QA prompt: the last `keep_turns` turns verbatim, older turns replaced by a
+      rolling summary, everything fitted into `qa_token_budget`.
+    - Reformulation: only the last `reformulate_turns` turns, with long answers cut,
+      since it just needs to resolve references like "ele" or "esse versículo".
+
+    The summary is updated incrementally (previous summary + newly aged-out turns)
+    in the background after an answer completes, and stored per session.
+    """
+
+    def __init__(
+        self,
+        llm,
+        store: SessionStore,
+        keep_turns: int = 3,
+        qa_token_budget: int = 2000,
+        reformulate_turns: int = 2,
+        reformulate_message_chars: int = 600,
+        summary_max_words: int = 200,
+    ):
+        self.store = store
+        self.keep_turns = keep_turns
+        self.qa_token_budget = qa_token_budget
+        self.reformulate_turns = reformulate_turns
+        self.reformulate_message_chars = reformulate_message_chars
+        self._in_flight: Set[str] = set()
+        # The event loop only keeps weak references to tasks: hold them until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.summary_chain = ChatPromptTemplate.from_messages([
+            ("system",
+             "You maintain a running summary of a conversation between a user and a Christian teacher. "
+             "Merge the new messages into the current summary. Keep the user's questions and situation, "
+             "names, Bible references and conclusions; drop greetings and repetition. "
+             f"Write in Portuguese (PT-BR), at most {summary_max_words} words."),
+            ("human", "Current summary:\n{summary}\n\nNew messages:\n{messages}"),
+        ]) | llm | StrOutputParser()
+
+        self.summaries_built = 0
+
+    def for_reformulation(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        recent = messages[-self.reformulate_turns * 2:] if self.reformulate_turns else []
+        return [truncate_message(m, self.reformulate_message_chars) for m in recent]
+
+    async def for_answer(self, session_id: str, messages: List[BaseMessage]) -> List[BaseMessage]:
+        split = max(len(messages) - self.keep_turns * 2, 0)
+        older, recent = messages[:split], list(messages[split:])
+
+        compacted: List[BaseMessage] = []
+        if older:
+            summary, covers = await self.store.aget_summary(session_id)
+            if summary:
+                compacted.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+            # Turns the summary does not cover yet stay verbatim and compete for the budget
+            recent = list(older[covers if summary else 0:]) + recent
+
+        # Drop the oldest verbatim turns first, then shorten what is left
+        while recent and message_tokens(compacted + recent) > self.qa_token_budget and len(recent) > 2:
+            recent = recent[2:]
+        if message_tokens(compacted + recent) > self.qa_token_budget:
+            per_message_chars = max(self.qa_token_budget * 4 // max(len(compacted + recent), 1), 200)
+            recent = [truncate_message(m, per_message_chars) for m in recent]
+        return compacted + recent
+
+    def schedule_update(self, session_id: str, messages: List[BaseMessage]) -> None:
+        """Folds turns that aged out of the verbatim window into the summary, off the request path."""
+        split = max(len(messages) - self.keep_turns * 2, 0)
+        if not split or session_id in self._in_flight:
+            return
+        self._in_flight.add(session_id)
+        task = asyncio.create_task(self._update_summary(session_id, list(messages[:split])))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """On shutdown: lets running summary updates finish for up to `timeout` seconds, then cancels the rest."""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _update_summary(self, session_id: str, older: List[BaseMessage]) -> None:
+        try:
+            summary, covers = await self.store.aget_summary(session_id)
+            if len(older) <= covers:
+                return
+            new_messages = "\n".join(
+                f"{'User' if isinstance(m, HumanMessage) else 'Teacher' if isinstance(m, AIMessage) else 'System'}: {m.content}"
+                for m in older[covers:]
+            )
+            updated = await self.summary_chain.ainvoke({"summary": summary or "(empty)", "messages": new_messages})
+            await self.store.aset_summary(session_id, updated.strip(), len(older))
+            self.summaries_built += 1
+        except Exception as e:
+            print(f"Error updating history summary: {e}")
+        finally:
+            self._in_flight.discard(session_id)
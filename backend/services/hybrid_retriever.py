@@ -0,0 +1,110 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from backend.core.hashing import chunk_id
+from backend.services.lexical_index import BM25Index
+from backend.services.metadata_filter import Where, compile_where
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+
+def document_key(doc: Document) -> str:
+    # Content-derived, so the same chunk matches across the Chroma and BM25 result lists
+    return chunk_id(doc.page_content, doc.metadata)
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], rrf_k: int = 60) -> List[Document]:
+    """Fuses ranked lists by summing 1 / (rrf_k + rank) per document."""
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever:
+    """
+    Selects between dense (MMR), lexical (BM25) and fused retrieval.
+    Every call returns the candidates plus a per-stage latency breakdown in ms.
+    When the vector store fails (timeout, open circuit...) and a lexical index
+    exists, the BM25 results are served alone instead of failing the request.
+
+    An optional `where` (Chroma filter syntax, from the query router) restricts
+    both sides; `where_param` is the keyword the vector retriever takes it as
+    ("filter" for LangChain's Chroma retriever).
+    """
+
+    def __init__(
+        self,
+        vector_retriever,
+        lexical_index: Optional[BM25Index],
+        lexical_k: int = 20,
+        fused_k: int = 12,
+        rrf_k: int = 60,
+    ):
+        self.vector_retriever = vector_retriever
+        self.lexical_index = lexical_index
+        self.lexical_k = lexical_k
+        self.fused_k = fused_k
+        self.rrf_k = rrf_k
+        self.where_param = "where"
+        self.lexical_fallbacks = 0
+
+    async def _vector(self, query: str, timings: Dict[str, float], where: Optional[Where] = None) -> List[Document]:
+        started = time.perf_counter()
+        kwargs = {self.where_param: where} if where else {}
+        docs = await self.vector_retriever.ainvoke(query, **kwargs)
+        timings["vector_ms"] = (time.perf_counter() - started) * 1000
+        return docs
+
+    async def _lexical(self, query: str, timings: Dict[str, float], where: Optional[Where] = None) -> List[Document]:
+        started = time.perf_counter()
+        hits = await asyncio.to_thread(self.lexical_index.search, query, self.lexical_k, compile_where(where))
+        timings["lexical_ms"] = (time.perf_counter() - started) * 1000
+        return [doc for doc, _ in hits]
+
+    async def retrieve(
+        self, query: str, mode: str = "hybrid", where: Optional[Where] = None
+    ) -> Tuple[List[Document], Dict[str, float]]:
+        timings: Dict[str, float] = {}
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        if mode != "vector" and not self.lexical_index:
+            # No lexical index on disk yet: behave like the dense-only pipeline
+            mode = "vector"
+
+        if mode == "lexical":
+            return (await self._lexical(query, timings, where))[: self.fused_k], timings
+        if mode == "vector":
+            try:
+                return await self._vector(query, timings, where), timings
+            except Exception as e:
+                if not self.lexical_index:
+                    raise
+                self._fall_back(e)
+                return (await self._lexical(query, timings, where))[: self.fused_k], timings
+
+        vector_docs, lexical_docs = await asyncio.gather(
+            self._vector(query, timings, where), self._lexical(query, timings, where), return_exceptions=True
+        )
+        if isinstance(lexical_docs, BaseException):
+            raise lexical_docs
+        if isinstance(vector_docs, BaseException):
+            if not isinstance(vector_docs, Exception):
+                raise vector_docs
+            self._fall_back(vector_docs)
+            return lexical_docs[: self.fused_k], timings
+        started = time.perf_counter()
+        fused = reciprocal_rank_fusion([vector_docs, lexical_docs], rrf_k=self.rrf_k)[: self.fused_k]
+        timings["fusion_ms"] = (time.perf_counter() - started) * 1000
+        return fused, timings
+
+    def _fall_back(self, error: Exception) -> None:
+        self.lexical_fallbacks += 1
+        print(f"Vector search failed ({type(error).__name__}: {error}), answering from BM25 only.")
@@ -0,0 +1,126 @@
+import gzip
+import json
+import math
+import os
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from backend.core.hashing import chunk_id
+from backend.core.text import tokenize
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring over accent-folded
+    Portuguese tokens. Built over the same chunks that `split_documents`
+    produces and persisted as gzipped JSON next to the ingestion output.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _index(self, doc_id: str, text: str, metadata: Dict[str, Any], term_freqs: Dict[str, int]) -> None:
+        length = sum(term_freqs.values())
+        self.docs[doc_id] = {"text": text, "metadata": metadata, "length": length, "tf": term_freqs}
+        self.total_length += length
+        for term, freq in term_freqs.items():
+            self.postings[term][doc_id] = freq
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> None:
+        ids = ids or [chunk_id(doc.page_content, doc.metadata) for doc in documents]
+        for doc_id, doc in zip(ids, documents):
+            if doc_id in self.docs:
+                continue
+            self._index(doc_id, doc.page_content, dict(doc.metadata), dict(Counter(tokenize(doc.page_content))))
+
+    def update_metadata(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        """Merges `metadata` into a chunk's metadata (None values remove keys), like Chroma's update."""
+        entry = self.docs.get(doc_id)
+        if not entry:
+            return
+        for key, value in metadata.items():
+            if value is None:
+                entry["metadata"].pop(key, None)
+            else:
+                entry["metadata"][key] = value
+
+    def remove(self, ids: List[str]) -> None:
+        for doc_id in ids:
+            entry = self.docs.pop(doc_id, None)
+            if not entry:
+                continue
+            self.total_length -= entry["length"]
+            for term in entry["tf"]:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def search(
+        self,
+        query: str,
+        k: int = 20,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[Document, float]]:
+        if not self.docs:
+            return []
+
+        n_docs = len(self.docs)
+        avg_length = self.total_length / n_docs if n_docs else 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, freq in postings.items():
+                length = self.docs[doc_id]["length"]
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        results = []
+        for doc_id, score in ranked:
+            entry = self.docs[doc_id]
+            if where and not where(entry["metadata"]):
+                continue
+            results.append((Document(page_content=entry["text"], metadata=entry["metadata"], id=doc_id), score))
+            if len(results) >= k:
+                break
+        return results
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "docs": [
+                {"id": doc_id, "text": entry["text"], "metadata": entry["metadata"], "tf": entry["tf"]}
+                for doc_id, entry in self.docs.items()
+            ],
+        }
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        index = cls(k1=payload.get("k1", 1.5), b=payload.get("b", 0.75))
+        for entry in payload.get("docs", []):
+            index._index(entry["id"], entry["text"], entry["metadata"], entry["tf"])
+        return index
@@ -0,0 +1,350 @@
+import asyncio
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.services.metadata_filter import Where, compile_where, where_key
+
+QUANTIZATIONS = ("float32", "int8")
+SCOPES = ("scripture", "all")
+# Rows scored per matmul block, so an int8 index never materializes a full float32 copy
+_BLOCK_ROWS = 4096
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def parse_query_result(result: Dict[str, Any]) -> Tuple[List[Document], np.ndarray]:
+    """(documents, their embeddings) from a Chroma query that included embeddings."""
+    ids = result["ids"][0]
+    if not ids:
+        return [], np.empty((0, 0), dtype=np.float32)
+    docs = [
+        Document(page_content=text, metadata=meta or {}, id=doc_id)
+        for doc_id, text, meta in zip(ids, result["documents"][0], result["metadatas"][0])
+    ]
+    return docs, np.asarray(result["embeddings"][0], dtype=np.float32)
+
+
+def maximal_marginal_relevance(
+    query: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float = 0.5
+) -> List[int]:
+    """Same selection rule as LangChain's MMR, over unit-normalized vectors."""
+    if len(candidates) == 0 or k <= 0:
+        return []
+    relevance = candidates @ query
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything already selected
+    redundancy = candidates @ candidates[selected[0]]
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+    return selected
+
+
+class LocalVectorIndex:
+    """
+    Read-only snapshot of the Chroma collection for in-process search.
+
+    Layout of the index directory:
+    - vectors.npy: unit-normalized rows, float32 or int8 (one scale per row in scales.npy)
+    - pca.npz: optional mean/components used to reduce dimensionality at export time
+    - meta.json: ids, texts, metadata and export parameters
+
+    Arrays are opened with `mmap_mode="r"`, so uvicorn workers share the same
+    physical pages through the OS page cache instead of holding private copies.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray],
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        model: str,
+        scope: str,
+        pca_mean: Optional[np.ndarray] = None,
+        pca_components: Optional[np.ndarray] = None,
+    ):
+        self.path = path
+        self.vectors = vectors
+        self.scales = scales
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.model = model
+        self.scope = scope
+        self.pca_mean = pca_mean
+        self.pca_components = pca_components
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def quantization(self) -> str:
+        return "int8" if self.scales is not None else "float32"
+
+    # --- Export ---
+    @classmethod
+    def build(
+        cls,
+        embeddings: List[List[float]],
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        model: str,
+        scope: str = "scripture",
+        quantization: str = "int8",
+        pca_dim: int = 0,
+    ) -> "LocalVectorIndex":
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        matrix = np.asarray(embeddings, dtype=np.float32)
+
+        pca_mean = pca_components = None
+        if pca_dim and pca_dim < matrix.shape[1]:
+            pca_mean = matrix.mean(axis=0)
+            # Principal axes of the centered corpus; queries are projected the same way
+            _, _, vt = np.linalg.svd(matrix - pca_mean, full_matrices=False)
+            pca_components = vt[:pca_dim].T.astype(np.float32)
+            matrix = (matrix - pca_mean) @ pca_components
+        matrix = normalize_rows(matrix).astype(np.float32)
+
+        scales = None
+        if quantization == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+            scales = scales.astype(np.float32)
+
+        return cls("", matrix, scales, list(ids), list(texts), list(metadatas), model, scope, pca_mean, pca_components)
+
+    def save(self, path: str) -> None:
+        """Writes to a sibling directory and swaps it in, so readers never see a partial index."""
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "vectors.npy"), np.ascontiguousarray(self.vectors))
+        if self.scales is not None:
+            np.save(os.path.join(tmp_path, "scales.npy"), self.scales)
+        if self.pca_components is not None:
+            np.savez(os.path.join(tmp_path, "pca.npz"), mean=self.pca_mean, components=self.pca_components)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model,
+                "scope": self.scope,
+                "quantization": self.quantization,
+                "dimensions": int(self.vectors.shape[1]),
+                "ids": self.ids,
+                "texts": self.texts,
+                "metadatas": self.metadatas,
+            }, f, ensure_ascii=False)
+
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorIndex":
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        scales_path = os.path.join(path, "scales.npy")
+        scales = np.load(scales_path, mmap_mode="r") if os.path.exists(scales_path) else None
+        pca_mean = pca_components = None
+        pca_path = os.path.join(path, "pca.npz")
+        if os.path.exists(pca_path):
+            with np.load(pca_path) as pca:
+                pca_mean, pca_components = pca["mean"], pca["components"]
+        return cls(
+            path, vectors, scales, meta["ids"], meta["texts"], meta["metadatas"],
+            meta["model"], meta.get("scope", "scripture"), pca_mean, pca_components,
+        )
+
+    # --- Search ---
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Maps full-size embeddings (queries, or Chroma rows) into the index space."""
+        matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if self.pca_components is not None:
+            matrix = (matrix - self.pca_mean) @ self.pca_components
+        return normalize_rows(matrix)
+
+    def _rows(self, indices: np.ndarray) -> np.ndarray:
+        rows = np.asarray(self.vectors[indices], dtype=np.float32)
+        if self.scales is not None:
+            rows *= np.asarray(self.scales[indices])[:, None]
+        return normalize_rows(rows)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the (projected) query to every row."""
+        out = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + _BLOCK_ROWS], dtype=np.float32)
+            out[start:start + len(block)] = block @ query
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def candidates(
+        self, query_embedding: List[float], fetch_k: int, mask: Optional[np.ndarray] = None
+    ) -> Tuple[List[Document], np.ndarray, np.ndarray]:
+        """Top `fetch_k` rows by cosine, among those set in `mask`: (documents, their vectors, the projected query)."""
+        query = self.project(query_embedding)[0]
+        allowed = len(self.ids) if mask is None else int(mask.sum())
+        if not allowed:
+            return [], np.empty((0, len(query)), dtype=np.float32), query
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask] = -np.inf
+        fetch_k = min(fetch_k, allowed)
+        top = np.argpartition(-scores, fetch_k - 1)[:fetch_k]
+        top = top[np.argsort(-scores[top])]
+        docs = [
+            Document(page_content=self.texts[i], metadata=dict(self.metadatas[i]), id=self.ids[i])
+            for i in top
+        ]
+        return docs, self._rows(top), query
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "local",
+            "chunks": len(self.ids),
+            "dimensions": int(self.vectors.shape[1]) if len(self.vectors.shape) == 2 else 0,
+            "quantization": self.quantization,
+            "pca": self.pca_components is not None,
+            "scope": self.scope,
+            "bytes": int(self.vectors.nbytes),
+        }
+
+
+class LocalVectorRetriever:
+    """
+    Drop-in for the Chroma MMR retriever (`ainvoke(query) -> docs`).
+
+    Scripture chunks are searched in-process; when the snapshot only covers
+    scripture, the remaining chunks still come from Chroma and compete in the
+    same MMR selection. With `remote` (an AsyncChromaRetriever) that Chroma query
+    and the query embedding are awaited under its timeouts, retries and circuit
+    breaker instead of occupying a thread.
+    """
+
+    def __init__(
+        self,
+        index: LocalVectorIndex,
+        embeddings,
+        collection=None,
+        k: int = 20,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.7,
+        remote=None,
+    ):
+        self.index = index
+        self.embeddings = embeddings
+        self.collection = collection if index.scope == "scripture" else None
+        self.remote = remote
+        self.k = k
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+        self.remote_failures = 0
+        # Row masks per router filter; there are only a few distinct ones (books, testaments, corpus type)
+        self._masks: Dict[str, np.ndarray] = {}
+
+    def _mask(self, where: Where) -> np.ndarray:
+        key = where_key(where)
+        mask = self._masks.get(key)
+        if mask is None:
+            matches = compile_where(where)
+            mask = np.fromiter((matches(meta) for meta in self.index.metadatas), dtype=bool, count=len(self.index.ids))
+            if len(self._masks) >= 256:
+                self._masks.clear()
+            self._masks[key] = mask
+        return mask
+
+    def _remote_query(self, query_embedding: List[float], where: Optional[Where] = None) -> Dict[str, Any]:
+        remote_where = {"type": {"$ne": "scripture"}}
+        return {
+            "query_embeddings": [query_embedding],
+            "n_results": self.fetch_k,
+            "where": {"$and": [remote_where, where]} if where else remote_where,
+            "include": ["documents", "metadatas", "embeddings"],
+        }
+
+    def _project_remote(self, result: Dict[str, Any]) -> Tuple[List[Document], np.ndarray]:
+        docs, vectors = parse_query_result(result)
+        return docs, self.index.project(vectors) if docs else vectors
+
+    def _remote_candidates(
+        self, query_embedding: List[float], where: Optional[Where] = None
+    ) -> Tuple[List[Document], np.ndarray]:
+        return self._project_remote(self.collection.query(**self._remote_query(query_embedding, where)))
+
+    async def _aremote_candidates(
+        self, query_embedding: List[float], where: Optional[Where] = None
+    ) -> Tuple[List[Document], np.ndarray]:
+        if self.remote is None:
+            return await asyncio.to_thread(self._remote_candidates, query_embedding, where)
+        return self._project_remote(await self.remote.query(**self._remote_query(query_embedding, where)))
+
+    def _select(self, local_result, remote_result) -> List[Document]:
+        docs, vectors, projected = local_result
+        if isinstance(remote_result, BaseException):
+            # Non-scripture chunks are a bonus here; answer from scripture alone
+            self.remote_failures += 1
+            print(f"Error querying Chroma for non-scripture chunks: {remote_result}")
+        elif remote_result and remote_result[0]:
+            docs = docs + remote_result[0]
+            vectors = np.vstack([vectors, remote_result[1]])
+        selected = maximal_marginal_relevance(projected, vectors, self.k, self.lambda_mult)
+        return [docs[i] for i in selected]
+
+    async def ainvoke(self, query: str, where: Optional[Where] = None) -> List[Document]:
+        """`where` (Chroma filter syntax) restricts both the local rows and the Chroma query."""
+        if self.remote is not None:
+            query_embedding = await self.remote.embed_query(query)
+        else:
+            query_embedding = await self.embeddings.aembed_query(query)
+        mask = self._mask(where) if where else None
+        local = asyncio.to_thread(self.index.candidates, query_embedding, self.fetch_k, mask)
+        # Non-scripture chunks have no type/book; a filter that rejects them needs no Chroma round trip
+        if self.collection is None or (where and not compile_where(where)({})):
+            return self._select(await local, None)
+        remote = self._aremote_candidates(query_embedding, where)
+        local_result, remote_result = await asyncio.gather(local, remote, return_exceptions=True)
+        if isinstance(local_result, BaseException):
+            raise local_result
+        return self._select(local_result, remote_result)
+
+    def invoke(self, query: str) -> List[Document]:
+        query_embedding = self.embeddings.embed_query(query)
+        local_result = self.index.candidates(query_embedding, self.fetch_k)
+        remote_result = None
+        if self.collection is not None:
+            try:
+                remote_result = self._remote_candidates(query_embedding)
+            except Exception as e:
+                remote_result = e
+        return self._select(local_result, remote_result)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.index.stats()
+        stats["remote_fallback"] = self.collection is not None
+        stats["remote_failures"] = self.remote_failures
+        if self.remote is not None:
+            stats["remote"] = self.remote.stats()
+        return stats
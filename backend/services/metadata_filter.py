@@ -0,0 +1,50 @@
+import json
+from typing import Any, Callable, Dict, Optional
+
+Where = Dict[str, Any]
+Predicate = Callable[[Dict[str, Any]], bool]
+
+_MISSING = object()
+
+
+def _field(name: str, condition: Any) -> Predicate:
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    (op, value), = condition.items()
+    if op == "$eq":
+        return lambda meta: meta.get(name, _MISSING) == value
+    if op == "$ne":
+        # Like Chroma: a chunk without the field is "not equal"
+        return lambda meta: meta.get(name, _MISSING) != value
+    if op == "$in":
+        values = set(value)
+        return lambda meta: meta.get(name, _MISSING) in values
+    if op == "$nin":
+        values = set(value)
+        return lambda meta: meta.get(name, _MISSING) not in values
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def compile_where(where: Optional[Where]) -> Optional[Predicate]:
+    """
+    Python predicate over chunk metadata for the subset of Chroma's `where`
+    syntax the router emits ($and/$or, $eq/$ne/$in/$nin, bare equality), so BM25
+    and the local vector index filter exactly like Chroma does.
+    """
+    if not where:
+        return None
+    predicates = []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [compile_where(part) for part in condition]
+            combine = all if key == "$and" else any
+            predicates.append(lambda meta, parts=parts, combine=combine: combine(p(meta) for p in parts))
+        else:
+            predicates.append(_field(key, condition))
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda meta: all(p(meta) for p in predicates)
+
+
+def where_key(where: Optional[Where]) -> str:
+    return json.dumps(where, sort_keys=True, ensure_ascii=False) if where else ""
@@ -0,0 +1,151 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from backend.core.config import settings
+from backend.services.lexical_index import BM25Index
+from backend.services.local_vector_index import LocalVectorIndex
+from backend.services.scripture_reference import VerseIndex
+from backend.services.verse_store import VerseStore
+
+RANKER_MODEL = "ms-marco-MiniLM-L-12-v2" # Lightweight efficient model
+
+
+def _bible_json_path() -> str:
+    return os.path.join(settings.SOURCE_DOCS_PATH, "bible_data.json")
+
+
+def load_ranker_model(intra_op_threads: int = 0, model_name: str = RANKER_MODEL):
+    from flashrank import Ranker
+
+    ranker = Ranker(model_name=model_name)
+    if intra_op_threads:
+        _limit_onnx_threads(ranker, model_name, intra_op_threads)
+    return ranker
+
+
+def rerank_onnx_threads() -> int:
+    """ONNX threads for a worker's own ranker: one per worker when several share the cores."""
+    return 1 if settings.WEB_CONCURRENCY > 1 else settings.RERANK_ONNX_THREADS
+
+
+def _limit_onnx_threads(ranker, model_name: str, threads: int) -> None:
+    """
+    Recreates FlashRank's ONNX session with a fixed thread count. With one thread
+    ONNX Runtime starts no thread pool, which is what makes a session created
+    before fork() usable in the workers (and N workers x all cores oversubscribes anyway).
+    """
+    import onnxruntime as ort
+    from flashrank.Config import model_file_map
+
+    if getattr(ranker, "session", None) is None:
+        raise RuntimeError(f"{model_name} has no ONNX session to limit (listwise model?)")
+    model_path = ranker.model_dir / model_file_map[model_name]
+    if not model_path.exists():
+        raise RuntimeError(f"ONNX model file not found: {model_path}")
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    ranker.session = ort.InferenceSession(
+        str(model_path), sess_options=options, providers=ranker.session.get_providers()
+    )
+
+
+def load_lexical_index() -> Optional[BM25Index]:
+    # Lexical (BM25) index built at ingestion time; without it retrieval is vector-only
+    if not os.path.exists(settings.LEXICAL_INDEX_PATH):
+        return None
+    index = BM25Index.load(settings.LEXICAL_INDEX_PATH)
+    print(f"Lexical index loaded: {len(index)} chunks.")
+    return index
+
+
+def load_verse_index() -> Optional[VerseIndex]:
+    if not os.path.exists(_bible_json_path()):
+        return None
+    return VerseIndex.from_json(_bible_json_path())
+
+
+def load_verse_store() -> Optional[VerseStore]:
+    # Normally written at ingestion; built once here for trees ingested before it existed
+    try:
+        if os.path.exists(settings.VERSE_STORE_PATH):
+            store = VerseStore.load(settings.VERSE_STORE_PATH)
+        elif os.path.exists(_bible_json_path()):
+            VerseStore.from_json(_bible_json_path()).save(settings.VERSE_STORE_PATH)
+            store = VerseStore.load(settings.VERSE_STORE_PATH)
+        else:
+            return None
+    except Exception as e:
+        print(f"Error loading verse store: {e}")
+        return None
+    print(f"Verse store loaded: {len(store)} verses.")
+    return store
+
+
+def load_local_vector_index() -> Optional[LocalVectorIndex]:
+    if not os.path.exists(settings.LOCAL_VECTOR_INDEX_PATH):
+        print("Local vector index not exported yet, using Chroma.")
+        return None
+    try:
+        index = LocalVectorIndex.load(settings.LOCAL_VECTOR_INDEX_PATH)
+    except Exception as e:
+        print(f"Error loading local vector index: {e}")
+        return None
+    if index.model != settings.EMBEDDING_MODEL_NAME:
+        print(f"Local vector index was built with {index.model}, using Chroma.")
+        return None
+    print(f"Local vector index loaded: {len(index)} chunks ({index.quantization}).")
+    return index
+
+
+@dataclass
+class PreloadedState:
+    """Read-only components built once and shared by every RAGService in the process (and its forks)."""
+
+    ranker: Any = None
+    first_stage_ranker: Any = None
+    lexical_index: Optional[BM25Index] = None
+    verse_index: Optional[VerseIndex] = None
+    verse_store: Optional[VerseStore] = None
+    local_vector_index: Optional[LocalVectorIndex] = None
+
+
+_state: Optional[PreloadedState] = None
+
+
+def preload(ranker=None, first_stage_ranker=None) -> PreloadedState:
+    """
+    Loads the heavy immutable state in the gunicorn master before it forks
+    (see backend/gunicorn.conf.py), so workers share the pages copy-on-write
+    instead of each loading their own copy. A component that fails here is
+    left to the workers' own warm-up (with retries).
+    """
+    global _state
+    state = PreloadedState(ranker=ranker, first_stage_ranker=first_stage_ranker)
+    # Always single-threaded here: a session with an intra-op pool does not survive fork()
+    steps = [
+        ("ranker", lambda: load_ranker_model(1), state.ranker is None),
+        (
+            "first_stage_ranker",
+            lambda: load_ranker_model(1, settings.RERANK_FIRST_STAGE_MODEL),
+            settings.RERANK_CASCADE_ENABLED and state.first_stage_ranker is None,
+        ),
+        ("lexical_index", load_lexical_index, True),
+        ("verse_index", load_verse_index, settings.REFERENCE_FAST_PATH_ENABLED),
+        ("verse_store", load_verse_store, settings.VERSE_EXPANSION_RADIUS > 0),
+        ("local_vector_index", load_local_vector_index, settings.VECTOR_STORE_BACKEND == "local"),
+    ]
+    for name, loader, enabled in steps:
+        if not enabled:
+            continue
+        try:
+            setattr(state, name, loader())
+        except Exception as e:
+            print(f"Preload of {name} failed ({e}), workers will load it themselves.")
+    _state = state
+    return state
+
+
+def preloaded() -> Optional[PreloadedState]:
+    return _state
@@ -0,0 +1,174 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.core.text import fold
+from backend.services.metadata_filter import Where
+from backend.services.scripture_reference import BOOKS, ORDINAL_PREFIXES, ScriptureReferenceParser
+
+OLD_TESTAMENT = range(0, 39)
+NEW_TESTAMENT = range(39, 66)
+GOSPELS = range(39, 43)
+PAULINE_EPISTLES = range(44, 57)
+
+# Book names that are also peoples or common words ("Romanos", "Atos", "Números") only count
+# after a cue like "em", "livro de", "carta aos" or "segundo"
+UNAMBIGUOUS_BOOKS = {
+    0, 1, 2, 4, 8, 9, 10, 11, 12, 13, 18, 19, 20, 21, 45, 46, 47, 48, 49, 50, 51, 52, 53, 54, 60, 61, 62, 63, 65,
+}
+# Books named after a person ("Por que Judas traiu Jesus?", "Quem foi Isaías?", "Jesus amava João")
+# only count after a cue naming the book itself: "em Judas" is still about the man
+PERSON_BOOKS = {
+    5, 7, 14, 15, 16, 17, 22, 23, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38,
+    39, 40, 41, 42, 55, 56, 58, 64,
+}
+BOOK_CUE = (
+    r"(?P<named>\b(?:livros?|cartas?|epistolas?|evangelhos?|profecias?)\s+(?:de|do|da|dos|das|a|aos|as|segundo)\s+)"
+    r"|(?P<cue>\bem\s+|\bsegundo\s+)"
+)
+
+BOOK_GROUPS = [
+    ("old_testament", re.compile(r"\b(?:antigo|velho)\s+testamento\b"), OLD_TESTAMENT),
+    ("new_testament", re.compile(r"\bnovo\s+testamento\b"), NEW_TESTAMENT),
+    ("gospels", re.compile(r"\bevangelhos\b"), GOSPELS),
+    ("pauline_epistles", re.compile(r"\b(?:cartas|epistolas)\s+(?:de|do\s+apostolo)\s+paulo\b|\bepistolas\s+paulinas\b"),
+     PAULINE_EPISTLES),
+]
+# Questions about the other sources (church history, systematic theology...) skip the Bible chunks
+OTHER_CORPUS_CUES = re.compile(
+    r"\b(?:historia\s+da\s+igreja|teologia\s+sistematica|teologos?|concilios?|reforma\s+protestante|reformadores?"
+    r"|confissao\s+de\s+fe|catecismo|patristic[ao]s?|pais\s+da\s+igreja|calvino|lutero|agostinho|spurgeon)\b"
+)
+EPISTLE_ORDINAL = re.compile(r"\b(primeira|segunda|terceira)\s+(?:carta|epistola)\s+(?:de|do|da|a|aos|as)\s+")
+SCRIPTURE_CUES = re.compile(r"\b(?:versiculos?|passagens?\s+biblicas?)\b")
+
+
+@dataclass
+class Route:
+    """Where a query should search; `where` is a Chroma filter (None = whole collection)."""
+
+    kind: str  # book | book_group | scripture | other | none (centroid_* when decided by embeddings)
+    where: Optional[Where] = None
+    books: List[str] = field(default_factory=list)
+
+
+class QueryRouter:
+    """
+    Narrows retrieval to the part of `scripture_corpus` a question is about:
+
+    - books: references ("Romanos 8") or book names (unambiguous ones anywhere, the rest after a
+      cue, books named after a person only after "livro de", "carta de"...), narrowing only the
+      Bible chunks;
+    - book groups: Old/New Testament, the Gospels, Paul's epistles;
+    - corpus type: Bible chunks vs. the other sources (theology, church history).
+
+    Rules come first; optionally, a question no rule matched is routed by the
+    nearest corpus centroid (Old Testament / New Testament / other sources) when
+    it beats the runner-up by `centroid_margin`.
+    """
+
+    def __init__(self, book_names: Optional[List[str]] = None, centroid_margin: float = 0.02):
+        self.parser = ScriptureReferenceParser()
+        self.book_names = book_names or [name for name, _ in BOOKS]
+        self.centroid_margin = centroid_margin
+        self.centroids: Optional[np.ndarray] = None
+        self.centroid_labels: List[str] = []
+        self._project = None
+
+        aliases: Dict[str, int] = {}
+        for index, (name, abbreviations) in enumerate(BOOKS):
+            # Short abbreviations ("rm", "at", "jo") are too ambiguous in free text; references still use them
+            for alias in [name] + [a for a in abbreviations if len(a) > 3 and not re.search(r"\d", a)]:
+                alias = fold(alias)
+                match = re.match(r"^([123])\s*(.+)$", alias)
+                if match:
+                    for prefix in ORDINAL_PREFIXES[match.group(1)]:
+                        aliases[fold(f"{prefix} {match.group(2)}")] = index
+                aliases[alias] = index
+        self.aliases = aliases
+        alternation = "|".join(
+            re.escape(alias).replace(r"\ ", r"\s+") for alias in sorted(aliases, key=len, reverse=True)
+        )
+        self.name_pattern = re.compile(rf"(?<![\w])(?:{BOOK_CUE})?(?P<book>{alternation})(?![\w])")
+
+        self.counts: Dict[str, int] = {}
+
+    def _books(self, text: str, folded: str) -> List[int]:
+        books = [ref.book_index for ref in self.parser.parse(text).references]
+        # "primeira carta de João" names 1 João, not the Gospel
+        folded = EPISTLE_ORDINAL.sub(r"\1 ", folded)
+        for match in self.name_pattern.finditer(folded):
+            index = self.aliases[re.sub(r"\s+", " ", match.group("book"))]
+            if match.group("named") or index in UNAMBIGUOUS_BOOKS or (match.group("cue") and index not in PERSON_BOOKS):
+                books.append(index)
+        return list(dict.fromkeys(books))
+
+    def _book_route(self, kind: str, indices) -> Route:
+        names = [self.book_names[i] for i in indices if i < len(self.book_names)]
+        # The book filter only narrows the Bible chunks: "O que Calvino diz sobre Romanos 9" still needs Calvin
+        where = {"$or": [{"book": {"$in": names}}, {"type": {"$ne": "scripture"}}]}
+        return Route(kind, where, names)
+
+    def route_text(self, query: str) -> Route:
+        folded = fold(query)
+        books = self._books(query, folded)
+        if books:
+            return self._book_route("book", books)
+        for _, pattern, indices in BOOK_GROUPS:
+            if pattern.search(folded):
+                return self._book_route("book_group", indices)
+        if OTHER_CORPUS_CUES.search(folded):
+            return Route("other", {"type": {"$ne": "scripture"}})
+        if SCRIPTURE_CUES.search(folded):
+            return Route("scripture", {"type": "scripture"})
+        return Route("none")
+
+    def route(self, query: str, query_embedding: Optional[List[float]] = None) -> Route:
+        route = self.route_text(query)
+        if route.kind == "none" and query_embedding is not None and self.centroids is not None:
+            route = self._route_by_centroid(query_embedding)
+        self.counts[route.kind] = self.counts.get(route.kind, 0) + 1
+        return route
+
+    # --- Optional embedding centroids ---
+    def fit_centroids(self, index) -> None:
+        """Mean direction of each corpus section in a LocalVectorIndex (needs scripture and one other group)."""
+        groups: Dict[str, List[int]] = {"old_testament": [], "new_testament": [], "other": []}
+        position = {name: i for i, name in enumerate(self.book_names)}
+        for row, meta in enumerate(index.metadatas):
+            if meta.get("type") != "scripture":
+                groups["other"].append(row)
+            elif meta.get("book") in position:
+                section = "old_testament" if position[meta["book"]] in OLD_TESTAMENT else "new_testament"
+                groups[section].append(row)
+
+        labels, centroids = [], []
+        for label, rows in groups.items():
+            if not rows:
+                continue
+            total = np.zeros(index.vectors.shape[1], dtype=np.float32)
+            for start in range(0, len(rows), 4096):
+                total += index._rows(np.asarray(rows[start:start + 4096])).sum(axis=0)
+            labels.append(label)
+            centroids.append(total / (np.linalg.norm(total) or 1.0))
+        if len(labels) < 2:
+            return
+        self.centroid_labels = labels
+        self.centroids = np.vstack(centroids)
+        self._project = index.project
+
+    def _route_by_centroid(self, query_embedding: List[float]) -> Route:
+        similarities = self.centroids @ self._project(query_embedding)[0]
+        order = np.argsort(-similarities)
+        if similarities[order[0]] - similarities[order[1]] < self.centroid_margin:
+            return Route("none")
+        label = self.centroid_labels[order[0]]
+        if label == "other":
+            return Route("centroid_other", {"type": {"$ne": "scripture"}})
+        indices = OLD_TESTAMENT if label == "old_testament" else NEW_TESTAMENT
+        return self._book_route("centroid_testament", indices)
+
+    def stats(self) -> Dict[str, object]:
+        return {"routes": dict(self.counts), "centroids": list(self.centroid_labels)}
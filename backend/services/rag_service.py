@@ -1,12 +1,42 @@
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
+# Heavy clients (Gemini, Chroma, FlashRank) are imported where they are built, see warmup_steps()
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.chat_history import InMemoryChatMessageHistory as ChatMessageHistory
 from backend.core.config import settings
-import chromadb
-from flashrank import Ranker, RerankRequest
+from backend.services.answer_cache import SemanticAnswerCache
+from backend.services.embedding_cache import build_embeddings, embedding_key
+from backend.services.rerank_batcher import RerankBatcher
+from backend.services.rerank_cache import RerankScoreCache
+from backend.services.cascade_reranker import CascadeReranker
+from backend.services.scripture_reference import ScriptureReferenceParser
+from backend.services.hybrid_retriever import HybridRetriever
+from backend.services.query_router import QueryRouter, Route
+from backend.services.local_vector_index import LocalVectorRetriever
+from backend.services.async_chroma import AsyncChromaRetriever, ThreadedCollection, connect_http_collection
+from backend.core.resilience import CircuitBreaker, ResilientCaller
+from backend.services.preload import (
+    RANKER_MODEL,
+    PreloadedState,
+    load_lexical_index,
+    load_local_vector_index,
+    load_ranker_model,
+    load_verse_index,
+    load_verse_store,
+    rerank_onnx_threads,
+)
+from backend.services.session_store import build_session_store
+from backend.services.history_compactor import HistoryCompactor
+from backend.services.speculation import SpeculationController
+from backend.services.context_packer import ContextPacker
+from backend.services.single_flight import SingleFlight, normalize_query
+from backend.core.metrics import QUERY_ROUTES, REQUESTS, TIME_TO_FIRST_TOKEN, TOKENS_PER_SECOND, StageTimer
+from backend.core.text import estimate_tokens
+import asyncio
+import time
+from functools import partial
+from langchain_core.documents import Document
+import os
 
 def format_docs(docs):
     formatted = []
@@ -20,39 +50,78 @@ def format_docs(docs):
         if book and chapter:
             identifier = f"[{book} {chapter}:{verses}]"
         else:
-            # Fallback to filename
+            # Fallback to filename, plus the other editions a deduplicated chunk stands for
             identifier = f"[{source}]"
+            if doc.metadata.get("alias_sources"):
+                identifier += f" (also in: {doc.metadata['alias_sources']})"
             
         formatted.append(f"{identifier}\n{doc.page_content}")
         
     return "\n\n".join(formatted)
 
 class RAGService:
-    def __init__(self):
-        if not settings.GOOGLE_API_KEY:
+    def __init__(self, llm=None, embeddings=None, chroma_client=None, ranker=None, first_stage_ranker=None,
+                 preloaded: PreloadedState = None, async_collection=None):
+        """
+        All arguments are optional overrides (the benchmarks inject local stand-ins);
+        by default Gemini, the cached Gemini embeddings, Chroma over HTTP and FlashRank are used.
+        `preloaded` carries read-only components already loaded before the workers forked.
+        `async_collection` replaces the collection behind the async Chroma path (anything
+        with an async `query()`); with only `chroma_client` given, its collection is queried on a thread.
+        """
+        if llm is None and not settings.GOOGLE_API_KEY:
             raise ValueError("GOOGLE_API_KEY is not set")
-            
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004", 
-            google_api_key=settings.GOOGLE_API_KEY
-        )
+
+        self.embeddings = embeddings or build_embeddings()
         
-        # Connect to ChromaDB
-        self.chroma_client = chromadb.HttpClient(host=settings.CHROMADB_HOST, port=settings.CHROMADB_PORT)
-        self.vector_store = Chroma(
-            client=self.chroma_client,
-            collection_name="scripture_corpus",
-            embedding_function=self.embeddings,
-        )
+        # ChromaDB, the reranker and the on-disk indexes are loaded by warmup_steps()
+        self._chroma_client_override = chroma_client
+        self._async_collection_override = async_collection
+        self._ranker_override = ranker
+        self._first_stage_ranker_override = first_stage_ranker
+        self.preloaded = preloaded or PreloadedState()
+        self.chroma_client = None
+        self.vector_store = None
+        self.retriever = None
+        self.local_vector_index = None
+        self.ranker = None
+        self.rerank_batcher = None
+        self.rerank_cache = None
+        self.cascade_reranker = None
+        self.lexical_index = None
+        self.verse_index = None
+        self.verse_store = None
         
-        self.llm = ChatGoogleGenerativeAI(
-            model=settings.GOOGLE_MODEL_NAME,
-            google_api_key=settings.GOOGLE_API_KEY,
-            temperature=0.3
+        if llm is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            llm = ChatGoogleGenerativeAI(
+                model=settings.GOOGLE_MODEL_NAME,
+                google_api_key=settings.GOOGLE_API_KEY,
+                temperature=0.3
+            )
+        self.llm = llm
+
+        # History storage (bounded in-memory, or SQLite write-through)
+        self.sessions = build_session_store()
+        # Token-budgeted history per prompt (recent turns verbatim + rolling summary)
+        self.history_compactor = HistoryCompactor(
+            self.llm,
+            self.sessions,
+            keep_turns=settings.HISTORY_KEEP_TURNS,
+            qa_token_budget=settings.HISTORY_QA_TOKEN_BUDGET,
+            reformulate_turns=settings.HISTORY_REFORMULATE_TURNS,
         )
 
-        # In-memory history storage
-        self.store = {}
+        # Semantic answer cache (skips retrieval, reranking and generation on a hit)
+        self.answer_cache = None
+        if settings.ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+                max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                max_bytes=settings.ANSWER_CACHE_MAX_BYTES,
+            )
         
         # 1. System Prompt for Reformulating Questions (Contextualization)
         self.reformulate_system_prompt = (
@@ -72,8 +141,6 @@ class RAGService:
         self.reformulate_chain = self.reformulate_prompt | self.llm | StrOutputParser()
         
         # 2. System Prompt for Theological Reasoning (The "Brain" Upgrade)
-        self.ranker = Ranker(model_name="ms-marco-MiniLM-L-12-v2") # Lightweight efficient model
-
         self.system_prompt = (
             "You are a Wise Christian Master and Teacher, embodying the highest level of knowledge "
             "in Christianity, the Bible, Theology, and Human History. "
@@ -126,89 +193,535 @@ class RAGService:
             ]
         )
         
+        # Vector (MMR) and lexical (BM25) candidates fused via RRF; both sources are attached during warm-up
+        self.hybrid_retriever = HybridRetriever(
+            None,
+            None,
+            lexical_k=settings.LEXICAL_TOP_K,
+            fused_k=settings.HYBRID_CANDIDATES,
+            rrf_k=settings.RRF_K,
+        )
+        # Book / testament / corpus-type filters for the retrieval (book names are refreshed in load_indexes)
+        self.query_router = QueryRouter(centroid_margin=settings.ROUTER_CENTROID_MARGIN)
+        self.route_fallbacks = 0
+
+        # Generations aborted because the client disconnected mid-stream
+        self.cancelled_generations = 0
+        # Identical in-flight first questions share one upstream generation
+        self.single_flight = SingleFlight() if settings.SINGLE_FLIGHT_ENABLED else None
+
+        # Merges adjacent verses / overlapping chunks and fills the context token budget by rerank score
+        self.context_packer = ContextPacker(token_budget=settings.CONTEXT_TOKEN_BUDGET)
+
+        # Speculative retrieval on the raw query while reformulation runs
+        self.speculation = SpeculationController(
+            lexical_threshold=settings.SPECULATION_LEXICAL_THRESHOLD,
+            embedding_threshold=settings.SPECULATION_EMBEDDING_THRESHOLD,
+        )
+
+        # Direct scripture references ("João 3:16", "Salmos 23") resolved without vector search
+        self.reference_parser = ScriptureReferenceParser()
+
+    # --- Warm-up (run concurrently in the background by the API, see backend/core/startup.py) ---
+    def warmup_steps(self):
+        """(component, loader, required) for everything too slow to build in __init__."""
+        return [
+            ("chroma", self.connect_vector_store, True),
+            ("ranker", self.load_ranker, True),
+            ("indexes", self.load_indexes, False),
+            ("query_cache", self.preload_query_cache, False),
+        ]
+
+    def _build_async_retriever(self, collection) -> AsyncChromaRetriever:
+        stand_in = self._async_collection_override
+        if stand_in is None and self._chroma_client_override is not None:
+            stand_in = ThreadedCollection(collection)
+        if stand_in is not None:
+            async def connect():
+                return stand_in
+        else:
+            connect = partial(
+                connect_http_collection, settings.CHROMADB_HOST, settings.CHROMADB_PORT, settings.CHROMA_MAX_CONCURRENCY
+            )
+
+        def caller(name: str, timeout_seconds: float) -> ResilientCaller:
+            return ResilientCaller(
+                name,
+                timeout_seconds=timeout_seconds,
+                max_concurrency=settings.CHROMA_MAX_CONCURRENCY,
+                retries=settings.CHROMA_RETRIES,
+                backoff_seconds=settings.CHROMA_RETRY_BACKOFF_SECONDS,
+                breaker=CircuitBreaker(settings.CHROMA_BREAKER_FAILURES, settings.CHROMA_BREAKER_RESET_SECONDS),
+            )
+
+        return AsyncChromaRetriever(
+            connect,
+            self.embeddings,
+            search_caller=caller("chroma", settings.CHROMA_TIMEOUT_SECONDS),
+            embed_caller=caller("query_embedding", settings.EMBEDDING_TIMEOUT_SECONDS),
+            sync_collection=collection,
+            k=20,
+            lambda_mult=0.7,
+        )
+
+    def connect_vector_store(self) -> None:
+        import chromadb
+
+        chroma_client = self._chroma_client_override or chromadb.HttpClient(
+            host=settings.CHROMADB_HOST, port=settings.CHROMADB_PORT
+        )
+        chroma_client.heartbeat()
+        collection = chroma_client.get_or_create_collection("scripture_corpus", embedding_function=None)
+
         # Upgrade: MMR (Maximal Marginal Relevance) to get diverse and relevant chunks
         # We retrieve MORE documents initially (k=20) to let the Reranker filter the best ones.
-        self.retriever = self.vector_store.as_retriever(
-            search_type="mmr",
-            search_kwargs={
-                "k": 20,           # Broad search for Reranker
-                "lambda_mult": 0.7 
-            }
+        remote = None
+        if settings.CHROMA_ASYNC_ENABLED:
+            remote = retriever = self._build_async_retriever(collection)
+        else:
+            from langchain_chroma import Chroma
+
+            self.vector_store = Chroma(
+                client=chroma_client,
+                collection_name="scripture_corpus",
+                embedding_function=self.embeddings,
+            )
+            # LangChain's Chroma takes the metadata filter as `filter`
+            self.hybrid_retriever.where_param = "filter"
+            retriever = self.vector_store.as_retriever(
+                search_type="mmr",
+                search_kwargs={
+                    "k": 20,           # Broad search for Reranker
+                    "lambda_mult": 0.7 
+                }
+            )
+        # Same MMR search in-process over the memory-mapped scripture snapshot (no HTTP round trip)
+        if settings.VECTOR_STORE_BACKEND == "local":
+            self.local_vector_index = self.preloaded.local_vector_index
+            if self.local_vector_index is None:
+                self.local_vector_index = load_local_vector_index()
+        if self.local_vector_index:
+            retriever = LocalVectorRetriever(
+                self.local_vector_index,
+                self.embeddings,
+                collection=collection,
+                k=20,
+                lambda_mult=0.7,
+                remote=remote,
+            )
+            self.hybrid_retriever.where_param = "where"
+            if settings.ROUTER_CENTROIDS_ENABLED:
+                self.query_router.fit_centroids(self.local_vector_index)
+        self.chroma_client = chroma_client
+        self.retriever = retriever
+        self.hybrid_retriever.vector_retriever = retriever
+
+    def load_ranker(self) -> None:
+        ranker = self._ranker_override or self.preloaded.ranker
+        if ranker is None:
+            ranker = load_ranker_model(rerank_onnx_threads())
+        self.ranker = ranker
+        if settings.RERANK_CACHE_ENABLED:
+            self.rerank_cache = RerankScoreCache(max_bytes=int(settings.RERANK_CACHE_MAX_MB * 1024 * 1024))
+        # Reranking runs on its own thread, micro-batched across concurrent requests
+        self.rerank_batcher = RerankBatcher(
+            self.ranker,
+            window_ms=settings.RERANK_BATCH_WINDOW_MS,
+            max_batch=settings.RERANK_MAX_BATCH,
+            queue_size=settings.RERANK_QUEUE_SIZE,
+            score_cache=self.rerank_cache,
+            model=RANKER_MODEL,
         )
+        if settings.RERANK_CASCADE_ENABLED:
+            first_stage = self._first_stage_ranker_override or self.preloaded.first_stage_ranker
+            if first_stage is None:
+                first_stage = load_ranker_model(rerank_onnx_threads(), settings.RERANK_FIRST_STAGE_MODEL)
+            self.cascade_reranker = CascadeReranker(
+                RerankBatcher(
+                    first_stage,
+                    window_ms=settings.RERANK_BATCH_WINDOW_MS,
+                    max_batch=settings.RERANK_MAX_BATCH,
+                    queue_size=settings.RERANK_QUEUE_SIZE,
+                    score_cache=self.rerank_cache,
+                    model=settings.RERANK_FIRST_STAGE_MODEL,
+                ),
+                self.rerank_batcher,
+                skip_margin=settings.RERANK_CASCADE_SKIP_MARGIN,
+                skip_min_score=settings.RERANK_CASCADE_SKIP_MIN_SCORE,
+                prune_margin=settings.RERANK_CASCADE_PRUNE_MARGIN,
+                min_keep=settings.RERANK_CASCADE_MIN_KEEP,
+                max_keep=settings.RERANK_CASCADE_MAX_KEEP,
+            )
+
+    def load_indexes(self) -> None:
+        # Each index comes from the pre-fork preload when there was one, otherwise from disk
+        self.lexical_index = self.preloaded.lexical_index
+        if self.lexical_index is None:
+            self.lexical_index = load_lexical_index()
+        self.hybrid_retriever.lexical_index = self.lexical_index
+
+        if settings.REFERENCE_FAST_PATH_ENABLED:
+            self.verse_index = self.preloaded.verse_index or load_verse_index()
+            # Filters must use the book names exactly as ingested (bible_data.json order)
+            if self.verse_index and len(self.verse_index.names) == len(self.query_router.book_names):
+                self.query_router.book_names = self.verse_index.names
+
+        if settings.VERSE_EXPANSION_RADIUS > 0:
+            self.verse_store = self.preloaded.verse_store or load_verse_store()
+
+    def preload_query_cache(self) -> None:
+        """Pulls the embeddings of known frequent questions from the disk cache into memory (no provider calls)."""
+        path = settings.WARMUP_QUERIES_PATH
+        if not path or not os.path.exists(path) or not hasattr(self.embeddings, "store"):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+        keys = [embedding_key(self.embeddings.model, "query", q) for q in queries]
+        found = self.embeddings.store.get_many(keys)
+        print(f"Query cache preloaded: {len(found)}/{len(queries)} warm-up questions.")
 
     def get_session_history(self, session_id: str) -> ChatMessageHistory:
-        if session_id not in self.store:
-            # In a real app, integrate with Redis or similar here
-            self.store[session_id] = ChatMessageHistory()
-        return self.store[session_id]
+        return self.sessions.get_history(session_id)
+
+    async def _retrieve_and_rerank(self, standalone_query: str, retrieval_mode: str = None,
+                                   timer: StageTimer = None) -> list:
+        """Returns (document, rerank score) pairs, best first."""
+        # Retrieve Broad Docs (vector, lexical or hybrid), narrowed to the slice of the corpus the query is about
+        retrieval_mode = retrieval_mode or settings.RETRIEVAL_MODE
+        route = await self._route(standalone_query)
+        broad_docs, timings = await self.hybrid_retriever.retrieve(standalone_query, retrieval_mode, route.where)
+        if route.where:
+            if len(broad_docs) >= settings.ROUTER_MIN_CANDIDATES:
+                QUERY_ROUTES.inc(route=route.kind, outcome="filtered")
+            else:
+                # Too narrow (or a wrong guess): search everything, as without routing
+                self.route_fallbacks += 1
+                QUERY_ROUTES.inc(route=route.kind, outcome="fallback")
+                broad_docs, retry_timings = await self.hybrid_retriever.retrieve(standalone_query, retrieval_mode)
+                for stage, ms in retry_timings.items():
+                    timings[stage] = timings.get(stage, 0.0) + ms
+        
+        # RERANKING (Academic Enhancement)
+        # Re-sort docs based on true semantic relevance to the query
+        passages = [
+            {"id": i, "text": doc.page_content, "meta": doc.metadata} 
+            for i, doc in enumerate(broad_docs)
+        ]
+        
+        if self.cascade_reranker:
+            results, rerank_timings = await self.cascade_reranker.rerank(standalone_query, passages)
+            timings.update(rerank_timings)
+        else:
+            results, rerank_timings = await self.rerank_batcher.rerank(standalone_query, passages)
+            timings["rerank_queue_ms"] = rerank_timings.queue_wait_ms
+            timings["rerank_ms"] = rerank_timings.inference_ms
+        if timer:
+            for stage, ms in timings.items():
+                timer.record(stage.removesuffix("_ms"), ms)
+        
+        # All reranked docs with their scores; the context packer decides how many fit
+        return [
+            (Document(page_content=res["text"], metadata=res.get("meta", {})), float(res.get("score", 0.0)))
+            for res in results
+        ]
 
-    async def get_answer_stream(self, query: str, session_id: str):
+    async def _route(self, query: str) -> Route:
+        if not settings.QUERY_ROUTER_ENABLED:
+            return Route("none")
+        query_embedding = None
+        if self.query_router.centroids is not None:
+            # Goes through the embedding cache, so the vector search reuses it
+            query_embedding = await self.embeddings.aembed_query(query)
+        return self.query_router.route(query, query_embedding)
+
+    async def _resolve_speculation(self, task: asyncio.Task, raw_query: str, standalone_query: str,
+                                   timer: StageTimer = None):
+        """
+        Returns the speculative results if the reformulated query kept the raw query's meaning.
+        Their stage timings only reach the request timer on a hit.
+        """
+        close = self.speculation.is_close(raw_query, standalone_query)
+        if not close:
+            try:
+                # Both embeddings go through the embedding cache and are reused downstream
+                raw_embedding, standalone_embedding = await asyncio.gather(
+                    self.embeddings.aembed_query(raw_query),
+                    self.embeddings.aembed_query(standalone_query),
+                )
+                close = self.speculation.is_close(raw_query, standalone_query, raw_embedding, standalone_embedding)
+            except Exception as e:
+                print(f"Error comparing speculative query: {e}")
+
+        if not close:
+            task.cancel()
+            self.speculation.record(hit=False)
+            return None
+
+        waited = time.perf_counter()
+        try:
+            docs, retrieval_ms, speculative_timer = await task
+        except Exception as e:
+            print(f"Error in speculative retrieval: {e}")
+            self.speculation.record(hit=False)
+            return None
+        if timer:
+            timer.merge(speculative_timer)
+        # Retrieval time hidden behind reformulation, i.e. what a sequential run would have added
+        remaining_ms = (time.perf_counter() - waited) * 1000
+        self.speculation.record(hit=True, saved_ms=max(retrieval_ms - remaining_ms, 0.0))
+        return docs
+
+    async def _timed_retrieval(self, query: str, retrieval_mode: str = None):
+        # Buffered: the results (and their timings) may still be thrown away
+        timer = StageTimer(observe=False)
+        started = time.perf_counter()
+        docs = await self._retrieve_and_rerank(query, retrieval_mode, timer)
+        return docs, (time.perf_counter() - started) * 1000, timer
+
+    async def get_answer_stream(self, query: str, session_id: str, retrieval_mode: str = None, debug: bool = False,
+                                include_context: bool = False):
         """
         Generates a streaming response with memory and reasoning.
+        With `debug`, a final {"type": "timings"} event carries the per-stage latencies (ms).
+        With `include_context`, a {"type": "context"} event carries the packed prompt context (evaluation).
         """
-        session_history = self.get_session_history(session_id)
+        timer = StageTimer()
+        events = self._answer_stream(query, session_id, retrieval_mode, timer)
+        try:
+            async for event in events:
+                if event["type"] == "context" and not include_context:
+                    continue
+                yield event
+        except (asyncio.CancelledError, GeneratorExit):
+            REQUESTS.inc(outcome="cancelled")
+            raise
+        except Exception:
+            REQUESTS.inc(outcome="error")
+            raise
+        finally:
+            await events.aclose()
+        if debug:
+            yield {"type": "timings", "data": {**timer.timings, "total": timer.elapsed_ms()}}
+
+    async def _answer_stream(self, query: str, session_id: str, retrieval_mode: str, timer: StageTimer):
+        session_history = await self.sessions.aget_history(session_id)
         history_messages = session_history.messages
+
+        # Step 0: Direct Scripture References (bare references skip retrieval entirely)
+        reference_docs = []
+        is_bare_reference = False
+        if self.verse_index:
+            with timer.stage("reference_parse"):
+                parsed = self.reference_parser.parse(query)
+                if parsed.references:
+                    reference_docs = self.verse_index.documents_for(
+                        parsed.references, max_verses=settings.REFERENCE_MAX_VERSES
+                    )
+                    is_bare_reference = parsed.is_bare and bool(reference_docs)
         
         # Step 1: Reformulate Query (if history exists)
         standalone_query = query
-        if history_messages:
+        speculative_task = None
+        speculative_docs = None
+        if history_messages and not is_bare_reference:
+            if settings.SPECULATIVE_RETRIEVAL_ENABLED and not self.speculation.needs_reformulation(query):
+                # Self-contained question: the history adds nothing to retrieval
+                self.speculation.skipped_reformulations += 1
+            else:
+                if settings.SPECULATIVE_RETRIEVAL_ENABLED:
+                    # Start retrieval on the raw query while the LLM reformulates it
+                    speculative_task = asyncio.create_task(self._timed_retrieval(query, retrieval_mode))
+                try:
+                    try:
+                        with timer.stage("reformulation"):
+                            standalone_query = await self.reformulate_chain.ainvoke({
+                                "chat_history": self.history_compactor.for_reformulation(history_messages),
+                                "input": query
+                            })
+                    except Exception as e:
+                        print(f"Error formulating query: {e}")
+
+                    if speculative_task:
+                        with timer.stage("speculation_wait"):
+                            speculative_docs = await self._resolve_speculation(
+                                speculative_task, query, standalone_query, timer
+                            )
+                finally:
+                    # Client gone (or any error) before the speculation was resolved: don't search for nobody
+                    if speculative_task and not speculative_task.done():
+                        speculative_task.cancel()
+
+        # Step 1.5: Semantic Answer Cache
+        # References are skipped: "João 3:16" and "João 3:17" embed almost identically
+        query_embedding = None
+        if self.answer_cache and not reference_docs:
             try:
-                standalone_query = await self.reformulate_chain.ainvoke({
-                    "chat_history": history_messages,
-                    "input": query
-                })
+                with timer.stage("answer_cache"):
+                    query_embedding = await self.embeddings.aembed_query(standalone_query)
+                    cached = self.answer_cache.lookup(query_embedding)
             except Exception as e:
-                print(f"Error formulating query: {e}")
-        
-        # Step 2: Retrieve Broad Docs
-        broad_docs = await self.retriever.ainvoke(standalone_query)
-        
-        # Step 2.5: RERANKING (Academic Enhancement)
-        # Re-sort docs based on true semantic relevance to the query
-        passages = [
-            {"id": i, "text": doc.page_content, "meta": doc.metadata} 
-            for i, doc in enumerate(broad_docs)
-        ]
-        
-        rerank_request = RerankRequest(query=standalone_query, passages=passages)
-        results = self.ranker.rerank(rerank_request)
-        
-        # Take Top 6 Reranked Docs
-        top_results = results[:6]
+                print(f"Error querying answer cache: {e}")
+                cached = None
+
+            if cached:
+                # Replay through the same event stream as a fresh generation
+                timer.timings["ttft"] = timer.elapsed_ms()
+                TIME_TO_FIRST_TOKEN.observe(timer.timings["ttft"] / 1000)
+                yield {"type": "content", "data": cached.answer}
+                await self.sessions.aappend_turn(session_id, query, cached.answer)
+                self.history_compactor.schedule_update(
+                    session_id, (await self.sessions.aget_history(session_id)).messages
+                )
+                yield {"type": "sources", "data": cached.sources}
+                REQUESTS.inc(outcome="cache_hit")
+                return
         
-        # Reconstruct Document objects
-        from langchain_core.documents import Document
-        docs = []
-        for res in top_results:
-             # Find original metadata if needed, but flashrank passes it back
-             meta = res.get("meta", {})
-             docs.append(Document(page_content=res["text"], metadata=meta))
+        with timer.stage("history_compaction"):
+            qa_history = await self.history_compactor.for_answer(session_id, history_messages)
+        def answer_events():
+            return self._answer_events(
+                query, standalone_query, retrieval_mode, reference_docs, is_bare_reference,
+                speculative_docs, qa_history, query_embedding, timer,
+            )
 
-        context_text = format_docs(docs)
+        # Set when this request joined another one's generation (its stages are timed there)
+        coalesced_since = None
+        if self.single_flight is not None and not history_messages:
+            # Identical first questions share one retrieval + generation; with history the answer is per session
+            key = (normalize_query(standalone_query), retrieval_mode)
+            led = []
+
+            def lead():
+                led.append(True)
+                return answer_events()
+
+            events = self.single_flight.subscribe(key, lead)
+            coalesced_since = timer.elapsed_ms()
+        else:
+            events = answer_events()
+
+        full_answer = ""
+        try:
+            async for event in events:
+                if coalesced_since is not None and event["type"] != "context":
+                    if not led:
+                        # Follower: waited on the leader's retrieval and first token (or joined mid-answer)
+                        timer.record("coalesced_wait", timer.elapsed_ms() - coalesced_since)
+                    coalesced_since = None
+                if event["type"] == "content":
+                    if not full_answer:
+                        ttft_ms = timer.elapsed_ms()
+                        timer.timings["ttft"] = ttft_ms
+                        TIME_TO_FIRST_TOKEN.observe(ttft_ms / 1000)
+                    full_answer += event["data"]
+                elif event["type"] == "sources":
+                    # Step 4: Update History (per session, also for coalesced requests)
+                    await self.sessions.aappend_turn(session_id, query, full_answer)
+                    self.history_compactor.schedule_update(
+                        session_id, (await self.sessions.aget_history(session_id)).messages
+                    )
+                yield event
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away: stop the upstream generation and keep the partial answer out of history
+            self.cancelled_generations += 1
+            raise
+        finally:
+            await events.aclose()
+        REQUESTS.inc(outcome="completed")
+
+    async def _answer_events(self, query, standalone_query, retrieval_mode, reference_docs, is_bare_reference,
+                             speculative_docs, qa_history, query_embedding, timer: StageTimer):
+        """Steps 2-3: retrieval, packing and the streamed answer, ending with the sources event."""
+        # Step 2: Retrieve + Rerank, then pack (referenced verses are pinned first in the context)
+        if is_bare_reference:
+            ranked = []
+        elif speculative_docs is not None:
+            ranked = speculative_docs
+        else:
+            ranked = await self._retrieve_and_rerank(standalone_query, retrieval_mode, timer)
+        if self.verse_store and ranked:
+            # Widen cut-off Bible windows to their neighbors before packing (overlaps are merged there)
+            with timer.stage("verse_expansion"):
+                ranked = [
+                    (self.verse_store.expand(doc, settings.VERSE_EXPANSION_RADIUS, settings.VERSE_EXPANSION_MAX_TOKENS), score)
+                    for doc, score in ranked
+                ]
+        with timer.stage("context_packing"):
+            docs = self.context_packer.pack(ranked, pinned=reference_docs)
+        yield {"type": "context", "data": [doc.page_content for doc in docs]}
+
+        with timer.stage("prompt_assembly"):
+            context_text = format_docs(docs)
         
-        # Step 3: Stream Answer
-        # We pass history mostly for context, but the reformulation did the heavy lifting for retrieval.
-        # The chain needs 'chat_history' because of MessagesPlaceholder
-        chain_with_context = (
-            {"context": lambda x: context_text, "chat_history": lambda x: history_messages, "input": RunnablePassthrough()}
-            | self.qa_prompt
-            | self.llm
-            | StrOutputParser()
-        )
+            # Step 3: Stream Answer
+            # We pass history mostly for context, but the reformulation did the heavy lifting for retrieval.
+            # The chain needs 'chat_history' because of MessagesPlaceholder
+            chain_with_context = (
+                {"context": lambda x: context_text, "chat_history": lambda x: qa_history, "input": RunnablePassthrough()}
+                | self.qa_prompt
+                | self.llm
+                | StrOutputParser()
+            )
         
         full_answer = ""
-        async for chunk in chain_with_context.astream(query):
-            full_answer += chunk
-            yield {"type": "content", "data": chunk}
-            
-        # Step 4: Update History
-        session_history.add_user_message(query)
-        session_history.add_ai_message(full_answer)
+        first_chunk_at = None
+        generation_started = time.perf_counter()
+        stream = chain_with_context.astream(query)
+        try:
+            async for chunk in stream:
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                    timer.record("llm_first_token", (first_chunk_at - generation_started) * 1000)
+                full_answer += chunk
+                yield {"type": "content", "data": chunk}
+        finally:
+            await stream.aclose()
+
+        if first_chunk_at is not None:
+            streaming_seconds = time.perf_counter() - first_chunk_at
+            timer.record("llm_streaming", streaming_seconds * 1000)
+            if streaming_seconds > 0:
+                TOKENS_PER_SECOND.observe(estimate_tokens(full_answer) / streaming_seconds)
             
         # Yield sources at the end
         unique_sources = list(set([doc.metadata.get("source", "Unknown") for doc in docs]))
         yield {"type": "sources", "data": unique_sources}
 
+        if self.answer_cache and query_embedding is not None and full_answer:
+            self.answer_cache.store(query_embedding, full_answer, unique_sources)
+
+    def get_stats(self) -> dict:
+        stats = {}
+        if hasattr(self.embeddings, "store"):
+            stats["embedding_cache"] = self.embeddings.store.stats()
+        if self.rerank_batcher:
+            stats["reranker"] = self.rerank_batcher.stats()
+        if self.rerank_cache is not None:
+            stats["rerank_cache"] = self.rerank_cache.stats()
+        if self.cascade_reranker:
+            stats["rerank_cascade"] = {
+                **self.cascade_reranker.stats(),
+                "first_stage": self.cascade_reranker.first_stage.stats(),
+            }
+        if hasattr(self.retriever, "stats"):
+            stats["vector_store"] = self.retriever.stats()
+        else:
+            stats["vector_store"] = {"backend": "chroma"}
+        stats["vector_store"]["lexical_fallbacks"] = self.hybrid_retriever.lexical_fallbacks
+        if settings.QUERY_ROUTER_ENABLED:
+            stats["query_router"] = {**self.query_router.stats(), "fallbacks": self.route_fallbacks}
+        stats["context_packer"] = self.context_packer.stats()
+        if self.verse_store:
+            stats["verse_store"] = self.verse_store.stats()
+        if self.single_flight is not None:
+            stats["single_flight"] = self.single_flight.stats()
+        stats["speculation"] = self.speculation.stats()
+        stats["sessions"] = self.sessions.stats()
+        stats["sessions"]["summaries_built"] = self.history_compactor.summaries_built
+        if self.answer_cache:
+            stats["answer_cache"] = self.answer_cache.stats()
+        return stats
+
     def get_answer(self, query: str, session_id: str = "default"):
         # Synchronous version fallback (updated for consistency, though unused by stream endpoint)
         session_history = self.get_session_history(session_id)
@@ -225,8 +738,7 @@ class RAGService:
         )
         
         answer = chain_with_context.invoke(query)
-        session_history.add_user_message(query)
-        session_history.add_ai_message(answer)
+        self.sessions.append_turn(session_id, query, answer)
         
         return {
             "answer": answer,
@@ -0,0 +1,197 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.rerank_cache import RerankScoreCache
+
+Passages = List[Dict[str, Any]]
+
+
+@dataclass
+class RerankTimings:
+    queue_wait_ms: float
+    inference_ms: float
+    batch_size: int
+
+
+class RerankBatcher:
+    """
+    Runs FlashRank off the event loop on a dedicated thread.
+
+    Requests arriving within `window_ms` of each other are scored together in a
+    single ONNX call. The submission queue is bounded, so callers wait (instead of
+    piling up work) once `queue_size` requests are pending.
+
+    With a `score_cache`, only the (query, passage) pairs it does not know are
+    sent to the model; `model` keeps the scores of different rankers apart.
+    """
+
+    def __init__(self, ranker, window_ms: float = 5.0, max_batch: int = 8, queue_size: int = 64,
+                 score_cache: Optional[RerankScoreCache] = None, model: str = ""):
+        self.ranker = ranker
+        self.score_cache = score_cache
+        self.model = model
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.requests = 0
+        self.batches = 0
+        self.total_queue_wait_ms = 0.0
+        self.total_inference_ms = 0.0
+        self.cache_only = 0
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            stale = self._queue
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker = asyncio.create_task(self._run())
+            if stale is not None:
+                # Requests still queued for the worker that stopped move to the new one instead of
+                # waiting forever (the old queue was bounded by the same size, so they all fit)
+                loop = asyncio.get_running_loop()
+                while not stale.empty():
+                    item = stale.get_nowait()
+                    future = item[2]
+                    if future.get_loop() is loop and not future.done():
+                        self._queue.put_nowait(item)
+
+    async def rerank(self, query: str, passages: Passages) -> Tuple[Passages, RerankTimings]:
+        if not passages:
+            return [], RerankTimings(0.0, 0.0, 0)
+        if self.score_cache is None:
+            return await self._submit(query, passages)
+
+        keys = self.score_cache.keys(self.model, query, passages)
+        cached = [self.score_cache.get(key) for key in keys]
+        missing = [p for p, score in zip(passages, cached) if score is None]
+        if missing:
+            scored, timings = await self._submit(query, missing)
+            # Passage ids are unique within a request; the ranker may return copies in any order
+            key_by_id = {p["id"]: key for p, key in zip(passages, keys)}
+            for passage in scored:
+                self.score_cache.put(key_by_id[passage["id"]], passage["score"])
+        else:
+            scored, timings = [], RerankTimings(0.0, 0.0, 0)
+            self.cache_only += 1
+
+        results = scored + [{**p, "score": score} for p, score in zip(passages, cached) if score is not None]
+        results.sort(key=lambda x: x["score"], reverse=True)
+        return results, timings
+
+    async def _submit(self, query: str, passages: Passages) -> Tuple[Passages, RerankTimings]:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        # Blocks here (backpressure) when the queue is full
+        await self._queue.put((query, passages, future, time.perf_counter()))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.window
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                started = time.perf_counter()
+                try:
+                    results = await loop.run_in_executor(
+                        self._executor, self._score_batch, [(q, p) for q, p, _, _ in batch]
+                    )
+                except Exception as e:
+                    for _, _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                inference_ms = (time.perf_counter() - started) * 1000
+                self.batches += 1
+                for (_, _, future, enqueued_at), result in zip(batch, results):
+                    timings = RerankTimings(
+                        queue_wait_ms=(started - enqueued_at) * 1000,
+                        inference_ms=inference_ms,
+                        batch_size=len(batch),
+                    )
+                    self.requests += 1
+                    self.total_queue_wait_ms += timings.queue_wait_ms
+                    self.total_inference_ms += inference_ms
+                    if not future.done():
+                        future.set_result((result, timings))
+        finally:
+            # Stopped mid-batch (cancelled, or the loop is going away): don't leave those callers hanging
+            for _, _, future, _ in batch:
+                if not future.done() and not loop.is_closed():
+                    future.set_exception(RuntimeError("rerank worker stopped"))
+
+    def _score_batch(self, requests: List[Tuple[str, Passages]]) -> List[Passages]:
+        # Joint scoring needs FlashRank's ONNX session (stand-in rankers only implement rerank())
+        if len(requests) > 1 and hasattr(self.ranker, "session"):
+            try:
+                return self._score_jointly(requests)
+            except Exception as e:
+                print(f"Joint rerank failed, scoring requests one by one: {e}")
+        from flashrank import RerankRequest
+
+        return [self.ranker.rerank(RerankRequest(query=q, passages=p)) for q, p in requests]
+
+    def _score_jointly(self, requests: List[Tuple[str, Passages]]) -> List[Passages]:
+        # Mirrors Ranker.rerank for pointwise cross-encoders, but with the
+        # (query, passage) pairs of several requests in one ONNX session run.
+        if getattr(self.ranker, "llm_model", None):
+            raise RuntimeError("listwise models cannot be batched across queries")
+
+        pairs = [[query, p["text"]] for query, passages in requests for p in passages]
+        encoded = self.ranker.tokenizer.encode_batch(pairs)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        token_type_ids = np.array([e.type_ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+
+        onnx_input = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if not np.all(token_type_ids == 0):
+            onnx_input["token_type_ids"] = token_type_ids
+
+        logits = self.ranker.session.run(None, onnx_input)[0]
+        if logits.shape[1] == 1:
+            scores = 1 / (1 + np.exp(-logits.flatten()))
+        else:
+            exp_logits = np.exp(logits)
+            scores = exp_logits[:, 1] / np.sum(exp_logits, axis=1)
+
+        results = []
+        offset = 0
+        for _, passages in requests:
+            scored = [dict(p) for p in passages]
+            for passage, score in zip(scored, scores[offset : offset + len(passages)]):
+                passage["score"] = score
+            offset += len(passages)
+            scored.sort(key=lambda x: x["score"], reverse=True)
+            results.append(scored)
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "cache_only": self.cache_only,
+            "batches": self.batches,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "avg_queue_wait_ms": self.total_queue_wait_ms / self.requests if self.requests else 0.0,
+            "avg_inference_ms": self.total_inference_ms / self.requests if self.requests else 0.0,
+        }
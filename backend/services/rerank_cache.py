@@ -0,0 +1,97 @@
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.core.hashing import chunk_id, content_hash
+from backend.services.single_flight import normalize_query
+
+# OrderedDict node + boxed float, on top of the key string itself
+_ENTRY_OVERHEAD_BYTES = 100 + sys.getsizeof(0.0)
+
+
+class RerankScoreCache:
+    """
+    Cross-encoder scores keyed on (model, normalized query, chunk id), so the
+    popular chunks are not re-scored for every repeat of a question. Entries are
+    evicted LRU-first once `max_bytes` is exceeded.
+
+    Only touched from the event loop (the batchers look up and store around their
+    worker thread), so it needs no lock.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._scores: "OrderedDict[str, float]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def keys(model: str, query: str, passages: List[Dict]) -> List[str]:
+        normalized = normalize_query(query)
+        return [
+            content_hash(model, normalized, chunk_id(p["text"], p.get("meta") or {}))[:32]
+            for p in passages
+        ]
+
+    @staticmethod
+    def _entry_bytes(key: str) -> int:
+        return sys.getsizeof(key) + _ENTRY_OVERHEAD_BYTES
+
+    def get(self, key: str) -> Optional[float]:
+        score = self._scores.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self._scores.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def put(self, key: str, score: float) -> None:
+        if key not in self._scores:
+            self._bytes += self._entry_bytes(key)
+        self._scores[key] = float(score)
+        self._scores.move_to_end(key)
+        while self._bytes > self.max_bytes and self._scores:
+            evicted, _ = self._scores.popitem(last=False)
+            self._bytes -= self._entry_bytes(evicted)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def save(self, path: str) -> None:
+        """Writes the entries (least recently used first) as .npz, atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                keys=np.array(list(self._scores.keys()), dtype="S32"),
+                scores=np.array(list(self._scores.values()), dtype=np.float32),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Adds the entries saved at `path` (still bounded by max_bytes); returns how many were read."""
+        with np.load(path) as data:
+            keys, scores = data["keys"], data["scores"]
+        for key, score in zip(keys, scores):
+            self.put(key.decode("ascii"), float(score))
+        return len(keys)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._scores),
+            "memory_mb": round(self._bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
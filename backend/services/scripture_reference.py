@@ -0,0 +1,271 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from backend.core.text import fold
+
+# Canonical (Protestant) book order, as in source_docs/bible_data.json.
+# Each entry lists the display name followed by accepted abbreviations. Abbreviations
+# that collide with common Portuguese words ("os", "na", "ex", "pr") are left out on purpose.
+BOOKS: List[Tuple[str, List[str]]] = [
+    ("Gênesis", ["gn", "gen", "gên"]),
+    ("Êxodo", ["êx", "exo"]),
+    ("Levítico", ["lv", "lev"]),
+    ("Números", ["nm", "num"]),
+    ("Deuteronômio", ["dt", "deut"]),
+    ("Josué", ["js", "jos"]),
+    ("Juízes", ["jz", "juí"]),
+    ("Rute", ["rt"]),
+    ("1 Samuel", ["1sm", "1 sm"]),
+    ("2 Samuel", ["2sm", "2 sm"]),
+    ("1 Reis", ["1rs", "1 rs"]),
+    ("2 Reis", ["2rs", "2 rs"]),
+    ("1 Crônicas", ["1cr", "1 cr"]),
+    ("2 Crônicas", ["2cr", "2 cr"]),
+    ("Esdras", ["ed", "esd"]),
+    ("Neemias", ["ne", "nee"]),
+    ("Ester", ["et", "est"]),
+    ("Jó", []),
+    ("Salmos", ["salmo", "sl", "sal"]),
+    ("Provérbios", ["pv", "prov"]),
+    ("Eclesiastes", ["ec", "ecl"]),
+    ("Cânticos", ["cantares", "cântico dos cânticos", "cantares de salomão", "ct"]),
+    ("Isaías", ["is", "isa"]),
+    ("Jeremias", ["jr", "jer"]),
+    ("Lamentações", ["lamentações de jeremias", "lm", "lam"]),
+    ("Ezequiel", ["ez", "eze"]),
+    ("Daniel", ["dn", "dan"]),
+    ("Oséias", ["oseias"]),
+    ("Joel", ["jl"]),
+    ("Amós", ["am"]),
+    ("Obadias", ["ob", "obd"]),
+    ("Jonas", ["jn"]),
+    ("Miquéias", ["miqueias", "mq"]),
+    ("Naum", []),
+    ("Habacuque", ["hc", "hab"]),
+    ("Sofonias", ["sf"]),
+    ("Ageu", ["ag"]),
+    ("Zacarias", ["zc", "zac"]),
+    ("Malaquias", ["ml", "mal"]),
+    ("Mateus", ["mt"]),
+    ("Marcos", ["mc"]),
+    ("Lucas", ["lc"]),
+    ("João", ["jo"]),
+    ("Atos", ["atos dos apóstolos", "at"]),
+    ("Romanos", ["rm", "rom"]),
+    ("1 Coríntios", ["1co", "1 co", "1cor", "1 cor"]),
+    ("2 Coríntios", ["2co", "2 co", "2cor", "2 cor"]),
+    ("Gálatas", ["gl", "gál"]),
+    ("Efésios", ["ef"]),
+    ("Filipenses", ["fp", "fil"]),
+    ("Colossenses", ["cl", "col"]),
+    ("1 Tessalonicenses", ["1ts", "1 ts"]),
+    ("2 Tessalonicenses", ["2ts", "2 ts"]),
+    ("1 Timóteo", ["1tm", "1 tm"]),
+    ("2 Timóteo", ["2tm", "2 tm"]),
+    ("Tito", ["tt"]),
+    ("Filemom", ["fm"]),
+    ("Hebreus", ["hb"]),
+    ("Tiago", ["tg"]),
+    ("1 Pedro", ["1pe", "1 pe"]),
+    ("2 Pedro", ["2pe", "2 pe"]),
+    ("1 João", ["1jo", "1 jo"]),
+    ("2 João", ["2jo", "2 jo"]),
+    ("3 João", ["3jo", "3 jo"]),
+    ("Judas", ["jd"]),
+    ("Apocalipse", ["ap", "apoc"]),
+]
+
+ORDINAL_PREFIXES = {
+    "1": ["1", "1ª", "1a", "1º", "i", "primeira", "primeiro"],
+    "2": ["2", "2ª", "2a", "2º", "ii", "segunda", "segundo"],
+    "3": ["3", "3ª", "3a", "3º", "iii", "terceira", "terceiro"],
+}
+
+# Words that may surround a bare reference without turning it into a question
+FILLER_WORDS = {
+    "e", "leia", "ler", "mostre", "mostra", "mostrar", "cite", "versiculo", "versiculos",
+    "capitulo", "capitulos", "texto", "o", "a", "os", "as", "de", "do", "da", "em", "por",
+    "favor", "me", "livro", "biblia", "ver", "veja", "cf",
+}
+
+
+@dataclass(frozen=True)
+class ScriptureReference:
+    book_index: int
+    start_chapter: int
+    start_verse: Optional[int] = None
+    end_chapter: Optional[int] = None
+    end_verse: Optional[int] = None
+
+    @property
+    def book_name(self) -> str:
+        return BOOKS[self.book_index][0]
+
+
+@dataclass
+class ParseResult:
+    references: List[ScriptureReference]
+    is_bare: bool
+
+
+class ScriptureReferenceParser:
+    """Finds Portuguese Bible references ("João 3:16-18", "Sl 23", "1 Co 13:4,7") in free text."""
+
+    def __init__(self):
+        # Aliases are keyed without whitespace so "1jo", "1 jo" and "1ª  jo" all resolve
+        self.aliases: Dict[str, int] = {}
+        spellings = set()
+        for index, (name, abbreviations) in enumerate(BOOKS):
+            for alias in [name.lower()] + abbreviations:
+                spellings.update(self._register(alias, index))
+
+        # Longest aliases first so "1 joão" wins over "joão"
+        alternation = "|".join(
+            re.escape(alias).replace(r"\ ", r"\s*") for alias in sorted(spellings, key=len, reverse=True)
+        )
+        verse_range = r"\d{1,3}(?:\s*[-–]\s*\d{1,3}(?:\s*[:.]\s*\d{1,3})?)?"
+        self.pattern = re.compile(
+            rf"(?<![\wÀ-ÿ])(?P<book>{alternation})\.?\s*"
+            rf"(?P<spec>\d{{1,3}}(?:\s*[:.]\s*{verse_range}(?:\s*,\s*{verse_range})*)?(?:\s*[-–]\s*\d{{1,3}})?)"
+            rf"(?![\wÀ-ÿ]|\s*[:.]\d)",
+            re.IGNORECASE,
+        )
+
+    @staticmethod
+    def _key(alias: str) -> str:
+        return re.sub(r"\s+", "", alias.lower())
+
+    def _register(self, alias: str, index: int) -> List[str]:
+        variants = {alias, fold(alias)}
+        match = re.match(r"^([123])\s*(.+)$", alias)
+        if match:
+            number, rest = match.groups()
+            for prefix in ORDINAL_PREFIXES[number]:
+                variants.add(f"{prefix} {rest}")
+                variants.add(fold(f"{prefix} {rest}"))
+        for variant in variants:
+            # Accented spellings take priority over folded ones ("jó" vs "jo")
+            key = self._key(variant)
+            if key not in self.aliases or variant == alias:
+                self.aliases[key] = index
+        return list(variants)
+
+    def _parse_spec(self, book_index: int, spec: str) -> List[ScriptureReference]:
+        spec = re.sub(r"\s+", "", spec).replace("–", "-").replace(".", ":")
+        if ":" not in spec:
+            if "-" in spec:
+                start, end = spec.split("-", 1)
+                return [ScriptureReference(book_index, int(start), end_chapter=int(end))]
+            return [ScriptureReference(book_index, int(spec))]
+
+        chapter_str, verse_part = spec.split(":", 1)
+        chapter = int(chapter_str)
+        references = []
+        for part in verse_part.split(","):
+            if "-" not in part:
+                references.append(ScriptureReference(book_index, chapter, int(part)))
+                continue
+            start, end = part.split("-", 1)
+            if ":" in end:
+                # Cross-chapter range: "3:16-4:2"
+                end_chapter, end_verse = end.split(":", 1)
+                references.append(
+                    ScriptureReference(book_index, chapter, int(start), int(end_chapter), int(end_verse))
+                )
+            else:
+                references.append(ScriptureReference(book_index, chapter, int(start), chapter, int(end)))
+        return references
+
+    def parse(self, text: str) -> ParseResult:
+        references: List[ScriptureReference] = []
+        residual = text
+        for match in self.pattern.finditer(text):
+            book = self._key(match.group("book"))
+            index = self.aliases.get(book, self.aliases.get(fold(book)))
+            if index is None:
+                continue
+            references.extend(self._parse_spec(index, match.group("spec")))
+            residual = residual.replace(match.group(0), " ")
+
+        words = re.findall(r"[a-z0-9]+", fold(residual))
+        is_bare = bool(references) and all(w in FILLER_WORDS for w in words)
+        return ParseResult(references=references, is_bare=is_bare)
+
+
+class VerseIndex:
+    """In-memory verse lookup built from the structured Bible JSON."""
+
+    def __init__(self, books: List[dict], source: str = "Bible (ACF)"):
+        self.source = source
+        self.names = [book.get("name") for book in books]
+        self.chapters: List[List[List[str]]] = [book.get("chapters", []) for book in books]
+
+    @classmethod
+    def from_json(cls, json_path: str) -> "VerseIndex":
+        with open(json_path, "r", encoding="utf-8-sig") as f:
+            return cls(json.load(f))
+
+    def _verses(self, ref: ScriptureReference) -> List[Tuple[int, int, str]]:
+        if ref.book_index >= len(self.chapters):
+            return []
+        chapters = self.chapters[ref.book_index]
+        end_chapter = ref.end_chapter or ref.start_chapter
+        verses = []
+        for chapter in range(ref.start_chapter, min(end_chapter, len(chapters)) + 1):
+            if chapter < 1:
+                continue
+            chapter_verses = chapters[chapter - 1]
+            first = ref.start_verse if (chapter == ref.start_chapter and ref.start_verse) else 1
+            if chapter == end_chapter and ref.end_verse:
+                last = ref.end_verse
+            elif chapter == end_chapter and ref.start_verse and ref.end_chapter is None:
+                last = ref.start_verse
+            else:
+                last = len(chapter_verses)
+            for verse in range(max(first, 1), min(last, len(chapter_verses)) + 1):
+                verses.append((chapter, verse, chapter_verses[verse - 1]))
+        return verses
+
+    def documents_for(self, references: List[ScriptureReference], max_verses: int = 60) -> List[Document]:
+        """
+        Resolves references into Documents shaped like the ingested Bible chunks
+        (one per contiguous run within a chapter), so `format_docs` cites them as
+        `[Book Chapter:Verses]`.
+        """
+        documents = []
+        budget = max_verses
+        for ref in references:
+            verses = self._verses(ref)[:budget]
+            budget -= len(verses)
+
+            runs: List[List[Tuple[int, int, str]]] = []
+            for verse in verses:
+                if runs and runs[-1][-1][0] == verse[0] and runs[-1][-1][1] == verse[1] - 1:
+                    runs[-1].append(verse)
+                else:
+                    runs.append([verse])
+
+            book_name = self.names[ref.book_index]
+            for run in runs:
+                chapter, start_verse = run[0][0], run[0][1]
+                end_verse = run[-1][1]
+                verses_ref = f"{start_verse}-{end_verse}" if start_verse != end_verse else f"{start_verse}"
+                content = f"[{book_name} {chapter}:{verses_ref}]\n"
+                content += "".join(f"{v}. {text}\n" for _, v, text in run)
+                documents.append(Document(
+                    page_content=content,
+                    metadata={
+                        "source": self.source,
+                        "book": book_name,
+                        "chapter": chapter,
+                        "verses": verses_ref,
+                        "type": "scripture",
+                    },
+                ))
+            if budget <= 0:
+                break
+        return documents
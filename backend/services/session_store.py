@@ -0,0 +1,358 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+# Same class langchain_community re-exports as ChatMessageHistory, without importing all of community
+from langchain_core.chat_history import InMemoryChatMessageHistory as ChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from backend.core.config import settings
+
+
+def message_bytes(message: BaseMessage) -> int:
+    return len(str(message.content).encode("utf-8"))
+
+
+@dataclass
+class SessionEntry:
+    history: ChatMessageHistory
+    last_access: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+    # Rolling summary of the oldest `summary_covers` messages (see HistoryCompactor)
+    summary: str = ""
+    summary_covers: int = 0
+
+
+class SessionStore(ABC):
+    """Backend for per-session chat history."""
+
+    @abstractmethod
+    def get_history(self, session_id: str) -> ChatMessageHistory:
+        ...
+
+    @abstractmethod
+    def append_turn(self, session_id: str, user_message: str, ai_message: str) -> None:
+        ...
+
+    @abstractmethod
+    def get_summary(self, session_id: str) -> Tuple[str, int]:
+        """Returns (summary, number of leading messages it covers)."""
+
+    @abstractmethod
+    def set_summary(self, session_id: str, summary: str, covers: int) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, float]:
+        ...
+
+    def memory_stats(self) -> Dict[str, float]:
+        """Counters of the in-process tier only: cheap enough for every metrics scrape."""
+        return self.stats()
+
+    # Async variants for the request path; backends that do I/O run it off the event loop
+    async def aget_history(self, session_id: str) -> ChatMessageHistory:
+        return self.get_history(session_id)
+
+    async def aappend_turn(self, session_id: str, user_message: str, ai_message: str) -> None:
+        self.append_turn(session_id, user_message, ai_message)
+
+    async def aget_summary(self, session_id: str) -> Tuple[str, int]:
+        return self.get_summary(session_id)
+
+    async def aset_summary(self, session_id: str, summary: str, covers: int) -> None:
+        self.set_summary(session_id, summary, covers)
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local history with LRU + idle-TTL eviction and a byte budget.
+    Evicted sessions simply start over with an empty history.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: int = 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._sessions: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "ttl": 0, "bytes": 0}
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _drop(self, session_id: str, reason: str) -> None:
+        entry = self._sessions.pop(session_id)
+        self._bytes -= entry.size_bytes
+        self.evictions[reason] += 1
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        # Oldest-accessed first, so expired sessions sit at the front
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry.last_access <= self.ttl_seconds:
+                break
+            self._drop(session_id, "ttl")
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)), "lru")
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)), "bytes")
+
+    def put(self, session_id: str, history: ChatMessageHistory) -> None:
+        with self._lock:
+            if session_id in self._sessions:
+                self._bytes -= self._sessions.pop(session_id).size_bytes
+            size = sum(message_bytes(m) for m in history.messages)
+            self._sessions[session_id] = SessionEntry(history=history, size_bytes=size)
+            self._bytes += size
+            self._evict()
+
+    def peek(self, session_id: str) -> Optional[ChatMessageHistory]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            entry.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return entry.history
+
+    def get_history(self, session_id: str) -> ChatMessageHistory:
+        with self._lock:
+            history = self.peek(session_id)
+            if history is not None:
+                self.hits += 1
+                return history
+            self.misses += 1
+            history = ChatMessageHistory()
+            self.put(session_id, history)
+            return history
+
+    def append_turn(self, session_id: str, user_message: str, ai_message: str) -> None:
+        with self._lock:
+            history = self.get_history(session_id)
+            human, ai = HumanMessage(content=user_message), AIMessage(content=ai_message)
+            history.add_message(human)
+            history.add_message(ai)
+            entry = self._sessions.get(session_id)
+            if entry:
+                added = message_bytes(human) + message_bytes(ai)
+                entry.size_bytes += added
+                self._bytes += added
+            self._evict()
+
+    def get_summary(self, session_id: str) -> Tuple[str, int]:
+        entry = self._sessions.get(session_id)
+        return (entry.summary, entry.summary_covers) if entry else ("", 0)
+
+    def set_summary(self, session_id: str, summary: str, covers: int) -> None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            added = len(summary.encode("utf-8")) - len(entry.summary.encode("utf-8"))
+            entry.summary, entry.summary_covers = summary, covers
+            entry.size_bytes += added
+            self._bytes += added
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions_lru": self.evictions["lru"],
+            "evictions_ttl": self.evictions["ttl"],
+            "evictions_bytes": self.evictions["bytes"],
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Write-through store: hot sessions live in an InMemorySessionStore, every
+    turn is persisted to SQLite, and evicted sessions are reloaded from disk.
+
+    With `shared` (several worker processes on one database), SQLite is the
+    source of truth: a hot session is only served if its message count still
+    matches the disk, since another worker may have appended a turn.
+    """
+
+    def __init__(self, path: str, hot: InMemorySessionStore, retention_seconds: int = 30 * 24 * 3600,
+                 shared: bool = False):
+        self.hot = hot
+        self.retention_seconds = retention_seconds
+        self.shared = shared
+        self.disk_loads = 0
+        self.stale_reloads = 0
+        # Kept up to date on writes so stats() needs no full scan of the table
+        self.disk_sessions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Other workers may hold the write lock for a moment
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " session_id TEXT NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        # Index entries end with the rowid, so this also serves ORDER BY rowid within a session
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, covers INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        self.purge_expired()
+
+    def purge_expired(self) -> None:
+        with self._lock:
+            cutoff = time.time() - self.retention_seconds
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id IN ("
+                " SELECT session_id FROM messages GROUP BY session_id HAVING MAX(created_at) < ?)",
+                (cutoff,),
+            )
+            self._conn.execute("DELETE FROM summaries WHERE session_id NOT IN (SELECT session_id FROM messages)")
+            self._conn.commit()
+            self.disk_sessions = self._conn.execute(
+                "SELECT COUNT(DISTINCT session_id) FROM messages"
+            ).fetchone()[0]
+
+    def _load(self, session_id: str) -> ChatMessageHistory:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY rowid", (session_id,)
+            ).fetchall()
+        history = ChatMessageHistory()
+        for role, content in rows:
+            history.add_message(HumanMessage(content=content) if role == "human" else AIMessage(content=content))
+        return history
+
+    def _load_summary(self, session_id: str) -> Tuple[str, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, covers FROM summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def _disk_length(self, session_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def get_history(self, session_id: str) -> ChatMessageHistory:
+        history = self.hot.peek(session_id)
+        if history is not None and self.shared and self._disk_length(session_id) != len(history.messages):
+            self.stale_reloads += 1
+            history = None
+        if history is not None:
+            self.hot.hits += 1
+            return history
+        self.hot.misses += 1
+        history = self._load(session_id)
+        if history.messages:
+            self.disk_loads += 1
+        self.hot.put(session_id, history)
+        summary, covers = self._load_summary(session_id)
+        if covers:
+            self.hot.set_summary(session_id, summary, covers)
+        return history
+
+    def append_turn(self, session_id: str, user_message: str, ai_message: str) -> None:
+        now = time.time()
+        with self._lock:
+            is_new = self._conn.execute(
+                "SELECT 1 FROM messages WHERE session_id = ? LIMIT 1", (session_id,)
+            ).fetchone() is None
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [(session_id, "human", user_message, now), (session_id, "ai", ai_message, now)],
+            )
+            self._conn.commit()
+            if is_new:
+                self.disk_sessions += 1
+        if session_id not in self.hot:
+            # Warm the hot tier from disk (which already includes this turn)
+            self.get_history(session_id)
+        else:
+            self.hot.append_turn(session_id, user_message, ai_message)
+
+    def get_summary(self, session_id: str) -> Tuple[str, int]:
+        if session_id in self.hot and not self.shared:
+            return self.hot.get_summary(session_id)
+        return self._load_summary(session_id)
+
+    def set_summary(self, session_id: str, summary: str, covers: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (session_id, summary, covers) VALUES (?, ?, ?)",
+                (session_id, summary, covers),
+            )
+            self._conn.commit()
+        self.hot.set_summary(session_id, summary, covers)
+
+    async def aget_history(self, session_id: str) -> ChatMessageHistory:
+        if not self.shared:
+            # A hot session needs no disk check when this process is the only writer
+            history = self.hot.peek(session_id)
+            if history is not None:
+                self.hot.hits += 1
+                return history
+        return await asyncio.to_thread(self.get_history, session_id)
+
+    async def aappend_turn(self, session_id: str, user_message: str, ai_message: str) -> None:
+        await asyncio.to_thread(self.append_turn, session_id, user_message, ai_message)
+
+    async def aget_summary(self, session_id: str) -> Tuple[str, int]:
+        if session_id in self.hot and not self.shared:
+            return self.hot.get_summary(session_id)
+        return await asyncio.to_thread(self._load_summary, session_id)
+
+    async def aset_summary(self, session_id: str, summary: str, covers: int) -> None:
+        await asyncio.to_thread(self.set_summary, session_id, summary, covers)
+
+    def memory_stats(self) -> Dict[str, float]:
+        return self.hot.stats()
+
+    def stats(self) -> Dict[str, float]:
+        stats = self.hot.stats()
+        # Sessions on disk at startup plus those this process started since (with `shared`,
+        # sessions begun by other workers show up after their restart)
+        stats["disk_sessions"] = self.disk_sessions
+        stats["disk_loads"] = self.disk_loads
+        stats["stale_reloads"] = self.stale_reloads
+        return stats
+
+
+def build_session_store() -> SessionStore:
+    hot = InMemorySessionStore(
+        max_sessions=settings.SESSION_MAX_SESSIONS,
+        ttl_seconds=settings.SESSION_TTL_SECONDS,
+        max_bytes=settings.SESSION_MAX_BYTES,
+    )
+    if settings.SESSION_STORE_BACKEND == "sqlite":
+        return SQLiteSessionStore(
+            settings.SESSION_DB_PATH,
+            hot,
+            retention_seconds=settings.SESSION_RETENTION_SECONDS,
+            shared=settings.WEB_CONCURRENCY > 1,
+        )
+    if settings.WEB_CONCURRENCY > 1:
+        print("Warning: SESSION_STORE_BACKEND=memory with several workers; a session's turns are split across them.")
+    return hot
@@ -0,0 +1,106 @@
+import asyncio
+import re
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+from backend.core.text import fold
+
+
+def normalize_query(query: str) -> str:
+    """Case/accent/whitespace-insensitive form used as the coalescing key."""
+    return re.sub(r"\s+", " ", fold(query)).strip(" ?!.,;:")
+
+
+class Flight:
+    """One upstream generation and the events it produced so far."""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.events: List[dict] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        # Wake everyone waiting on the current event and arm a fresh one
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight requests: the first caller for a key starts the
+    upstream generation, later callers subscribe to the same broadcast. Late
+    joiners replay the events produced so far, then follow live.
+
+    The upstream runs in its own task, so one subscriber disconnecting does not
+    affect the others; it is cancelled only when the last subscriber leaves.
+    Finished flights are forgotten (the answer cache covers repeats after that).
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.replayed_events = 0
+        self.cancelled = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def subscribe(self, key: Hashable, factory: Callable[[], AsyncIterator[dict]]) -> AsyncIterator[dict]:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(key)
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(flight, factory()))
+            self.leaders += 1
+        else:
+            self.followers += 1
+            self.replayed_events += len(flight.events)
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(flight.events):
+                    yield flight.events[index]
+                    index += 1
+                if flight.done:
+                    if flight.error:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening anymore: stop paying for the generation
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+                self.cancelled += 1
+
+    async def _run(self, flight: Flight, events: AsyncIterator[dict]) -> None:
+        try:
+            async for event in events:
+                flight.events.append(event)
+                flight._notify()
+        except Exception as e:
+            flight.error = e
+        finally:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.done = True
+            flight._notify()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._flights),
+            "generations": self.leaders,
+            "coalesced_requests": self.followers,
+            "coalesced_ratio": self.followers / total if total else 0.0,
+            "replayed_events": self.replayed_events,
+            "cancelled_generations": self.cancelled,
+        }
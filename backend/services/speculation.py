@@ -0,0 +1,86 @@
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.core.text import fold, tokenize
+
+# Words that usually point back into the conversation ("ele", "isso", "e sobre...")
+ANAPHORA = {
+    "ele", "ela", "eles", "elas", "dele", "dela", "deles", "delas", "nele", "nela", "lhe", "lhes",
+    "isso", "isto", "aquilo", "disso", "disto", "nisso", "nisto", "daquilo",
+    "esse", "essa", "esses", "essas", "este", "estes", "desse", "dessa", "deste",
+    "desta", "nesse", "nessa", "neste", "nesta", "aquele", "aquela", "daquele", "daquela",
+    "mesmo", "mesma", "anterior", "acima", "outro", "outra", "tambem", "entao", "continue",
+    "continua", "resuma", "detalhe", "seu", "sua", "seus", "suas",
+}
+FOLLOW_UP_OPENERS = ("e ", "mas ", "entao ", "e se ", "e quanto", "e sobre", "por que nao")
+
+
+def jaccard(a: str, b: str) -> float:
+    tokens_a, tokens_b = set(tokenize(a)), set(tokenize(b))
+    if not tokens_a and not tokens_b:
+        return 1.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def cosine(a: List[float], b: List[float]) -> float:
+    va, vb = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    denominator = float(np.linalg.norm(va) * np.linalg.norm(vb))
+    return float(va @ vb) / denominator if denominator else 0.0
+
+
+class SpeculationController:
+    """
+    Decides when reformulation can be skipped or overlapped with retrieval,
+    and keeps the hit-rate / time-saved counters for the speculative path.
+    """
+
+    def __init__(self, lexical_threshold: float = 0.8, embedding_threshold: float = 0.9, min_words: int = 4):
+        self.lexical_threshold = lexical_threshold
+        self.embedding_threshold = embedding_threshold
+        self.min_words = min_words
+
+        self.skipped_reformulations = 0
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.ttft_saved_ms = 0.0
+
+    def needs_reformulation(self, query: str) -> bool:
+        """Cheap classifier: short or anaphoric follow-ups need the history, self-contained questions do not."""
+        folded = fold(query).strip()
+        words = re.findall(r"[a-z0-9]+", folded)
+        if len(words) < self.min_words:
+            return True
+        if folded.startswith(FOLLOW_UP_OPENERS):
+            return True
+        return any(word in ANAPHORA for word in words)
+
+    def is_close(self, raw_query: str, standalone_query: str,
+                 raw_embedding: Optional[List[float]] = None,
+                 standalone_embedding: Optional[List[float]] = None) -> bool:
+        if jaccard(raw_query, standalone_query) >= self.lexical_threshold:
+            return True
+        if raw_embedding is not None and standalone_embedding is not None:
+            return cosine(raw_embedding, standalone_embedding) >= self.embedding_threshold
+        return False
+
+    def record(self, hit: bool, saved_ms: float = 0.0) -> None:
+        self.attempts += 1
+        if hit:
+            self.hits += 1
+            self.ttft_saved_ms += saved_ms
+        else:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "skipped_reformulations": self.skipped_reformulations,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+            "ttft_saved_ms_total": self.ttft_saved_ms,
+            "ttft_saved_ms_avg": self.ttft_saved_ms / self.hits if self.hits else 0.0,
+        }
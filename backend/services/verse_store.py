@@ -0,0 +1,228 @@
+import json
+import mmap
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.core.text import estimate_tokens
+
+_VERSE_RANGE = re.compile(r"^\s*(\d+)(?:\s*-\s*(\d+))?\s*$")
+# A verse ending like this closes a sentence; anything else (",", ";", ":") runs on
+_SENTENCE_END = re.compile(r"[.!?][\"'”’)]*\s*$")
+
+
+class VerseStore:
+    """
+    Every verse of the structured Bible in one contiguous UTF-8 buffer plus
+    offset arrays, so (book, chapter, verse) -> text is two array lookups and a
+    slice, with no per-verse Python objects.
+
+    Layout of the store directory:
+    - text.bin: the verse texts back to back, in canonical order
+    - offsets.npy: byte offset of every verse in text.bin (one extra at the end)
+    - chapters.npy: index of the first verse of every chapter (one extra at the end)
+    - books.npy: index of the first chapter of every book (one extra at the end)
+    - meta.json: book names and source label
+
+    Files are memory-mapped read-only, so workers share the pages through the OS page cache.
+    """
+
+    def __init__(
+        self,
+        buffer,
+        offsets: np.ndarray,
+        chapters: np.ndarray,
+        books: np.ndarray,
+        names: List[str],
+        source: str = "Bible (ACF)",
+        path: Optional[str] = None,
+    ):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.chapters = chapters
+        self.books = books
+        self.names = names
+        self.source = source
+        self.path = path
+        self._book_ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+
+        self.expansions = 0
+        self.verses_added = 0
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    # --- Build / persist ---
+    @classmethod
+    def build(cls, books: List[dict], source: str = "Bible (ACF)") -> "VerseStore":
+        """From the bible_data.json structure: [{"name", "chapters": [[verse, ...], ...]}]."""
+        encoded: List[bytes] = []
+        chapter_starts = [0]
+        book_starts = [0]
+        for book in books:
+            for chapter_verses in book.get("chapters", []):
+                encoded.extend(text.encode("utf-8") for text in chapter_verses)
+                chapter_starts.append(len(encoded))
+            book_starts.append(len(chapter_starts) - 1)
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        return cls(
+            b"".join(encoded),
+            offsets,
+            np.asarray(chapter_starts, dtype=np.int32),
+            np.asarray(book_starts, dtype=np.int32),
+            [book.get("name") for book in books],
+            source,
+        )
+
+    @classmethod
+    def from_json(cls, json_path: str) -> "VerseStore":
+        with open(json_path, "r", encoding="utf-8-sig") as f:
+            return cls.build(json.load(f))
+
+    def save(self, path: str) -> None:
+        """Writes to a sibling directory and swaps it in, so readers never see a partial store."""
+        # Per-process temp name: several workers may build the store on first start
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        with open(os.path.join(tmp_path, "text.bin"), "wb") as f:
+            f.write(self.buffer)
+        np.save(os.path.join(tmp_path, "offsets.npy"), np.asarray(self.offsets))
+        np.save(os.path.join(tmp_path, "chapters.npy"), np.asarray(self.chapters))
+        np.save(os.path.join(tmp_path, "books.npy"), np.asarray(self.books))
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"names": self.names, "source": self.source, "verses": len(self)}, f, ensure_ascii=False)
+
+        old_path = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> "VerseStore":
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "text.bin"), "rb") as f:
+            # An empty file cannot be mapped
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        return cls(
+            buffer,
+            np.load(os.path.join(path, "offsets.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "chapters.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "books.npy"), mmap_mode="r"),
+            meta["names"],
+            meta.get("source", "Bible (ACF)"),
+            path,
+        )
+
+    # --- Lookup (O(1)) ---
+    def book_index(self, name: str) -> Optional[int]:
+        return self._book_ids.get(name)
+
+    def chapter_count(self, book: int) -> int:
+        return int(self.books[book + 1] - self.books[book])
+
+    def verse_count(self, book: int, chapter: int) -> int:
+        if not 1 <= chapter <= self.chapter_count(book):
+            return 0
+        chapter_id = int(self.books[book]) + chapter - 1
+        return int(self.chapters[chapter_id + 1] - self.chapters[chapter_id])
+
+    def _verse_id(self, book: int, chapter: int, verse: int) -> Optional[int]:
+        if not 1 <= verse <= self.verse_count(book, chapter):
+            return None
+        return int(self.chapters[int(self.books[book]) + chapter - 1]) + verse - 1
+
+    def verse(self, book: int, chapter: int, verse: int) -> Optional[str]:
+        verse_id = self._verse_id(book, chapter, verse)
+        if verse_id is None:
+            return None
+        return self.buffer[int(self.offsets[verse_id]):int(self.offsets[verse_id + 1])].decode("utf-8")
+
+    def verses(self, book: int, chapter: int, start: int, end: int) -> List[Tuple[int, str]]:
+        """(verse number, text) for start..end, clipped to the chapter."""
+        last = min(end, self.verse_count(book, chapter))
+        return [(number, self.verse(book, chapter, number)) for number in range(max(start, 1), last + 1)]
+
+    def document(self, book: int, chapter: int, start: int, end: int, metadata: Optional[dict] = None) -> Document:
+        """A chunk shaped like the ingested ones ("[Book C:a-b]" + numbered verse lines)."""
+        verses_ref = f"{start}-{end}" if start != end else f"{start}"
+        content = f"[{self.names[book]} {chapter}:{verses_ref}]\n"
+        content += "".join(f"{number}. {text}\n" for number, text in self.verses(book, chapter, start, end))
+        base = metadata or {"source": self.source, "book": self.names[book], "chapter": chapter, "type": "scripture"}
+        return Document(page_content=content, metadata={**base, "verses": verses_ref})
+
+    # --- Neighbor expansion ---
+    def expand(self, doc: Document, radius: int = 2, max_tokens: int = 300) -> Document:
+        """
+        Grows a scripture chunk by up to `radius` verses on each side, then on to
+        the end of the sentence it cuts into, while the chunk stays within
+        `max_tokens`. Other documents (and unknown references) come back unchanged.
+        """
+        meta = doc.metadata
+        book = self.book_index(meta.get("book")) if meta.get("type") == "scripture" else None
+        match = _VERSE_RANGE.match(str(meta.get("verses", "")))
+        if book is None or not match:
+            return doc
+        try:
+            chapter = int(meta.get("chapter"))
+        except (TypeError, ValueError):
+            return doc
+        count = self.verse_count(book, chapter)
+        start = int(match.group(1))
+        end = min(int(match.group(2) or start), count)
+        if not 1 <= start <= end:
+            return doc
+
+        tokens = estimate_tokens(doc.page_content)
+
+        def cost(number: int) -> int:
+            return estimate_tokens(f"{number}. {self.verse(book, chapter, number)}\n")
+
+        first, last = start, end
+        # Alternate sides so the original chunk stays centered when the budget runs out
+        for _ in range(radius):
+            grew = False
+            if first > 1 and tokens + cost(first - 1) <= max_tokens:
+                first -= 1
+                tokens += cost(first)
+                grew = True
+            if last < count and tokens + cost(last + 1) <= max_tokens:
+                last += 1
+                tokens += cost(last)
+                grew = True
+            if not grew:
+                break
+
+        # Snap to sentence boundaries (the passage starts after a full stop and ends on one)
+        while first > 1 and not _SENTENCE_END.search(self.verse(book, chapter, first - 1)) \
+                and tokens + cost(first - 1) <= max_tokens:
+            first -= 1
+            tokens += cost(first)
+        while last < count and not _SENTENCE_END.search(self.verse(book, chapter, last)) \
+                and tokens + cost(last + 1) <= max_tokens:
+            last += 1
+            tokens += cost(last)
+
+        if (first, last) == (start, end):
+            return doc
+        self.expansions += 1
+        self.verses_added += (start - first) + (last - end)
+        return self.document(book, chapter, first, last, metadata=meta)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "verses": len(self),
+            "bytes": len(self.buffer),
+            "mmap": isinstance(self.buffer, mmap.mmap),
+            "expansions": self.expansions,
+            "verses_added": self.verses_added,
+        }
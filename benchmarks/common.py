@@ -0,0 +1,90 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentiles(samples: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles plus mean/max, in the samples' unit."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    summary = {f"p{p}": ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] for p in points}
+    summary["mean"] = sum(ordered) / len(ordered)
+    summary["max"] = ordered[-1]
+    return {name: round(value, 3) for name, value in summary.items()}
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def save_results(name: str, results: dict, path: Optional[str] = None) -> str:
+    """Writes results plus run metadata as JSON (benchmarks/results/<name>-<timestamp>.json by default)."""
+    payload = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved to {path}")
+    return path
+
+
+def _flatten(data: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare_results(baseline_path: str, current: dict, tolerance: float = 0.10) -> List[str]:
+    """
+    Prints metric deltas against a saved run and returns the regressions: latency-like
+    metrics (*_ms, p50/p95/p99, lag) that grew, or throughput (*per_second, rps) that
+    shrank, by more than `tolerance`.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = _flatten(json.load(f)["results"])
+    current_flat = _flatten(current)
+
+    regressions = []
+    print(f"\n📊 Compared with {baseline_path} (tolerance {tolerance:.0%})")
+    for name in sorted(set(baseline) & set(current_flat)):
+        if name.startswith("config."):
+            continue
+        before, after = baseline[name], current_flat[name]
+        if before == 0:
+            continue
+        delta = (after - before) / before
+        higher_is_better = name.endswith("per_second") or name.endswith("rps")
+        lower_is_better = any(marker in name for marker in ("_ms", "p50", "p95", "p99", "lag", "mean", "max"))
+        regressed = (higher_is_better and delta < -tolerance) or (
+            lower_is_better and not higher_is_better and delta > tolerance
+        )
+        flag = "  ❌" if regressed else ""
+        print(f"   {name:<48} {before:>12.3f} -> {after:>12.3f} ({delta:+.1%}){flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
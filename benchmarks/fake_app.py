@@ -0,0 +1,84 @@
+"""
+Gunicorn entry point for the worker sweep: the real API with the local stand-ins
+from benchmarks/fakes.py injected, and the real pre-fork preload.
+
+    gunicorn -c backend/gunicorn.conf.py benchmarks.fake_app:app
+
+The index files must exist first (prepare_data(), which worker_sweep.py runs);
+BENCH_RANKER=flashrank preloads the real ONNX reranker instead of the fake one.
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import backend.main as api  # noqa: E402
+from backend.core.config import settings  # noqa: E402
+from benchmarks.fakes import FakeRanker, FakeStreamingChatModel, HashingEmbeddings, synthetic_bible  # noqa: E402
+
+EMBEDDING_MODEL = "hashing-256"
+
+
+def prepare_data() -> None:
+    """Writes the BM25 index, the local vector index and the verse store where settings point."""
+    from backend.data_ingestion.loaders import load_bible_structured
+    from backend.services.lexical_index import BM25Index
+    from backend.services.local_vector_index import LocalVectorIndex
+    from backend.services.verse_store import VerseStore
+
+    bible_path = os.path.join(settings.SOURCE_DOCS_PATH, "bible_data.json")
+    if not os.path.exists(bible_path):
+        os.makedirs(settings.SOURCE_DOCS_PATH, exist_ok=True)
+        with open(bible_path, "w", encoding="utf-8") as f:
+            json.dump(synthetic_bible(books=66, chapters=20, verses=25), f, ensure_ascii=False)
+
+    documents = load_bible_structured(bible_path)
+    lexical = BM25Index()
+    lexical.add_documents(documents)
+    lexical.save(settings.LEXICAL_INDEX_PATH)
+
+    embeddings = HashingEmbeddings(model=EMBEDDING_MODEL)
+    LocalVectorIndex.build(
+        embeddings.embed_documents([doc.page_content for doc in documents]),
+        [f"doc-{i}" for i in range(len(documents))],
+        [doc.page_content for doc in documents],
+        [doc.metadata for doc in documents],
+        model=EMBEDDING_MODEL,
+    ).save(settings.LOCAL_VECTOR_INDEX_PATH)
+    VerseStore.from_json(bible_path).save(settings.VERSE_STORE_PATH)
+
+
+def preload_shared_state():
+    from backend.services.preload import preload
+
+    if os.getenv("BENCH_RANKER", "fake") == "flashrank":
+        return preload()
+    return preload(ranker=FakeRanker(), first_stage_ranker=FakeRanker(seconds_per_passage=0.0005 / 6))
+
+
+def build_rag_service():
+    import chromadb
+
+    from backend.services.preload import preloaded
+    from backend.services.rag_service import RAGService
+
+    # Scripture comes from the preloaded local index; the (empty) Chroma only serves the other chunks
+    chroma_client = chromadb.EphemeralClient()
+    chroma_client.get_or_create_collection("scripture_corpus")
+    llm = FakeStreamingChatModel(
+        answer_tokens=int(os.getenv("BENCH_ANSWER_TOKENS", 200)),
+        tokens_per_second=float(os.getenv("BENCH_TOKENS_PER_SECOND", 80)),
+        first_token_latency=float(os.getenv("BENCH_FIRST_TOKEN_MS", 300)) / 1000,
+    )
+    return RAGService(
+        llm=llm,
+        embeddings=HashingEmbeddings(model=EMBEDDING_MODEL),
+        chroma_client=chroma_client,
+        preloaded=preloaded(),
+    )
+
+
+api.preload_shared_state = preload_shared_state
+api.build_rag_service = build_rag_service
+app = api.app
@@ -0,0 +1,196 @@
+"""
+Local stand-ins for the paid/remote components, so the benchmarks measure our
+code and not Gemini quota or network:
+
+- FakeStreamingChatModel: deterministic answer streamed at a fixed token rate
+- HashingEmbeddings: hashed bag of words, normalized (no provider calls)
+- FakeRanker: token-overlap scores with FlashRank's rerank() interface
+- build_ephemeral_chroma: in-process Chroma seeded with the Bible (or a synthetic corpus)
+- FlakyCollection: async query() over it with injected latency, stalls and errors
+"""
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORDS = (
+    "graça fé amor esperança justiça perdão salvação reino oração sabedoria "
+    "Deus Senhor Cristo Espírito povo coração vida verdade caminho luz"
+).split()
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Answers with `answer_tokens` words derived from the prompt, `tokens_per_second` at a time."""
+
+    answer_tokens: int = 200
+    tokens_per_second: float = 80.0
+    first_token_latency: float = 0.3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        # Same prompt, same answer: keeps runs comparable
+        seed = hashlib.sha1(str(messages[-1].content).encode("utf-8")).hexdigest()
+        rng = random.Random(seed)
+        return [rng.choice(WORDS) + " " for _ in range(self.answer_tokens)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep(self.first_token_latency + len(tokens) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_latency)
+        for token in self._tokens(messages):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            time.sleep(1 / self.tokens_per_second)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_latency)
+        for token in self._tokens(messages):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(1 / self.tokens_per_second)
+
+
+class HashingEmbeddings(Embeddings):
+    """Feature-hashed bag of words, L2-normalized, so similar texts land close together."""
+
+    def __init__(self, dim: int = 256, model: str = "hashing-256"):
+        self.dim = dim
+        self.model = model
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in TOKEN.findall(text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class FakeRanker:
+    """FlashRank-compatible rerank(): token overlap with the query plus a fixed per-passage cost."""
+
+    def __init__(self, seconds_per_passage: float = 0.0005):
+        self.seconds_per_passage = seconds_per_passage
+
+    def rerank(self, request) -> List[Dict[str, Any]]:
+        query_tokens = set(TOKEN.findall(request.query.lower()))
+        results = []
+        for passage in request.passages:
+            tokens = set(TOKEN.findall(passage["text"].lower()))
+            score = len(query_tokens & tokens) / (len(query_tokens) or 1)
+            results.append({**passage, "score": score})
+        time.sleep(self.seconds_per_passage * len(request.passages))
+        return sorted(results, key=lambda r: r["score"], reverse=True)
+
+
+def synthetic_bible(books: int = 10, chapters: int = 20, verses: int = 25, seed: int = 7) -> List[dict]:
+    """Same shape as source_docs/bible_data.json: [{"name", "chapters": [[verse, ...], ...]}]."""
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"Livro{b + 1}",
+            "chapters": [
+                [" ".join(rng.choice(WORDS) for _ in range(18)) for _ in range(verses)]
+                for _ in range(chapters)
+            ],
+        }
+        for b in range(books)
+    ]
+
+
+def load_corpus(source_docs: str = "source_docs", limit: int = 0) -> List[Document]:
+    """The structured Bible chunks when bible_data.json is present, otherwise a synthetic Bible."""
+    from backend.data_ingestion.loaders import load_bible_structured
+
+    bible_path = os.path.join(source_docs, "bible_data.json")
+    if os.path.exists(bible_path):
+        documents = load_bible_structured(bible_path)
+    else:
+        import json
+        import tempfile
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+            json.dump(synthetic_bible(), f, ensure_ascii=False)
+        try:
+            documents = load_bible_structured(f.name)
+        finally:
+            os.remove(f.name)
+    return documents[:limit] if limit else documents
+
+
+def build_ephemeral_chroma(documents: List[Document], embeddings: Embeddings, batch_size: int = 500):
+    """In-process Chroma with the `scripture_corpus` collection the service expects."""
+    import chromadb
+
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection("scripture_corpus")
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        collection.add(
+            ids=[f"doc-{start + i}" for i in range(len(batch))],
+            documents=[doc.page_content for doc in batch],
+            metadatas=[doc.metadata for doc in batch],
+            embeddings=embeddings.embed_documents([doc.page_content for doc in batch]),
+        )
+    return client
+
+
+class FlakyCollection:
+    """
+    Async stand-in for the remote Chroma collection (RAGService(async_collection=...)):
+    queries the in-process collection on a thread after `latency_ms`, and with the
+    given probabilities fails with a connection error or stalls for `stall_seconds`
+    (long enough to hit the client timeout). Exercises timeouts, retries, the
+    circuit breaker and the BM25 fallback without a real server.
+    """
+
+    def __init__(self, collection, latency_ms: float = 0.0, failure_rate: float = 0.0,
+                 stall_rate: float = 0.0, stall_seconds: float = 30.0, seed: int = 7):
+        self.collection = collection
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.rng = random.Random(seed)
+        self.queries = 0
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        self.queries += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        roll = self.rng.random()
+        if roll < self.failure_rate:
+            raise ConnectionError("injected Chroma failure")
+        if roll < self.failure_rate + self.stall_rate:
+            await asyncio.sleep(self.stall_seconds)
+        return await asyncio.to_thread(self.collection.query, **kwargs)
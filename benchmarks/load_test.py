@@ -0,0 +1,302 @@
+"""
+Offline load test of /chat: the real FastAPI app (SSE, single-flight, retrieval,
+reranking, packing) with the Gemini chat model, Gemini embeddings, remote Chroma
+and FlashRank replaced by the local stand-ins in benchmarks/fakes.py.
+
+    python benchmarks/load_test.py --clients 32 --requests 256 --tokens-per-second 80
+    python benchmarks/load_test.py --compare benchmarks/results/load_test-<previous>.json
+
+Reports throughput, time to first token, total latency (p50/p95/p99) and
+event-loop lag, and saves everything as JSON under benchmarks/results/.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+# Settings are read at import time: isolate the run from .env state and on-disk caches
+_TMP = tempfile.mkdtemp(prefix="rag-bench-")
+for _name, _value in {
+    "ANSWER_CACHE_ENABLED": "false",
+    "EMBEDDING_CACHE_ENABLED": "false",
+    "VECTOR_STORE_BACKEND": "chroma",
+    "SESSION_STORE_BACKEND": "memory",
+    "STARTUP_RETRIES": "1",
+    "WARMUP_QUERIES_PATH": "",
+    "LEXICAL_INDEX_PATH": os.path.join(_TMP, "bm25.json.gz"),
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from benchmarks.common import compare_results, percentiles, save_results  # noqa: E402
+
+# One line per request would drown the report
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+QUESTIONS = [
+    "O que a Bíblia diz sobre a graça?",
+    "Como devo orar?",
+    "O que é a fé segundo as Escrituras?",
+    "Qual o significado do perdão?",
+    "O que Jesus ensinou sobre o reino de Deus?",
+    "Como encontrar esperança no sofrimento?",
+    "O que é justiça para Deus?",
+    "Como viver pelo Espírito?",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_fake_service(args):
+    """Installed as backend.main.build_rag_service: same service, local components."""
+    from backend.services.lexical_index import BM25Index
+    from backend.services.rag_service import RAGService
+    from benchmarks.fakes import (
+        FakeRanker,
+        FlakyCollection,
+        FakeStreamingChatModel,
+        HashingEmbeddings,
+        build_ephemeral_chroma,
+        load_corpus,
+    )
+
+    documents = load_corpus(limit=args.corpus_limit)
+    embeddings = HashingEmbeddings()
+    lexical = BM25Index()
+    lexical.add_documents(documents)
+    lexical.save(os.environ["LEXICAL_INDEX_PATH"])
+
+    llm = FakeStreamingChatModel(
+        answer_tokens=args.answer_tokens,
+        tokens_per_second=args.tokens_per_second,
+        first_token_latency=args.first_token_ms / 1000,
+    )
+    print(f"Seeding ephemeral Chroma with {len(documents)} chunks...")
+    chroma_client = build_ephemeral_chroma(documents, embeddings)
+    return RAGService(
+        llm=llm,
+        embeddings=embeddings,
+        chroma_client=chroma_client,
+        async_collection=FlakyCollection(
+            chroma_client.get_collection("scripture_corpus"),
+            latency_ms=args.chroma_latency_ms,
+            failure_rate=args.chroma_failure_rate,
+            stall_rate=args.chroma_stall_rate,
+        ),
+        ranker=FakeRanker(seconds_per_passage=args.rerank_ms_per_passage / 1000),
+        # Only used with RERANK_CASCADE_ENABLED=true; L-2 has a sixth of the L-12 layers
+        first_stage_ranker=FakeRanker(seconds_per_passage=args.rerank_ms_per_passage / 6000),
+    )
+
+
+class LoopLagMonitor:
+    """Samples how late a periodic sleep wakes up: time the event loop was blocked."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples_ms = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples_ms.append(max(0.0, (loop.time() - expected) * 1000))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def chat_once(client, url: str, query: str, session_id: str) -> dict:
+    started = time.perf_counter()
+    first_token = None
+    content_chars = 0
+    frames = 0
+    status = "ok"
+    async with client.stream("POST", url, json={"query": query, "session_id": session_id}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return {"status": f"http_{response.status_code}", "latency_ms": (time.perf_counter() - started) * 1000}
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            frames += 1
+            event = json.loads(line[len("data: "):])
+            if event["type"] == "content":
+                if first_token is None:
+                    first_token = time.perf_counter()
+                content_chars += len(event["data"])
+            elif event["type"] == "error":
+                status = "error"
+    finished = time.perf_counter()
+    return {
+        "status": status,
+        "latency_ms": (finished - started) * 1000,
+        "ttft_ms": (first_token - started) * 1000 if first_token else None,
+        "frames": frames,
+        "chars": content_chars,
+    }
+
+
+async def run_load(args, base_url: str) -> dict:
+    import httpx
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        # Distinct questions defeat single-flight coalescing (worst case for the backend)
+        queue.put_nowait(f"{question} ({i})" if args.distinct else question)
+
+    samples = []
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        async def worker(worker_id: int):
+            turn = 0
+            while not queue.empty():
+                query = queue.get_nowait()
+                # --turns > 1 keeps each client on a session, exercising reformulation and history
+                session_id = f"bench-{worker_id}-{turn // args.turns}"
+                turn += 1
+                try:
+                    samples.append(await chat_once(client, f"{base_url}/chat", query, session_id))
+                except Exception as e:
+                    samples.append({"status": type(e).__name__, "latency_ms": 0.0})
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.clients)))
+        wall_seconds = time.perf_counter() - started
+        server_stats = (await client.get(f"{base_url}/stats")).json()
+
+    ok = [s for s in samples if s["status"] == "ok"]
+    errors = {}
+    for s in samples:
+        if s["status"] != "ok":
+            errors[s["status"]] = errors.get(s["status"], 0) + 1
+    return {
+        "requests": len(samples),
+        "completed": len(ok),
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "rps": round(len(ok) / wall_seconds, 3) if wall_seconds else 0.0,
+        "chars_per_second": round(sum(s["chars"] for s in ok) / wall_seconds, 1) if wall_seconds else 0.0,
+        "ttft_ms": percentiles([s["ttft_ms"] for s in ok if s["ttft_ms"] is not None]),
+        "latency_ms": percentiles([s["latency_ms"] for s in ok]),
+        "frames_per_request": round(sum(s["frames"] for s in ok) / len(ok), 1) if ok else 0.0,
+        "server": {
+            "streaming": server_stats.get("streaming", {}),
+            "single_flight": server_stats.get("single_flight", {}),
+            "reranker": server_stats.get("reranker", {}),
+            "rerank_cascade": server_stats.get("rerank_cascade", {}),
+            "vector_store": server_stats.get("vector_store", {}),
+            "query_router": server_stats.get("query_router", {}),
+        },
+    }
+
+
+async def main_async(args) -> dict:
+    import uvicorn
+
+    import backend.main as api
+
+    api.build_rag_service = lambda: build_fake_service(args)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+
+    # Same process and loop as the server: lag here is lag the API would see
+    monitor = LoopLagMonitor()
+    try:
+        started = time.perf_counter()
+        while not (server.started and api.warmup.ready and api.rag_service is not None):
+            if api.warmup_task is not None and api.warmup_task.done() and not api.warmup.ready:
+                raise SystemExit(f"❌ Warm-up failed: {api.warmup.report()['components']}")
+            if time.perf_counter() - started > args.startup_timeout:
+                raise SystemExit("❌ Service did not become ready in time.")
+            await asyncio.sleep(0.1)
+        print(f"Service ready in {time.perf_counter() - started:.1f}s, "
+              f"{args.clients} clients x {args.requests} requests...")
+
+        monitor.start()
+        results = await run_load(args, base_url)
+        await monitor.stop()
+        results["loop_lag_ms"] = percentiles(monitor.samples_ms)
+    finally:
+        server.should_exit = True
+        await server_task
+
+    results["config"] = {
+        "clients": args.clients,
+        "turns": args.turns,
+        "distinct": args.distinct,
+        "answer_tokens": args.answer_tokens,
+        "tokens_per_second": args.tokens_per_second,
+        "first_token_ms": args.first_token_ms,
+        "rerank_ms_per_passage": args.rerank_ms_per_passage,
+        "chroma_latency_ms": args.chroma_latency_ms,
+        "chroma_failure_rate": args.chroma_failure_rate,
+        "chroma_stall_rate": args.chroma_stall_rate,
+    }
+    return results
+
+
+def report(results: dict) -> None:
+    print(f"\n🚀 {results['completed']}/{results['requests']} requests in {results['wall_seconds']}s "
+          f"({results['rps']} req/s, {results['chars_per_second']} chars/s)")
+    if results["errors"]:
+        print(f"   errors: {results['errors']}")
+    for metric in ("ttft_ms", "latency_ms", "loop_lag_ms"):
+        values = results[metric]
+        if values:
+            print(f"   {metric:<12} p50 {values['p50']:>9.1f}  p95 {values['p95']:>9.1f}  "
+                  f"p99 {values['p99']:>9.1f}  max {values['max']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /chat load test with local stand-ins")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent SSE clients")
+    parser.add_argument("--requests", type=int, default=128, help="total /chat requests")
+    parser.add_argument("--turns", type=int, default=1, help="questions per session before a new one")
+    parser.add_argument("--distinct", action="store_true", help="make every question unique (no single-flight)")
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--rerank-ms-per-passage", type=float, default=0.5)
+    parser.add_argument("--chroma-latency-ms", type=float, default=0.0, help="added to every Chroma query")
+    parser.add_argument("--chroma-failure-rate", type=float, default=0.0, help="share of Chroma queries that error")
+    parser.add_argument("--chroma-stall-rate", type=float, default=0.0,
+                        help="share of Chroma queries that hang past CHROMA_TIMEOUT_SECONDS")
+    parser.add_argument("--corpus-limit", type=int, default=0, help="only index the first N chunks (0 = all)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/load_test-<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    report(results)
+    save_results("load_test", results, args.output)
+    if args.compare and compare_results(args.compare, results, args.tolerance):
+        raise SystemExit("❌ Regressions against the baseline run.")
+
+
+if __name__ == "__main__":
+    main()
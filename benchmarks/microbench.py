@@ -0,0 +1,130 @@
+"""
+Microbenchmarks of the hot helpers on the ingestion and answer paths:
+format_docs, load_bible_structured, split_documents and FlashRank reranking.
+
+    python benchmarks/microbench.py [--repeat 20] [--compare benchmarks/results/microbench-<previous>.json]
+
+Uses source_docs/bible_data.json when present, otherwise a synthetic Bible of the
+same shape. FlashRank is skipped (and reported as such) when it is not installed
+or its model cannot be downloaded.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import compare_results, percentiles, save_results  # noqa: E402
+from benchmarks.fakes import WORDS, synthetic_bible  # noqa: E402
+
+
+def bench(name: str, fn: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    result = {"repeat": repeat, "ms": percentiles(samples)}
+    print(f"   {name:<28} p50 {result['ms']['p50']:>9.3f} ms  p95 {result['ms']['p95']:>9.3f} ms")
+    return result
+
+
+def prose_documents(count: int, words: int, seed: int = 11):
+    from langchain_core.documents import Document
+
+    rng = random.Random(seed)
+    return [
+        Document(
+            page_content=" ".join(rng.choice(WORDS) for _ in range(words)),
+            metadata={"source": f"livro-{i}.pdf", "page": i},
+        )
+        for i in range(count)
+    ]
+
+
+def run(args) -> dict:
+    from backend.data_ingestion.loaders import load_bible_structured, split_documents
+    from backend.services.rag_service import format_docs
+
+    results = {}
+    bible_path = os.path.join(args.source_docs, "bible_data.json")
+    synthetic = not os.path.exists(bible_path)
+    if synthetic:
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+        json.dump(synthetic_bible(books=66, chapters=20, verses=25), tmp, ensure_ascii=False)
+        tmp.close()
+        bible_path = tmp.name
+    results["corpus"] = "synthetic" if synthetic else "bible_data.json"
+
+    def load_quietly():
+        # load_bible_structured prints progress on every call
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return load_bible_structured(bible_path)
+
+    try:
+        print(f"\n🔬 Microbenchmarks ({results['corpus']} corpus, {args.repeat} runs each)")
+        scripture = load_quietly()
+        results["load_bible_structured"] = bench("load_bible_structured", load_quietly, args.repeat)
+    finally:
+        if synthetic:
+            os.remove(bible_path)
+    results["load_bible_structured"]["chunks"] = len(scripture)
+
+    context = scripture[:args.context_docs]
+    results["format_docs"] = bench("format_docs", lambda: format_docs(context), args.repeat * 10)
+    results["format_docs"]["docs"] = len(context)
+
+    mixed = scripture + prose_documents(args.prose_docs, args.prose_words)
+    results["split_documents"] = bench("split_documents", lambda: split_documents(mixed), args.repeat)
+    results["split_documents"]["chunks"] = len(split_documents(mixed))
+
+    results["flashrank_rerank"] = bench_flashrank(scripture, args)
+    return results
+
+
+def bench_flashrank(scripture, args) -> dict:
+    try:
+        from flashrank import Ranker, RerankRequest
+
+        ranker = Ranker(model_name="ms-marco-MiniLM-L-12-v2")
+    except Exception as e:
+        print(f"   {'flashrank_rerank':<28} skipped ({e})")
+        return {"skipped": str(e)}
+
+    passages = [{"id": i, "text": doc.page_content, "meta": doc.metadata} for i, doc in enumerate(scripture[:args.rerank_passages])]
+    request = RerankRequest(query="O que a Bíblia diz sobre a graça e a fé?", passages=passages)
+    result = bench("flashrank_rerank", lambda: ranker.rerank(request), args.repeat)
+    result["passages"] = len(passages)
+    result["passages_per_second"] = round(len(passages) / (result["ms"]["p50"] / 1000), 1) if result["ms"]["p50"] else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the RAG helpers")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--source-docs", default="source_docs")
+    parser.add_argument("--context-docs", type=int, default=12, help="documents passed to format_docs")
+    parser.add_argument("--prose-docs", type=int, default=200, help="synthetic non-scripture documents to split")
+    parser.add_argument("--prose-words", type=int, default=600)
+    parser.add_argument("--rerank-passages", type=int, default=20, help="candidates per rerank (the retriever returns 20)")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/microbench-<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("microbench", results, args.output)
+    if args.compare and compare_results(args.compare, results, args.tolerance):
+        raise SystemExit("❌ Regressions against the baseline run.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Worker-count sweep of the multi-worker serving mode (backend/gunicorn.conf.py):
+starts gunicorn with 1, 2, 4... workers over benchmarks/fake_app.py, drives it
+with the load_test.py SSE clients and records throughput, latency and memory.
+
+    python benchmarks/worker_sweep.py --workers 1 2 4 --clients 32 --requests 256 [--ranker flashrank]
+
+Memory is read from /proc (Linux): RSS counts shared pages once per process,
+PSS splits them between the processes sharing them, so total PSS is what the
+container actually pays and shows how much the pre-fork preload saves.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+_DATA = tempfile.mkdtemp(prefix="rag-sweep-")
+for _name, _value in {
+    "ANSWER_CACHE_ENABLED": "false",
+    "EMBEDDING_CACHE_ENABLED": "false",
+    "EMBEDDING_MODEL_NAME": "hashing-256",
+    "VECTOR_STORE_BACKEND": "local",
+    "SESSION_STORE_BACKEND": "sqlite",
+    "SESSION_DB_PATH": os.path.join(_DATA, "sessions.sqlite"),
+    "STARTUP_RETRIES": "1",
+    "WARMUP_QUERIES_PATH": "",
+    "SOURCE_DOCS_PATH": os.path.join(ROOT, "source_docs")
+    if os.path.exists(os.path.join(ROOT, "source_docs", "bible_data.json"))
+    else os.path.join(_DATA, "source_docs"),
+    "LEXICAL_INDEX_PATH": os.path.join(_DATA, "bm25.json.gz"),
+    "LOCAL_VECTOR_INDEX_PATH": os.path.join(_DATA, "scripture_vectors"),
+    "VERSE_STORE_PATH": os.path.join(_DATA, "verse_store"),
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from benchmarks.common import compare_results, save_results  # noqa: E402
+from benchmarks.load_test import free_port, run_load  # noqa: E402
+
+
+def process_memory(pid: int) -> dict:
+    """RSS/PSS (MB) of one process, from smaps_rollup when the kernel has it."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Shared_Dirty:"):
+                    fields[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    except OSError:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    fields["rss"] = int(line.split()[1]) / 1024
+    shared = fields.pop("shared_clean", 0.0) + fields.pop("shared_dirty", 0.0)
+    if "pss" in fields:
+        fields["shared"] = shared
+    return {name: round(value, 1) for name, value in fields.items()}
+
+
+def child_pids(parent: int) -> list:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; the ppid follows the closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            children.append(int(entry))
+    return children
+
+
+def wait_until_ready(base_url: str, workers: int, timeout: float) -> float:
+    import httpx
+
+    started = time.perf_counter()
+    streak = 0
+    # Requests land on random workers: ask often enough that every one of them has answered 200
+    while streak < workers * 4:
+        if time.perf_counter() - started > timeout:
+            raise SystemExit("❌ Workers did not become ready in time.")
+        try:
+            response = httpx.get(f"{base_url}/ready", timeout=2)
+        except httpx.HTTPError:
+            response = None
+        ready = response is not None and response.status_code == 200
+        if response is not None and not ready:
+            failed = {
+                name: state["error"] for name, state in response.json()["components"].items()
+                if state["status"] == "failed" and state["required"]
+            }
+            if failed:
+                raise SystemExit(f"❌ Warm-up failed: {failed}")
+        streak = streak + 1 if ready else 0
+        time.sleep(0.05 if ready else 0.25)
+    return time.perf_counter() - started
+
+
+def run_workers(count: int, args) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(count),
+        "BIND": f"127.0.0.1:{port}",
+        "BENCH_RANKER": args.ranker,
+        "BENCH_ANSWER_TOKENS": str(args.answer_tokens),
+        "BENCH_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "BENCH_FIRST_TOKEN_MS": str(args.first_token_ms),
+        "PYTHONPATH": ROOT,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn.conf.py", "benchmarks.fake_app:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        startup_seconds = wait_until_ready(base_url, count, args.startup_timeout)
+        idle = {pid: process_memory(pid) for pid in [server.pid] + child_pids(server.pid)}
+        print(f"\n👷 {count} worker(s) ready in {startup_seconds:.1f}s, running {args.requests} requests...")
+        load = asyncio.run(run_load(args, base_url))
+        loaded = {pid: process_memory(pid) for pid in [server.pid] + child_pids(server.pid)}
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    workers = [memory for pid, memory in loaded.items() if pid != server.pid]
+
+    def total(snapshot: dict, field: str) -> float:
+        return round(sum(memory.get(field, 0.0) for memory in snapshot.values()), 1)
+
+    return {
+        "workers": count,
+        "startup_seconds": round(startup_seconds, 2),
+        "rps": load["rps"],
+        "chars_per_second": load["chars_per_second"],
+        "ttft_ms": load["ttft_ms"],
+        "latency_ms": load["latency_ms"],
+        "errors": load["errors"],
+        "memory_mb": {
+            "idle_rss": total(idle, "rss"),
+            "idle_pss": total(idle, "pss"),
+            "rss": total(loaded, "rss"),
+            "pss": total(loaded, "pss"),
+            "master_rss": loaded.get(server.pid, {}).get("rss", 0.0),
+            "per_worker_rss": round(sum(w.get("rss", 0.0) for w in workers) / len(workers), 1) if workers else 0.0,
+            "per_worker_pss": round(sum(w.get("pss", 0.0) for w in workers) / len(workers), 1) if workers else 0.0,
+            "per_worker_shared": round(sum(w.get("shared", 0.0) for w in workers) / len(workers), 1) if workers else 0.0,
+        },
+    }
+
+
+def report(runs: list) -> None:
+    print(f"\n{'workers':>7} {'req/s':>8} {'ttft p50':>9} {'ttft p95':>9} {'lat p95':>9} "
+          f"{'RSS MB':>8} {'PSS MB':>8} {'PSS/worker':>10} {'shared/worker':>13}")
+    for run in runs:
+        memory = run["memory_mb"]
+        print(f"{run['workers']:>7} {run['rps']:>8.2f} {run['ttft_ms'].get('p50', 0):>9.0f} "
+              f"{run['ttft_ms'].get('p95', 0):>9.0f} {run['latency_ms'].get('p95', 0):>9.0f} "
+              f"{memory['rss']:>8.0f} {memory['pss']:>8.0f} {memory['per_worker_pss']:>10.0f} "
+              f"{memory['per_worker_shared']:>13.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and memory per gunicorn worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=32, help="concurrent SSE clients")
+    parser.add_argument("--requests", type=int, default=256, help="/chat requests per worker count")
+    parser.add_argument("--turns", type=int, default=1, help="questions per session before a new one")
+    parser.add_argument("--distinct", action="store_true", help="make every question unique (no single-flight)")
+    parser.add_argument("--ranker", choices=["fake", "flashrank"], default="fake",
+                        help="flashrank preloads the real ONNX model (shows the shared weights in PSS)")
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--verbose", action="store_true", help="show gunicorn logs")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/worker_sweep-<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    from benchmarks.fake_app import prepare_data
+
+    print("Preparing indexes...")
+    prepare_data()
+    runs = [run_workers(count, args) for count in args.workers]
+    report(runs)
+
+    results = {f"workers_{run['workers']}": run for run in runs}
+    results["config"] = {
+        "clients": args.clients,
+        "requests": args.requests,
+        "ranker": args.ranker,
+        "tokens_per_second": args.tokens_per_second,
+    }
+    save_results("worker_sweep", results, args.output)
+    if args.compare and compare_results(args.compare, results, args.tolerance):
+        raise SystemExit("❌ Regressions against the baseline run.")
+
+
+if __name__ == "__main__":
+    main()
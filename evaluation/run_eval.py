@@ -1,19 +1,28 @@
-
 import os
 import sys
 import asyncio
+import hashlib
 import json
+import math
+import time
+import argparse
+import logging
+
+# The semantic answer cache would replay answers without contexts: evaluate the full pipeline
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+
 import pandas as pd
-from datasets import Dataset
-from ragas import evaluate
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_google_genai import ChatGoogleGenerativeAI
+from ragas.dataset_schema import SingleTurnSample
+from ragas.embeddings import LangchainEmbeddingsWrapper
+from ragas.llms import LangchainLLMWrapper
 from ragas.metrics import (
     faithfulness,
     answer_relevancy,
     context_precision,
 )
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from ragas.run_config import RunConfig
-import logging
 
 # Suppress verbose API logs
 logging.getLogger("google_genai").setLevel(logging.WARNING)
@@ -23,99 +32,240 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from backend.services.rag_service import RAGService
 from backend.core.config import settings
+from backend.core.rate_limit import TokenBucket
+from backend.core.startup import Warmup
+from backend.services.embedding_cache import build_embeddings
 
-# Initialize Google LLM for Ragas (Judge)
-judge_llm = ChatGoogleGenerativeAI(
-    model=settings.GOOGLE_MODEL_NAME,
-    google_api_key=settings.GOOGLE_API_KEY,
-    temperature=0
-)
+METRICS = [faithfulness, answer_relevancy, context_precision]
+DEFAULT_CACHE_PATH = "evaluation/cache/eval_cache.jsonl"
+DEFAULT_RERANK_CACHE_PATH = "evaluation/cache/rerank_scores.npz"
+
+
+class RateLimitCallback(AsyncCallbackHandler):
+    """Takes a token from the shared bucket before every LLM call (generator and judge alike)."""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        await self.bucket.acquire()
+
+    async def on_llm_start(self, serialized, prompts, **kwargs):
+        await self.bucket.acquire()
+
+
+class EvalCache:
+    """
+    Append-only JSONL of answers and judgements keyed by a hash of their inputs,
+    so a rerun (or a resumed crash) only redoes the items whose inputs changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line after a crash
+                    self.entries[(record["kind"], record["key"])] = record["value"]
+
+    def get(self, kind: str, key: str):
+        return self.entries.get((kind, key))
+
+    def put(self, kind: str, key: str, value) -> None:
+        self.entries[(kind, key)] = value
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": kind, "key": key, "value": value}, ensure_ascii=False) + "\n")
+
+
+def content_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def build_rag_service(llm):
+    """Same components as the API, warmed up the same way (Chroma, FlashRank, BM25, verse index)."""
+    warmup = Warmup(retries=settings.STARTUP_RETRIES, backoff_seconds=settings.STARTUP_RETRY_BACKOFF_SECONDS)
+    service = await warmup.run("rag_service", lambda: RAGService(llm=llm))
+    if service is None:
+        raise SystemExit("Could not build the RAG service.")
+    await asyncio.gather(*(warmup.run(name, loader, required) for name, loader, required in service.warmup_steps()))
+    if not warmup.ready:
+        raise SystemExit(f"RAG service not ready: {warmup.report()['components']}")
+    return service
+
+
+async def generate(rag_service, question: str, session_id: str, retrieval_mode: str):
+    """Answers through the production streaming path (reranking, packing) and times it."""
+    started = time.perf_counter()
+    answer, contexts, sources, timings = "", [], [], {}
+    async for event in rag_service.get_answer_stream(
+        question, session_id, retrieval_mode=retrieval_mode, debug=True, include_context=True
+    ):
+        if event["type"] == "content":
+            answer += event["data"]
+        elif event["type"] == "context":
+            contexts = event["data"]
+        elif event["type"] == "sources":
+            sources = event["data"]
+        elif event["type"] == "timings":
+            timings = event["data"]
+    return {
+        "answer": answer,
+        "contexts": contexts,
+        "sources": sources,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "ttft_ms": round(timings.get("ttft", float("nan")), 1),
+        "timings": timings,
+    }
+
+
+async def judge(item: dict, generated: dict) -> dict:
+    sample = SingleTurnSample(
+        user_input=item["question"],
+        response=generated["answer"],
+        retrieved_contexts=generated["contexts"],
+        reference=item["ground_truth"],
+    )
+    scores = {}
+    for metric in METRICS:
+        scores[metric.name] = float(await metric.single_turn_ascore(sample))
+    return scores
+
+
+async def evaluate_item(index, item, args, rag_service, cache, generator_fingerprint, judge_fingerprint, semaphore):
+    label = f"[{index + 1}] {item['question'][:60]}"
+    row = {
+        "user_input": item["question"],
+        "reference": item["ground_truth"],
+        "category": item.get("category", ""),
+    }
+    async with semaphore:
+        answer_key = content_key("answer", item["question"], generator_fingerprint)
+        generated = None if args.no_cache else cache.get("answer", answer_key)
+        if generated is None:
+            try:
+                # Fresh session per question: answers must not depend on the order of the dataset
+                generated = await generate(rag_service, item["question"], f"eval-{answer_key[:12]}", args.retrieval_mode)
+                cache.put("answer", answer_key, generated)
+                print(f"{label}: answered in {generated['latency_ms']:.0f} ms")
+            except Exception as e:
+                print(f"{label}: error generating answer: {e}")
+                generated = {"answer": "Error generating answer", "contexts": [], "sources": [],
+                             "latency_ms": float("nan"), "ttft_ms": float("nan"), "error": str(e)}
+        else:
+            print(f"{label}: answer cached")
+
+        scores = {metric.name: float("nan") for metric in METRICS}
+        if "error" not in generated:
+            judgement_key = content_key(
+                "judgement", item["question"], item["ground_truth"], generated["answer"], generated["contexts"], judge_fingerprint
+            )
+            cached = None if args.no_cache else cache.get("judgement", judgement_key)
+            if cached is not None:
+                scores = cached
+            else:
+                try:
+                    scores = await judge(item, generated)
+                    # Partial judgements (a metric that came back NaN) are redone on the next run
+                    if not any(math.isnan(value) for value in scores.values()):
+                        cache.put("judgement", judgement_key, scores)
+                except Exception as e:
+                    print(f"{label}: error judging answer: {e}")
+
+    row.update({
+        "response": generated["answer"],
+        "retrieved_contexts": generated["contexts"],
+        "sources": generated["sources"],
+        "latency_ms": generated["latency_ms"],
+        "ttft_ms": generated["ttft_ms"],
+        **scores,
+    })
+    return row
 
-judge_embeddings = GoogleGenerativeAIEmbeddings(
-    model="models/text-embedding-004",
-    google_api_key=settings.GOOGLE_API_KEY
-)
 
 async def main():
-    print("Loading RAG Service...")
-    rag_service = RAGService()
-    
-    import argparse
     parser = argparse.ArgumentParser(description="Run RAG Evaluation")
     parser.add_argument("--dataset", type=str, default="evaluation/test_dataset.json", help="Path to the test dataset JSON (relative to backend root)")
+    parser.add_argument("--concurrency", type=int, default=4, help="questions in flight at once")
+    # Gemini Free Tier: 15 requests/minute, shared by the agent and the RAGAS judge
+    parser.add_argument("--rpm", type=float, default=15, help="LLM requests per minute across generator and judge (0 = unlimited)")
+    parser.add_argument("--burst", type=float, default=1)
+    parser.add_argument("--retrieval-mode", choices=["vector", "lexical", "hybrid"], default=None)
+    parser.add_argument("--cache", type=str, default=DEFAULT_CACHE_PATH, help="answer/judgement cache (JSONL)")
+    parser.add_argument("--no-cache", action="store_true", help="recompute everything (results are still appended to the cache)")
+    parser.add_argument("--rerank-cache", type=str, default=DEFAULT_RERANK_CACHE_PATH,
+                        help="cross-encoder scores kept between runs (.npz)")
+    parser.add_argument("--limit", type=int, default=0, help="only the first N questions")
     args = parser.parse_args()
 
     print(f"Loading Test Dataset from: {args.dataset}")
     with open(args.dataset, "r") as f:
         data = json.load(f)
-    
-    questions = []
-    ground_truths = []
-    answers = []
-    contexts = []
-    categories = []
-
-    print(f"Starting Evaluation on {len(data)} questions...")
-    
-    # Generate Answers
-    import time
-    for i, item in enumerate(data):
-        print(f"[{i+1}/{len(data)}] Processing: {item['question']}")
-        
-        try:
-            # Get Answer from Agent
-            response = rag_service.get_answer(item['question'])
-            
-            questions.append(item['question'])
-            ground_truths.append(item['ground_truth'])
-            categories.append(item['category'])
-            answers.append(response['answer'])
-            # Use the new context_list we added to RAGService
-            contexts.append(response.get('context_list', []))
-            
-            # Sleep to avoid hitting Gemini Free Tier Rate Limits (15 RPM)
-            time.sleep(5)
-            
-        except Exception as e:
-            print(f"Error processing question '{item['question']}': {e}")
-            questions.append(item['question'])
-            ground_truths.append(item['ground_truth'])
-            categories.append(item['category'])
-            answers.append("Error generating answer")
-            contexts.append([])
-
-    # Create HuggingFace Dataset for Ragas
-    dataset_dict = {
-        "question": questions,
-        "answer": answers,
-        "contexts": contexts,
-        "ground_truth": ground_truths
-    }
-    dataset = Dataset.from_dict(dataset_dict)
-
-    print("Running Ragas Metrics (Faithfulness, Relevancy, Precision)...")
-    # Using Gemini as the Judge
-    # Limit workers to 1 to avoid hitting Gemini Free Tier Rate Limits during evaluation
-    results = evaluate(
-        dataset=dataset,
-        metrics=[
-            faithfulness,
-            answer_relevancy,
-            context_precision,
-        ],
-        llm=judge_llm, 
-        embeddings=judge_embeddings,
-        raise_exceptions=False,
-        #run_config=RunConfig(max_workers=1, timeout=600)
+    if args.limit:
+        data = data[:args.limit]
+
+    # One bucket for every Gemini call this process makes
+    limiter = RateLimitCallback(TokenBucket.per_minute(args.rpm, burst=args.burst))
+    generator_llm = ChatGoogleGenerativeAI(
+        model=settings.GOOGLE_MODEL_NAME,
+        google_api_key=settings.GOOGLE_API_KEY,
+        temperature=0.3,
+        callbacks=[limiter],
+    )
+    judge_llm = ChatGoogleGenerativeAI(
+        model=settings.GOOGLE_MODEL_NAME,
+        google_api_key=settings.GOOGLE_API_KEY,
+        temperature=0,
+        callbacks=[limiter],
     )
+    run_config = RunConfig(max_workers=args.concurrency, timeout=600)
+    for metric in METRICS:
+        metric.llm = LangchainLLMWrapper(judge_llm)
+        if hasattr(metric, "embeddings"):
+            metric.embeddings = LangchainEmbeddingsWrapper(build_embeddings())
+        metric.init(run_config)
+
+    print("Loading RAG Service...")
+    rag_service = await build_rag_service(generator_llm)
+    # Answers that must be regenerated (new prompt, packing...) still reuse the scores of earlier runs
+    if rag_service.rerank_cache is not None and not args.no_cache and os.path.exists(args.rerank_cache):
+        print(f"Rerank scores loaded: {rag_service.rerank_cache.load(args.rerank_cache)}")
+
+    # Anything that changes the answers (or their judgement) invalidates the cached items
+    generator_fingerprint = {
+        "model": settings.GOOGLE_MODEL_NAME,
+        "system_prompt": content_key(rag_service.system_prompt),
+        "retrieval_mode": args.retrieval_mode or settings.RETRIEVAL_MODE,
+        "context_token_budget": settings.CONTEXT_TOKEN_BUDGET,
+        "embedding_model": settings.EMBEDDING_MODEL_NAME,
+        "rerank_cascade": settings.RERANK_CASCADE_ENABLED,
+        "query_router": settings.QUERY_ROUTER_ENABLED,
+    }
+    judge_fingerprint = {"model": settings.GOOGLE_MODEL_NAME, "metrics": [metric.name for metric in METRICS]}
+    cache = EvalCache(args.cache)
+
+    print(f"Starting Evaluation on {len(data)} questions ({args.concurrency} at a time, {args.rpm:g} LLM requests/min)...")
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rows = await asyncio.gather(*(
+        evaluate_item(i, item, args, rag_service, cache, generator_fingerprint, judge_fingerprint, semaphore)
+        for i, item in enumerate(data)
+    ))
+    print(f"Evaluation Complete in {time.perf_counter() - started:.0f}s!")
+    if rag_service.rerank_cache is not None:
+        rag_service.rerank_cache.save(args.rerank_cache)
+        print(f"Rerank cache: {rag_service.rerank_cache.stats()}")
+
+    df = pd.DataFrame(rows)
+    print(df[["faithfulness", "answer_relevancy", "context_precision", "latency_ms", "ttft_ms"]].describe())
 
-    print("Evaluation Complete!")
-    print(results)
-    
     # Save CSV
-    df = results.to_pandas()
-    print(f"Dataframe columns: {df.columns}")
-    df['category'] = categories # Add category back to DF
     df.to_csv("evaluation/results.csv", index=False)
     print("Results saved to evaluation/results.csv")
 
@@ -131,30 +281,33 @@ def generate_markdown_report(df):
         f.write("> 2. **Clareza e Acessibilidade** (1-5)\n")
         f.write("> 3. **Profundidade** (1-5)\n")
         f.write("> 4. **Relevância do Contexto** (1-5)\n\n")
-        
+
         f.write("## Resumo das Métricas Automáticas (RAGAS)\n")
         f.write(f"- **Média Fidelidade (Faithfulness)**: {df['faithfulness'].mean():.2f}\n")
         f.write(f"- **Média Relevância (Answer Relevancy)**: {df['answer_relevancy'].mean():.2f}\n")
-        f.write(f"- **Média Precisão Contexto (Context Precision)**: {df['context_precision'].mean():.2f}\n\n")
-        
+        f.write(f"- **Média Precisão Contexto (Context Precision)**: {df['context_precision'].mean():.2f}\n")
+        f.write(f"- **Latência (p50 / p95)**: {df['latency_ms'].quantile(0.5):.0f} ms / {df['latency_ms'].quantile(0.95):.0f} ms\n")
+        f.write(f"- **Tempo até o primeiro token (p50)**: {df['ttft_ms'].quantile(0.5):.0f} ms\n\n")
+
         f.write("---\n\n")
-        
+
         for index, row in df.iterrows():
             f.write(f"### Q{index+1}: {row['user_input']}\n")
             f.write(f"**Categoria**: {row['category']}\n\n")
-            
+
             f.write("#### 🤖 Resposta do Agente:\n")
             f.write(f"{row['response']}\n\n")
-            
+
             f.write("#### 📖 Contexto Recuperado (Principais Trechos):\n")
             for i, ctx in enumerate(row['retrieved_contexts'][:3]): # Limit to top 3 for readability
                 f.write(f"> {ctx[:300]}...\n\n")
-            
+
             f.write("#### 📊 Métricas RAGAS:\n")
             f.write(f"- Faithfulness: {row['faithfulness']:.2f}\n")
             f.write(f"- Answer Relevancy: {row['answer_relevancy']:.2f}\n")
-            f.write(f"- Context Precision: {row['context_precision']:.2f}\n\n")
-            
+            f.write(f"- Context Precision: {row['context_precision']:.2f}\n")
+            f.write(f"- Latência: {row['latency_ms']:.0f} ms (primeiro token em {row['ttft_ms']:.0f} ms)\n\n")
+
             f.write("#### 👨‍🏫 Avaliação Qualitativa (Manual):\n")
             f.write("| Critério | Nota (1-5) | Comentários |\n")
             f.write("| :--- | :---: | :--- |\n")
@@ -163,9 +316,8 @@ def generate_markdown_report(df):
             f.write("| Profundidade | | |\n")
             f.write("| Relevância Contexto | | |\n\n")
             f.write("---\n\n")
-            
+
     print(f"Report generated at {report_path}")
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -3,4 +3,4 @@
 cd "$(dirname "$0")/.."
 
 echo "🧐 Inspecionando o Cérebro (Database)..."
-docker-compose exec backend python backend/debug/inspect_db.py
+docker-compose exec backend python backend/debug/inspect_db.py "$@"
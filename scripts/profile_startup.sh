@@ -0,0 +1,6 @@
+#!/bin/bash
+# Navigate to project root
+cd "$(dirname "$0")/.."
+
+echo "⏱️  Medindo o tempo de inicialização do backend..."
+docker-compose exec backend python backend/debug/profile_startup.py --warmup "$@"
@@ -0,0 +1,7 @@
+#!/bin/bash
+# Navigate to project root
+cd "$(dirname "$0")/.."
+
+echo "🚀 Load test offline do /chat (modelo, embeddings, Chroma e reranker locais)..."
+docker-compose up -d backend
+docker-compose exec backend python benchmarks/load_test.py "$@"
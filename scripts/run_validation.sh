@@ -10,7 +10,8 @@ echo "1. Ensuring Backend is Running..."
 docker-compose up -d backend
 
 echo "2. Starting Evaluation (30 Questions)..."
-echo "   NOTE: This may take ~45-60 minutes due to rate limits."
+echo "   NOTE: Gemini calls are rate-limited (--rpm, default 15/min); answers and"
+echo "   judgements are cached in evaluation/cache, so a rerun only redoes changed items."
 echo "   Logs will be shown below."
 echo "=================================================="
 
@@ -0,0 +1,73 @@
+from langchain_core.documents import Document
+
+from backend.services.context_packer import ContextPacker, overlap_length
+
+
+def verses(book, chapter, first, last, score=1.0):
+    numbers = range(first, last + 1)
+    content = f"[{book} {chapter}:{first}-{last}]\n" + "".join(f"{n}. verse {n}\n" for n in numbers)
+    doc = Document(page_content=content, metadata={"book": book, "chapter": chapter, "type": "scripture"})
+    return doc, score
+
+
+def prose(text, score=1.0, source="calvino.epub", page=1):
+    return Document(page_content=text, metadata={"source": source, "page": page}), score
+
+
+TEXT = "".join(f"Sentence number {i} about grace and faith. " for i in range(40))
+
+
+def test_adjacent_verse_windows_merge_into_one_citation():
+    packed = ContextPacker().pack([verses("João", 3, 11, 15), verses("João", 3, 16, 20)])
+    assert len(packed) == 1
+    assert packed[0].page_content.startswith("[João 3:11-20]\n11. verse 11\n")
+    assert packed[0].metadata["verses"] == "11-20"
+
+
+def test_overlapping_verse_windows_keep_each_verse_once():
+    packed = ContextPacker().pack([verses("João", 3, 14, 16), verses("João", 3, 15, 18)])
+    assert len(packed) == 1
+    assert packed[0].page_content.count("15. verse 15") == 1
+    assert packed[0].metadata["verses"] == "14-18"
+
+
+def test_gap_between_verses_keeps_separate_citations():
+    packed = ContextPacker().pack([verses("João", 3, 1, 2), verses("João", 3, 5, 6)])
+    assert [doc.metadata["verses"] for doc in packed] == ["1-2", "5-6"]
+
+
+def test_splitter_overlap_is_stitched_out():
+    packer = ContextPacker()
+    packed = packer.pack([prose(TEXT[:600], 0.9), prose(TEXT[400:1000], 0.8)])
+    assert [doc.page_content for doc in packed] == [TEXT[:1000]]
+    assert packer.stats()["overlap_chars_removed"] == 200
+
+
+def test_overlap_is_found_whichever_chunk_ranks_first():
+    packed = ContextPacker().pack([prose(TEXT[400:1000], 0.9), prose(TEXT[:600], 0.8)])
+    assert [doc.page_content for doc in packed] == [TEXT[:1000]]
+
+
+def test_chunks_from_other_sources_or_pages_are_not_merged():
+    packed = ContextPacker().pack([prose(TEXT[:600]), prose(TEXT[400:1000], page=2), prose(TEXT[400:1000], source="x")])
+    assert len(packed) == 3
+
+
+def test_contained_chunk_is_dropped():
+    packed = ContextPacker().pack([prose(TEXT[:600]), prose(TEXT[100:300])])
+    assert [doc.page_content for doc in packed] == [TEXT[:600]]
+
+
+def test_overlap_shorter_than_minimum_is_ignored():
+    assert overlap_length("abcdef", "defghi", min_overlap=4, max_overlap=10) == 0
+    assert overlap_length("abcdef", "defghi", min_overlap=3, max_overlap=10) == 3
+
+
+def test_budget_keeps_pinned_first_and_skips_chunks_that_do_not_fit():
+    pinned = Document(page_content="p" * 200, metadata={"source": "pinned"})
+    big, small = prose("b" * 400, 0.9, source="big"), prose("s" * 80, 0.5, source="small")
+    packer = ContextPacker(token_budget=100)
+    packed = packer.pack([big, small], pinned=[pinned])
+    assert [doc.metadata["source"] for doc in packed] == ["pinned", "small"]
+    assert packer.stats()["chunks_dropped"] == 1
+    assert packer.tokens(packed) <= 100
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from backend.data_ingestion.dedup import MinHashDeduplicator, lsh_params, shingles
+
+WORDS = "graça fé amor esperança cristo igreja deus pecado salvação justiça lei evangelho oração reino".split()
+
+
+def passage(seed, length=120):
+    rng = np.random.RandomState(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def candidate_probability(similarity, bands, rows):
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+@pytest.mark.parametrize("threshold", [0.7, 0.85, 0.95])
+def test_lsh_params_fit_the_permutations_and_split_around_the_threshold(threshold):
+    bands, rows = lsh_params(threshold, 128)
+    assert bands * rows <= 128
+    assert candidate_probability(threshold - 0.3, bands, rows) < 0.05
+    assert candidate_probability(min(threshold + 0.1, 0.99), bands, rows) > 0.5
+
+
+def test_higher_thresholds_use_longer_bands():
+    assert lsh_params(0.5, 128)[1] < lsh_params(0.85, 128)[1]
+
+
+def test_shingles_ignore_accents_case_and_punctuation():
+    assert shingles("Graça, e FÉ!\n\namor") == shingles("graca e fe amor")
+    assert shingles("uma palavra") == {"uma palavra"}
+    assert shingles("") == set()
+
+
+def test_reformatted_edition_is_an_alias_of_the_first_copy():
+    dedup = MinHashDeduplicator()
+    text = passage(1)
+    assert dedup.canonical_of("a", text, "ed1.epub", "ed1.epub") is None
+    reformatted = text.replace("graça", "Graça").replace(" ", "\n ")
+    assert dedup.canonical_of("b", reformatted, "ed2.epub", "ed2.epub") == "a"
+    assert dedup.aliases["b"] == {"canonical": "a", "file": "ed2.epub", "source": "ed2.epub"}
+    assert dedup.changed == {"a"}
+
+
+def test_chunks_below_the_threshold_stay_canonical():
+    dedup = MinHashDeduplicator(threshold=0.85)
+    text = passage(2)
+    words = text.split()
+    # Rewrites every 4th word: well below 0.85 Jaccard on word trigrams
+    edited = " ".join("x" if i % 4 == 0 else w for i, w in enumerate(words))
+    dedup.canonical_of("a", text, "s", "f1")
+    assert dedup.canonical_of("b", edited, "s", "f2") is None
+    assert dedup.canonical_of("c", passage(3), "s", "f3") is None
+    assert len(dedup) == 3
+
+
+def test_known_alias_is_resolved_without_rehashing():
+    dedup = MinHashDeduplicator()
+    text = passage(4)
+    dedup.canonical_of("a", text, "s1", "f1")
+    dedup.canonical_of("b", text, "s2", "f2")
+    assert dedup.canonical_of("b", "", "s2", "f2") == "a"
+
+
+def test_alias_sources_skip_the_canonical_chunks_own_source():
+    dedup = MinHashDeduplicator()
+    text = passage(5)
+    dedup.canonical_of("a", text, "ed1", "f1")
+    dedup.canonical_of("b", text, "ed2", "f2")
+    dedup.canonical_of("c", text, "ed1", "f3")
+    assert dedup.alias_sources(["a"]) == {"a": ["ed2"]}
+
+
+def test_removing_a_canonical_chunk_orphans_its_alias_files():
+    dedup = MinHashDeduplicator()
+    text = passage(6)
+    dedup.canonical_of("a", text, "ed1", "f1")
+    dedup.canonical_of("b", text, "ed2", "f2")
+    assert dedup.remove(["a"]) == {"f2"}
+    assert dedup.aliases == {}
+    assert not any(dedup.buckets.values())
+    # With the canonical copy gone, the next edition becomes canonical itself
+    assert dedup.canonical_of("b", text, "ed2", "f2") is None
+
+
+def test_forget_file_drops_its_aliases_and_marks_the_canonical_changed():
+    dedup = MinHashDeduplicator()
+    text = passage(7)
+    dedup.canonical_of("a", text, "ed1", "f1")
+    dedup.canonical_of("b", text, "ed2", "f2")
+    dedup.changed.clear()
+    dedup.forget_file("f2")
+    assert dedup.aliases == {}
+    assert dedup.changed == {"a"}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "dedup.npz")
+    dedup = MinHashDeduplicator()
+    text = passage(8)
+    dedup.canonical_of("a" * 32, text, "ed1", "f1")
+    dedup.canonical_of("b" * 32, text, "ed2", "f2")
+    dedup.save(path)
+
+    loaded = MinHashDeduplicator.load(path)
+    assert loaded.aliases == dedup.aliases
+    assert loaded.sources == dedup.sources
+    assert loaded.canonical_of("c" * 32, text, "ed3", "f3") == "a" * 32
+
+
+def test_load_rejects_other_settings(tmp_path):
+    path = str(tmp_path / "dedup.npz")
+    MinHashDeduplicator(threshold=0.85).save(path)
+    with pytest.raises(ValueError):
+        MinHashDeduplicator.load(path, threshold=0.9)
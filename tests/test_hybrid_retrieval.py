@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from backend.services.hybrid_retriever import HybridRetriever, reciprocal_rank_fusion
+from backend.services.lexical_index import BM25Index
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def doc(text, **metadata):
+    return Document(page_content=text, metadata={"source": "test.md", **metadata})
+
+
+GRACE = doc("A graça de Deus nos salva pela fé.", book="Efésios")
+LAW = doc("A lei revela o pecado.", book="Romanos")
+LOVE = doc("Deus é amor e quem permanece no amor permanece em Deus.", book="1 João")
+PRAYER = doc("Orai sem cessar e em tudo dai graças.", book="1 Tessalonicenses")
+
+
+class FakeVectorRetriever:
+    """Returns a fixed ranking (or raises) and records the filter it was given."""
+
+    def __init__(self, docs=None, error=None):
+        self.docs = docs or []
+        self.error = error
+        self.calls = []
+
+    async def ainvoke(self, query, **kwargs):
+        self.calls.append(kwargs)
+        if self.error:
+            raise self.error
+        return list(self.docs)
+
+
+def lexical_index(*docs):
+    index = BM25Index()
+    index.add_documents(list(docs))
+    return index
+
+
+def texts(docs):
+    return [d.page_content for d in docs]
+
+
+def test_rrf_rewards_documents_ranked_by_both_lists():
+    fused = reciprocal_rank_fusion([[GRACE, LAW, LOVE], [PRAYER, LOVE, GRACE]])
+    # GRACE: 1/61 + 1/63, LOVE: 1/63 + 1/62, then the single-list hits by rank
+    assert texts(fused) == texts([GRACE, LOVE, PRAYER, LAW])
+
+
+def test_rrf_merges_the_same_chunk_from_both_sides():
+    # Chroma and BM25 return separate Document objects for the same chunk
+    copy = Document(page_content=GRACE.page_content, metadata=dict(GRACE.metadata))
+    fused = reciprocal_rank_fusion([[GRACE], [copy]])
+    assert len(fused) == 1
+
+
+def test_rrf_k_controls_how_much_the_top_rank_dominates():
+    # GRACE tops one list; LOVE is only fourth, but in both
+    rankings = [[GRACE, LAW, PRAYER, LOVE], [LAW, PRAYER, doc("Outro."), LOVE]]
+
+    def position(document, rrf_k):
+        return texts(reciprocal_rank_fusion(rankings, rrf_k=rrf_k)).index(document.page_content)
+
+    assert position(GRACE, rrf_k=1) < position(LOVE, rrf_k=1)
+    assert position(LOVE, rrf_k=60) < position(GRACE, rrf_k=60)
+
+
+def test_hybrid_mode_fuses_vector_and_lexical_results():
+    vector = FakeVectorRetriever([LOVE, LAW])
+    retriever = HybridRetriever(vector, lexical_index(GRACE, LAW, LOVE, PRAYER), lexical_k=4, fused_k=3)
+    docs, timings = run(retriever.retrieve("graça de Deus", mode="hybrid"))
+    assert len(docs) == 3
+    # LOVE is in both lists, GRACE tops BM25
+    assert set(texts(docs[:2])) == {LOVE.page_content, GRACE.page_content}
+    assert {"vector_ms", "lexical_ms", "fusion_ms"} <= timings.keys()
+
+
+def test_lexical_mode_uses_bm25_only():
+    vector = FakeVectorRetriever([LAW])
+    retriever = HybridRetriever(vector, lexical_index(GRACE, LAW, LOVE), fused_k=2)
+    docs, _ = run(retriever.retrieve("amor", mode="lexical"))
+    assert texts(docs) == [LOVE.page_content]
+    assert vector.calls == []
+
+
+def test_without_a_lexical_index_every_mode_is_vector_only():
+    vector = FakeVectorRetriever([LAW])
+    retriever = HybridRetriever(vector, BM25Index())
+    docs, timings = run(retriever.retrieve("graça", mode="hybrid"))
+    assert texts(docs) == [LAW.page_content]
+    assert "lexical_ms" not in timings
+
+
+def test_vector_failure_falls_back_to_bm25():
+    vector = FakeVectorRetriever(error=TimeoutError("chroma"))
+    retriever = HybridRetriever(vector, lexical_index(GRACE, LAW))
+    docs, _ = run(retriever.retrieve("graça", mode="hybrid"))
+    assert texts(docs) == [GRACE.page_content]
+    docs, _ = run(retriever.retrieve("lei", mode="vector"))
+    assert texts(docs) == [LAW.page_content]
+    assert retriever.lexical_fallbacks == 2
+
+
+def test_vector_failure_without_lexical_index_is_raised():
+    retriever = HybridRetriever(FakeVectorRetriever(error=TimeoutError("chroma")), None)
+    with pytest.raises(TimeoutError):
+        run(retriever.retrieve("graça", mode="hybrid"))
+
+
+def test_where_filter_reaches_both_sides():
+    vector = FakeVectorRetriever([LOVE])
+    retriever = HybridRetriever(vector, lexical_index(GRACE, LOVE))
+    retriever.where_param = "filter"
+    where = {"book": "1 João"}
+    docs, _ = run(retriever.retrieve("Deus", mode="hybrid", where=where))
+    assert vector.calls == [{"filter": where}]
+    assert texts(docs) == [LOVE.page_content]
+
+
+def test_unknown_mode_is_rejected():
+    retriever = HybridRetriever(FakeVectorRetriever(), None)
+    with pytest.raises(ValueError):
+        run(retriever.retrieve("graça", mode="semantic"))
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from backend.data_ingestion.manifest import CheckpointJournal, IngestManifest, file_hash
+from backend.data_ingestion.pipeline import IngestionPipeline
+from backend.services.lexical_index import BM25Index
+
+PARAGRAPHS = [
+    f"Parágrafo {i}: " + " ".join(f"palavra{i}_{j}" for j in range(120)) for i in range(8)
+]
+
+
+class FakeCollection:
+    """Chroma's write API over a dict; `fail_on_upsert` makes that call (1-based) raise, like a crash."""
+
+    def __init__(self, fail_on_upsert=None):
+        self.chunks = {}
+        self.upserts = 0
+        self.fail_on_upsert = fail_on_upsert
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts += 1
+        if self.upserts == self.fail_on_upsert:
+            raise RuntimeError("chroma went away")
+        for cid, vector, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.chunks[cid] = (vector, document, metadata)
+
+    def delete(self, ids=None, where=None):
+        for cid in ids or []:
+            self.chunks.pop(cid, None)
+
+    def update(self, ids, metadatas):
+        pass
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.texts = []
+
+    async def aembed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    book = source_dir / "livro.md"
+    book.write_text("\n\n".join(PARAGRAPHS), encoding="utf-8")
+    return tmp_path, source_dir, book
+
+
+def build_pipeline(tmp_path, source_dir, collection, embeddings):
+    return IngestionPipeline(
+        collection=collection,
+        embeddings=embeddings,
+        manifest=IngestManifest.load(str(tmp_path / "manifest.json")),
+        journal=CheckpointJournal(str(tmp_path / "journal.jsonl")),
+        lexical_index=BM25Index(),
+        source_dir=str(source_dir),
+        parse_workers=1,
+        embed_concurrency=1,
+        batch_size=2,
+    )
+
+
+def ingest(tmp_path, source_dir, book, collection, embeddings):
+    pipeline = build_pipeline(tmp_path, source_dir, collection, embeddings)
+    stats = asyncio.run(pipeline.run([str(book)]))
+    # As ingest.py does once a run completes
+    pipeline.manifest.save()
+    pipeline.journal.clear()
+    return pipeline, stats
+
+
+def test_manifest_round_trip_and_change_detection(tmp_path):
+    source = tmp_path / "a.md"
+    source.write_text("texto", encoding="utf-8")
+    manifest = IngestManifest(str(tmp_path / "index" / "manifest.json"))
+    manifest.record("a.md", os.stat(source), file_hash(str(source)), ["id1", "id2"])
+    manifest.bootstrapped = True
+    manifest.save()
+
+    loaded = IngestManifest.load(manifest.path)
+    assert loaded.bootstrapped
+    assert loaded.files["a.md"]["chunk_ids"] == ["id1", "id2"]
+    assert loaded.is_unchanged("a.md", os.stat(source))
+
+    source.write_text("texto editado", encoding="utf-8")
+    assert not loaded.is_unchanged("a.md", os.stat(source))
+    assert not loaded.is_unchanged("b.md", os.stat(source))
+
+
+def test_journal_merges_batches_and_skips_a_torn_last_line(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "journal.jsonl"))
+    assert journal.load() == {}
+    journal.append("a.md", "h1", ["x", "y"])
+    journal.append("a.md", "h1", ["z"])
+    journal.append("b.md", "h2", ["w"])
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"file": "b.md", "hash": "h2", "ids": ["v"]})[:20])
+
+    assert journal.load() == {("a.md", "h1"): {"x", "y", "z"}, ("b.md", "h2"): {"w"}}
+    journal.clear()
+    assert journal.load() == {}
+
+
+def test_interrupted_run_resumes_without_re_embedding_committed_batches(workspace):
+    tmp_path, source_dir, book = workspace
+    collection = FakeCollection(fail_on_upsert=3)
+    crashed = CountingEmbeddings()
+    with pytest.raises(RuntimeError):
+        asyncio.run(build_pipeline(tmp_path, source_dir, collection, crashed).run([str(book)]))
+    committed = set(collection.chunks)
+    assert len(committed) == 4  # two batches of two made it before the crash
+    assert not os.path.exists(tmp_path / "manifest.json")
+
+    collection.fail_on_upsert = None
+    resumed = CountingEmbeddings()
+    pipeline, stats = ingest(tmp_path, source_dir, book, collection, resumed)
+
+    chunk_ids = pipeline.manifest.files["livro.md"]["chunk_ids"]
+    assert set(chunk_ids) == set(collection.chunks)
+    # Only the chunks the crashed run had not committed were embedded again
+    assert stats["chunks_upserted"] == len(chunk_ids) - len(committed)
+    assert len(resumed.texts) == len(chunk_ids) - len(committed)
+    assert not os.path.exists(tmp_path / "journal.jsonl")
+
+
+def test_unchanged_file_is_skipped_and_edits_replace_stale_chunks(workspace):
+    tmp_path, source_dir, book = workspace
+    collection = FakeCollection()
+    first, _ = ingest(tmp_path, source_dir, book, collection, CountingEmbeddings())
+    old_ids = set(first.manifest.files["livro.md"]["chunk_ids"])
+
+    embeddings = CountingEmbeddings()
+    _, stats = ingest(tmp_path, source_dir, book, collection, embeddings)
+    assert stats["files_parsed"] == 0 and embeddings.texts == []
+
+    book.write_text("\n\n".join(PARAGRAPHS[:-1] + ["Parágrafo novo."]), encoding="utf-8")
+    embeddings = CountingEmbeddings()
+    edited, stats = ingest(tmp_path, source_dir, book, collection, embeddings)
+    new_ids = set(edited.manifest.files["livro.md"]["chunk_ids"])
+    assert set(collection.chunks) == new_ids
+    assert stats["chunks_deleted"] == len(old_ids - new_ids) > 0
+    # Chunks whose text did not change keep their IDs and are not embedded again
+    assert len(embeddings.texts) == len(new_ids - old_ids)
+
+
+def test_deleted_file_removes_its_chunks(workspace):
+    tmp_path, source_dir, book = workspace
+    collection = FakeCollection()
+    ingest(tmp_path, source_dir, book, collection, CountingEmbeddings())
+    assert collection.chunks
+
+    pipeline = build_pipeline(tmp_path, source_dir, collection, CountingEmbeddings())
+    asyncio.run(pipeline.run([]))
+    assert collection.chunks == {}
+    assert "livro.md" not in pipeline.manifest.files
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from backend.services.metadata_filter import compile_where
+from backend.services.query_router import QueryRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return QueryRouter()
+
+
+@pytest.mark.parametrize("query, books", [
+    ("O que Romanos 8 ensina?", ["Romanos"]),
+    ("O que Paulo diz em Romanos sobre a fé?", ["Romanos"]),
+    ("Gênesis e a criação", ["Gênesis"]),
+    ("Em Atos, como a igreja cresceu?", ["Atos"]),
+    ("O que diz a primeira carta de João sobre o amor?", ["1 João"]),
+    ("O que diz a carta de Judas?", ["Judas"]),
+    ("Profecias de Isaías sobre o Messias", ["Isaías"]),
+])
+def test_book_routes(router, query, books):
+    route = router.route_text(query)
+    assert (route.kind, route.books) == ("book", books)
+
+
+@pytest.mark.parametrize("query", [
+    # People and peoples, not books
+    "Por que Judas traiu Jesus?",
+    "Quem foi Isaías?",
+    "Os romanos perseguiram os cristãos?",
+    "O que é a graça?",
+])
+def test_no_route_without_a_book_or_corpus_cue(router, query):
+    route = router.route_text(query)
+    assert (route.kind, route.where) == ("none", None)
+
+
+@pytest.mark.parametrize("query, size, first", [
+    ("Jesus no Antigo Testamento", 39, "Gênesis"),
+    ("parábolas nos evangelhos", 4, "Mateus"),
+    ("cartas de Paulo sobre a graça", 13, "Romanos"),
+])
+def test_book_group_routes(router, query, size, first):
+    route = router.route_text(query)
+    assert (route.kind, len(route.books), route.books[0]) == ("book_group", size, first)
+
+
+def test_book_filter_only_narrows_the_bible_chunks(router):
+    matches = compile_where(router.route_text("O que Calvino diz sobre Romanos 9?").where)
+    assert matches({"type": "scripture", "book": "Romanos"})
+    assert not matches({"type": "scripture", "book": "Gênesis"})
+    # The other sources stay searchable
+    assert matches({"type": "theology", "source": "institutas.md"})
+
+
+def test_corpus_type_routes(router):
+    other = router.route_text("O que Calvino diz sobre a predestinação?")
+    assert (other.kind, other.where) == ("other", {"type": {"$ne": "scripture"}})
+    scripture = router.route_text("versículos sobre ansiedade")
+    assert (scripture.kind, scripture.where) == ("scripture", {"type": "scripture"})
+
+
+def test_route_counts_each_kind():
+    router = QueryRouter()
+    router.route("Romanos 8")
+    router.route("Gálatas 2:20")
+    router.route("O que é a graça?")
+    assert router.stats()["routes"] == {"book": 2, "none": 1}
+
+
+class FakeVectorIndex:
+    """The parts of LocalVectorIndex the centroids use: metadata, unit vectors and projection."""
+
+    def __init__(self, metadatas, vectors):
+        self.metadatas = metadatas
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+    def _rows(self, rows):
+        return self.vectors[rows]
+
+    def project(self, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        return (vector / np.linalg.norm(vector))[None, :]
+
+
+@pytest.fixture
+def centroid_router():
+    router = QueryRouter(centroid_margin=0.1)
+    index = FakeVectorIndex(
+        [
+            {"type": "scripture", "book": "Gênesis"},
+            {"type": "scripture", "book": "Êxodo"},
+            {"type": "scripture", "book": "Mateus"},
+            {"type": "theology"},
+        ],
+        [[1, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]],
+    )
+    router.fit_centroids(index)
+    return router
+
+
+def test_centroids_route_unmatched_questions(centroid_router):
+    assert centroid_router.centroid_labels == ["old_testament", "new_testament", "other"]
+    route = centroid_router.route("O que é a graça?", [0.1, 0.9, 0.1])
+    assert (route.kind, len(route.books), route.books[0]) == ("centroid_testament", 27, "Mateus")
+    route = centroid_router.route("O que é a graça?", [0.1, 0.1, 0.9])
+    assert (route.kind, route.where) == ("centroid_other", {"type": {"$ne": "scripture"}})
+
+
+def test_centroids_abstain_below_the_margin_and_never_override_rules(centroid_router):
+    assert centroid_router.route("O que é a graça?", [1, 1, 0]).kind == "none"
+    assert centroid_router.route("Romanos 8", [0, 0, 1]).kind == "book"
@@ -0,0 +1,90 @@
+import asyncio
+
+from backend.services.rerank_batcher import RerankBatcher
+from backend.services.rerank_cache import RerankScoreCache
+
+PASSAGES = [
+    {"id": 0, "text": "A graça de Deus nos salva.", "meta": {"source": "a.md"}},
+    {"id": 1, "text": "A lei revela o pecado.", "meta": {"source": "a.md"}},
+    {"id": 2, "text": "Deus é amor.", "meta": {"source": "b.md"}},
+]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class CountingRanker:
+    """FlashRank-style rerank() scoring by passage length; records what it was asked to score."""
+
+    def __init__(self):
+        self.scored = []
+
+    def rerank(self, request):
+        self.scored.extend(p["text"] for p in request.passages)
+        results = [{**p, "score": 1.0 / len(p["text"])} for p in request.passages]
+        return sorted(results, key=lambda r: r["score"], reverse=True)
+
+
+def test_keys_ignore_query_case_accents_and_punctuation():
+    first = RerankScoreCache.keys("m", "O que é a Graça?", PASSAGES)
+    assert first == RerankScoreCache.keys("m", "  o que e a graca ", PASSAGES)
+    assert len(set(first)) == len(PASSAGES)
+
+
+def test_keys_keep_models_and_chunk_metadata_apart():
+    key = RerankScoreCache.keys("L-12", "graça", PASSAGES[:1])
+    assert key != RerankScoreCache.keys("L-2", "graça", PASSAGES[:1])
+    moved = [{**PASSAGES[0], "meta": {"source": "outro.md"}}]
+    assert key != RerankScoreCache.keys("L-12", "graça", moved)
+
+
+def test_lru_eviction_within_the_byte_budget():
+    entry_bytes = RerankScoreCache._entry_bytes("k" * 32)
+    cache = RerankScoreCache(max_bytes=2 * entry_bytes)
+    cache.put("a" * 32, 0.1)
+    cache.put("b" * 32, 0.2)
+    assert cache.get("a" * 32) == 0.1  # a becomes the most recent
+    cache.put("c" * 32, 0.3)
+
+    assert cache.get("b" * 32) is None
+    assert cache.get("a" * 32) == 0.1 and cache.get("c" * 32) == 0.3
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    cache = RerankScoreCache()
+    cache.put("a" * 32, 0.25)
+    cache.put("b" * 32, 0.75)
+    path = str(tmp_path / "cache" / "scores.npz")
+    cache.save(path)
+
+    loaded = RerankScoreCache()
+    assert loaded.load(path) == 2
+    assert loaded.get("a" * 32) == 0.25 and loaded.get("b" * 32) == 0.75
+
+
+def test_batcher_only_sends_unknown_passages_to_the_model():
+    ranker = CountingRanker()
+    cache = RerankScoreCache()
+    batcher = RerankBatcher(ranker, window_ms=0, score_cache=cache, model="m")
+
+    async def scenario():
+        first, _ = await batcher.rerank("graça", PASSAGES[:2])
+        second, timings = await batcher.rerank("Graça!", PASSAGES)
+        third, _ = await batcher.rerank("graça", PASSAGES)
+        return first, second, third, timings
+
+    first, second, third, timings = run(scenario())
+    # The repeat (normalized to the same query) only scored the new passage; the third call none at all
+    assert ranker.scored == [PASSAGES[0]["text"], PASSAGES[1]["text"], PASSAGES[2]["text"]]
+    assert timings.batch_size == 1
+    assert batcher.stats()["cache_only"] == 1
+
+    # Cached and fresh scores are merged in one ranking, identical to a full scoring
+    expected = [p["id"] for p in sorted(PASSAGES, key=lambda p: len(p["text"]))]
+    assert [p["id"] for p in second] == expected
+    assert [p["id"] for p in third] == expected
+    assert [p["score"] for p in second] == [p["score"] for p in third]
+    assert [p["id"] for p in first] == [p for p in expected if p in (0, 1)]
@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from backend.core import resilience
+from backend.core.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+class Dependency:
+    """Fails (or hangs) for the first `failures` calls, then answers."""
+
+    def __init__(self, failures=0, error=ConnectionError, hang=False):
+        self.failures = failures
+        self.error = error
+        self.hang = hang
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            if self.hang:
+                await asyncio.sleep(10)
+            raise self.error("down")
+        return "ok"
+
+
+def caller(**kwargs):
+    options = {"timeout_seconds": 1.0, "retries": 2, "backoff_seconds": 0.0, **kwargs}
+    return ResilientCaller("test", **options)
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.times_opened == 1
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # a second caller waits for the trial's outcome
+
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 2
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_cancelled_trial_frees_the_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_cancelled()
+    assert breaker.state == "half_open" and breaker.allow()
+
+
+def test_retries_until_the_dependency_answers():
+    policy = caller()
+    dependency = Dependency(failures=2)
+    assert run(policy.call(dependency)) == "ok"
+    assert dependency.calls == 3
+    assert policy.stats()["retried"] == 2 and policy.stats()["errors"] == 2
+    assert policy.breaker.state == "closed"
+
+
+def test_gives_up_after_the_retries_with_the_last_error():
+    policy = caller(retries=1)
+    dependency = Dependency(failures=5)
+    with pytest.raises(ConnectionError):
+        run(policy.call(dependency))
+    assert dependency.calls == 2
+
+
+def test_each_attempt_is_timed_out():
+    policy = caller(timeout_seconds=0.01, retries=1)
+    dependency = Dependency(failures=1, hang=True)
+    assert run(policy.call(dependency)) == "ok"
+    assert policy.stats()["timeouts"] == 1
+
+
+def test_open_circuit_fails_fast_without_calling_the_dependency(clock):
+    policy = caller(retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=30))
+    dependency = Dependency(failures=10)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            run(policy.call(dependency))
+    with pytest.raises(CircuitOpenError):
+        run(policy.call(dependency))
+    assert dependency.calls == 2
+    assert policy.stats()["rejected"] == 1 and policy.stats()["circuit"] == "open"
+
+
+def test_retries_stop_once_the_circuit_opens(clock):
+    policy = caller(retries=5, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=30))
+    dependency = Dependency(failures=10)
+    with pytest.raises(CircuitOpenError):
+        run(policy.call(dependency))
+    assert dependency.calls == 2
+
+
+def test_caller_cancellation_is_not_a_dependency_failure():
+    policy = caller(breaker=CircuitBreaker(failure_threshold=1))
+
+    async def scenario():
+        task = asyncio.create_task(policy.call(Dependency(failures=1, hang=True)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(scenario())
+    assert policy.breaker.state == "closed" and policy.breaker.failures == 0
+
+
+def test_concurrency_is_capped():
+    policy = caller(max_concurrency=2)
+    active = {"now": 0, "peak": 0}
+
+    async def dependency():
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(policy.call(dependency) for _ in range(6)))
+
+    assert run(scenario()) == ["ok"] * 6
+    assert active["peak"] == 2
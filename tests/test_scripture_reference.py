@@ -0,0 +1,72 @@
+import pytest
+
+from backend.services.scripture_reference import ScriptureReferenceParser, VerseIndex
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return ScriptureReferenceParser()
+
+
+def refs(parser, text):
+    return [
+        (r.book_name, r.start_chapter, r.start_verse, r.end_chapter, r.end_verse)
+        for r in parser.parse(text).references
+    ]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("João 3:16", [("João", 3, 16, None, None)]),
+    ("jo 3.16", [("João", 3, 16, None, None)]),
+    ("I Jo 1:9", [("1 João", 1, 9, None, None)]),
+    ("1 João 4:8", [("1 João", 4, 8, None, None)]),
+    ("Sl 23", [("Salmos", 23, None, None, None)]),
+    ("Salmo 119:105", [("Salmos", 119, 105, None, None)]),
+    ("Rm 8:28-30", [("Romanos", 8, 28, 8, 30)]),
+    ("Efésios 2:8–9", [("Efésios", 2, 8, 2, 9)]),
+    ("Gn 1:1-2:3", [("Gênesis", 1, 1, 2, 3)]),
+    ("Gênesis 1-3", [("Gênesis", 1, None, 3, None)]),
+    ("1 Co 13:4,7", [("1 Coríntios", 13, 4, None, None), ("1 Coríntios", 13, 7, None, None)]),
+    ("Jó 1:1", [("Jó", 1, 1, None, None)]),
+])
+def test_parses_references(parser, text, expected):
+    assert refs(parser, text) == expected
+
+
+@pytest.mark.parametrize("text", ["Quem foi Jó?", "Em 2019 fui batizado", "O que é a graça?"])
+def test_ignores_text_without_references(parser, text):
+    result = parser.parse(text)
+    assert result.references == []
+    assert not result.is_bare
+
+
+@pytest.mark.parametrize("text, is_bare", [
+    ("João 3:16", True),
+    ("leia Romanos 8", True),
+    ("João 3:16 e Romanos 5:8", True),
+    ("O que significa João 3:16?", False),
+])
+def test_bare_references_only_carry_filler_words(parser, text, is_bare):
+    assert parser.parse(text).is_bare is is_bare
+
+
+@pytest.fixture
+def verse_index():
+    return VerseIndex([{"name": "Gênesis", "chapters": [["a", "b", "c"], ["d", "e", "f"]]}], source="Test Bible")
+
+
+def test_cross_chapter_range_splits_into_one_document_per_chapter(parser, verse_index):
+    docs = verse_index.documents_for(parser.parse("Gn 1:2-2:2").references)
+    assert [doc.page_content for doc in docs] == ["[Gênesis 1:2-3]\n2. b\n3. c\n", "[Gênesis 2:1-2]\n1. d\n2. e\n"]
+    assert docs[0].metadata == {
+        "source": "Test Bible", "book": "Gênesis", "chapter": 1, "verses": "2-3", "type": "scripture",
+    }
+
+
+def test_documents_respect_the_verse_budget(parser, verse_index):
+    docs = verse_index.documents_for(parser.parse("Gn 1-2").references, max_verses=4)
+    assert [doc.metadata["verses"] for doc in docs] == ["1-3", "1"]
+
+
+def test_references_beyond_the_text_resolve_to_nothing(parser, verse_index):
+    assert verse_index.documents_for(parser.parse("Gn 5:1").references) == []
@@ -0,0 +1,122 @@
+import asyncio
+
+from backend.services import session_store
+from backend.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+def contents(history):
+    return [m.content for m in history.messages]
+
+
+def test_lru_eviction_keeps_the_most_recently_used_sessions():
+    store = InMemorySessionStore(max_sessions=2)
+    store.append_turn("a", "q1", "r1")
+    store.append_turn("b", "q1", "r1")
+    store.get_history("a")  # a becomes the most recent
+    store.append_turn("c", "q1", "r1")
+
+    assert "a" in store and "c" in store and "b" not in store
+    assert store.stats()["evictions_lru"] == 1
+    # An evicted session starts over
+    assert store.get_history("b").messages == []
+
+
+def test_idle_sessions_expire_after_the_ttl():
+    store = InMemorySessionStore(ttl_seconds=60)
+    store.append_turn("old", "q", "r")
+    store.append_turn("recent", "q", "r")
+    # Idle for 61 and 30 seconds
+    store._sessions["old"].last_access -= 61
+    store._sessions["recent"].last_access -= 30
+    store.append_turn("new", "q", "r")
+
+    assert "old" not in store and "recent" in store
+    assert store.stats()["evictions_ttl"] == 1
+
+
+def test_byte_budget_evicts_oldest_sessions_but_never_the_last_one():
+    store = InMemorySessionStore(max_bytes=10)
+    store.append_turn("a", "12345", "123")
+    store.append_turn("b", "12345", "123")
+    assert "a" not in store and "b" in store
+    assert store.stats()["bytes"] == 8
+
+    store.append_turn("b", "1234567890", "1234567890")
+    assert "b" in store
+    assert store.stats()["evictions_bytes"] == 1
+
+
+def test_summary_bytes_count_against_the_budget():
+    store = InMemorySessionStore()
+    store.append_turn("a", "q", "r")
+    store.set_summary("a", "resumo", 2)
+    assert store.get_summary("a") == ("resumo", 2)
+    assert store.stats()["bytes"] == 2 + len("resumo")
+    store.set_summary("a", "r", 2)
+    assert store.stats()["bytes"] == 3
+
+
+def test_sqlite_store_reloads_evicted_sessions_from_disk(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), InMemorySessionStore(max_sessions=1))
+    store.append_turn("a", "q1", "r1")
+    store.set_summary("a", "resumo", 2)
+    store.append_turn("b", "q1", "r1")
+    assert "a" not in store.hot
+
+    assert contents(store.get_history("a")) == ["q1", "r1"]
+    assert store.hot.get_summary("a") == ("resumo", 2)
+    assert store.disk_loads >= 1
+
+
+def test_sqlite_history_survives_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path, InMemorySessionStore())
+    store.append_turn("a", "q1", "r1")
+    store.append_turn("a", "q2", "r2")
+    store.append_turn("b", "q1", "r1")
+
+    restarted = SQLiteSessionStore(path, InMemorySessionStore())
+    assert contents(restarted.get_history("a")) == ["q1", "r1", "q2", "r2"]
+    assert restarted.stats()["disk_sessions"] == 2
+
+
+def test_retention_purges_sessions_idle_on_disk(tmp_path, monkeypatch):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path, InMemorySessionStore(), retention_seconds=3600)
+    store.append_turn("a", "q", "r")
+    real_time = session_store.time.time
+    monkeypatch.setattr(session_store.time, "time", lambda: real_time() + 7200)
+
+    restarted = SQLiteSessionStore(path, InMemorySessionStore(), retention_seconds=3600)
+    assert restarted.get_history("a").messages == []
+    assert restarted.stats()["disk_sessions"] == 0
+
+
+def test_shared_store_reloads_sessions_another_worker_extended(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker1 = SQLiteSessionStore(path, InMemorySessionStore(), shared=True)
+    worker2 = SQLiteSessionStore(path, InMemorySessionStore(), shared=True)
+    worker1.append_turn("a", "q1", "r1")
+    assert contents(worker2.get_history("a")) == ["q1", "r1"]
+
+    worker1.append_turn("a", "q2", "r2")
+    assert contents(worker2.get_history("a")) == ["q1", "r1", "q2", "r2"]
+    assert worker2.stale_reloads == 1
+
+
+def test_async_variants_and_counters(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), InMemorySessionStore(max_sessions=1))
+
+    async def scenario():
+        await store.aappend_turn("a", "q1", "r1")
+        await store.aappend_turn("b", "q1", "r1")
+        await store.aappend_turn("a", "q2", "r2")
+        await store.aset_summary("a", "resumo", 2)
+        return await store.aget_history("a"), await store.aget_summary("a")
+
+    history, summary = asyncio.run(scenario())
+    assert contents(history) == ["q1", "r1", "q2", "r2"]
+    assert summary == ("resumo", 2)
+    # Gauges read the hot tier; disk_sessions is counted on writes
+    assert store.memory_stats()["sessions"] == 1
+    assert store.stats()["disk_sessions"] == 2
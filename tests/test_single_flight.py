@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from backend.services.single_flight import SingleFlight, normalize_query
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+class Upstream:
+    """An event generator that counts its runs and can be held at any event."""
+
+    def __init__(self, events, gate_after=None):
+        self.events = events
+        self.gate_after = gate_after
+        self.gate = None
+        self.started = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.started += 1
+        self.gate = self.gate or asyncio.Event()
+        try:
+            for i, event in enumerate(self.events):
+                if i == self.gate_after:
+                    await self.gate.wait()
+                yield event
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+EVENTS = [{"type": "content", "data": "a"}, {"type": "content", "data": "b"}, {"type": "sources", "data": []}]
+
+
+def test_normalize_query_ignores_case_accents_spacing_and_punctuation():
+    assert normalize_query("  O que é a  Graça? ") == normalize_query("o que e a graca")
+
+
+def test_identical_requests_share_one_generation():
+    async def main():
+        flights, upstream = SingleFlight(), Upstream(EVENTS)
+        results = await asyncio.gather(*(collect(flights.subscribe("q", upstream)) for _ in range(3)))
+        return flights, upstream, results
+
+    flights, upstream, results = run(main())
+    assert upstream.started == 1
+    assert results == [EVENTS] * 3
+    assert flights.stats()["coalesced_requests"] == 2
+    assert len(flights) == 0
+
+
+def test_late_joiner_replays_the_events_produced_so_far():
+    async def main():
+        flights, upstream = SingleFlight(), Upstream(EVENTS, gate_after=2)
+        first = flights.subscribe("q", upstream)
+        seen = [await first.__anext__(), await first.__anext__()]
+        late = asyncio.create_task(collect(flights.subscribe("q", upstream)))
+        await asyncio.sleep(0)
+        upstream.gate.set()
+        seen += [event async for event in first]
+        return flights, seen, await late
+
+    flights, seen, late = run(main())
+    assert seen == EVENTS
+    assert late == EVENTS
+    assert flights.stats()["replayed_events"] == 2
+
+
+def test_generation_survives_one_subscriber_leaving():
+    async def main():
+        flights, upstream = SingleFlight(), Upstream(EVENTS, gate_after=1)
+        leaving = flights.subscribe("q", upstream)
+        await leaving.__anext__()
+        staying = asyncio.create_task(collect(flights.subscribe("q", upstream)))
+        await asyncio.sleep(0)
+        await leaving.aclose()
+        upstream.gate.set()
+        return flights, upstream, await staying
+
+    flights, upstream, staying = run(main())
+    assert staying == EVENTS
+    assert not upstream.cancelled
+    assert flights.stats()["cancelled_generations"] == 0
+
+
+def test_generation_is_cancelled_when_the_last_subscriber_leaves():
+    async def main():
+        flights, upstream = SingleFlight(), Upstream(EVENTS, gate_after=1)
+        first = flights.subscribe("q", upstream)
+        second = flights.subscribe("q", upstream)
+        await first.__anext__()
+        await second.__anext__()
+        await first.aclose()
+        await second.aclose()
+        await asyncio.sleep(0)
+        # A new request for the same key starts over instead of joining the cancelled flight
+        restarted = await collect(flights.subscribe("q", Upstream(EVENTS)))
+        return flights, upstream, restarted
+
+    flights, upstream, restarted = run(main())
+    assert upstream.cancelled
+    assert restarted == EVENTS
+    assert flights.stats()["cancelled_generations"] == 1
+    assert len(flights) == 0
+
+
+def test_upstream_errors_reach_every_subscriber():
+    async def failing():
+        yield EVENTS[0]
+        raise RuntimeError("LLM down")
+
+    async def main():
+        flights = SingleFlight()
+        return await asyncio.gather(
+            *(collect(flights.subscribe("q", failing)) for _ in range(2)), return_exceptions=True
+        )
+
+    results = run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_different_keys_do_not_coalesce():
+    async def main():
+        flights, upstream = SingleFlight(), Upstream(EVENTS)
+        await asyncio.gather(collect(flights.subscribe("a", upstream)), collect(flights.subscribe("b", upstream)))
+        return upstream
+
+    assert run(main()).started == 2
+
+
+@pytest.mark.parametrize("key", [("q", "hybrid"), ("q", None)])
+def test_tuple_keys_are_supported(key):
+    async def main():
+        return await collect(SingleFlight().subscribe(key, Upstream(EVENTS)))
+
+    assert run(main()) == EVENTS
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from backend.core.sse import HEARTBEAT_FRAME, SSEStreamer
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def never_disconnected():
+    return False
+
+
+async def collect(streamer, events, is_disconnected=never_disconnected):
+    return [frame async for frame in streamer.stream(events, is_disconnected)]
+
+
+def decode(frames):
+    return [json.loads(frame[len("data: "):]) for frame in frames if frame.startswith("data: ")]
+
+
+async def token_stream(tokens, delay=0.0):
+    for token in tokens:
+        yield {"type": "content", "data": token}
+        await asyncio.sleep(delay)
+    yield {"type": "sources", "data": ["João 3:16"]}
+
+
+def test_content_tokens_are_coalesced_into_one_frame():
+    streamer = SSEStreamer(coalesce_ms=50)
+    frames = run(collect(streamer, token_stream(["Deus ", "amou ", "o ", "mundo"])))
+    assert decode(frames) == [
+        {"type": "content", "data": "Deus amou o mundo"},
+        {"type": "sources", "data": ["João 3:16"]},
+    ]
+    assert streamer.stats()["events_per_frame"] == 2.0
+
+
+def test_buffer_flushes_at_the_character_limit():
+    streamer = SSEStreamer(coalesce_ms=1000, coalesce_max_chars=4)
+    events = decode(run(collect(streamer, token_stream(["ab", "cd", "ef"]))))
+    assert [e["data"] for e in events if e["type"] == "content"] == ["abcd", "ef"]
+
+
+def test_coalescing_can_be_disabled():
+    streamer = SSEStreamer(coalesce_ms=0)
+    events = decode(run(collect(streamer, token_stream(["a", "b"]))))
+    assert [e["data"] for e in events if e["type"] == "content"] == ["a", "b"]
+
+
+def test_heartbeat_is_sent_while_the_producer_is_silent():
+    async def slow():
+        await asyncio.sleep(0.15)
+        yield {"type": "sources", "data": []}
+
+    streamer = SSEStreamer(heartbeat_seconds=0.05, disconnect_poll_seconds=10)
+    frames = run(collect(streamer, slow()))
+    assert HEARTBEAT_FRAME in frames
+    assert decode(frames) == [{"type": "sources", "data": []}]
+
+
+def test_producer_errors_become_an_error_event():
+    async def failing():
+        yield {"type": "content", "data": "a"}
+        raise RuntimeError("boom")
+
+    events = decode(run(collect(SSEStreamer(coalesce_ms=0), failing())))
+    assert events[-1] == {"type": "error", "data": "boom"}
+
+
+def test_disconnect_cancels_the_upstream_generation():
+    state = {"cancelled": False}
+
+    async def endless():
+        try:
+            while True:
+                yield {"type": "content", "data": "x"}
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def disconnected():
+        return True
+
+    streamer = SSEStreamer(disconnect_poll_seconds=0.02)
+    frames = run(asyncio.wait_for(collect(streamer, endless(), disconnected), timeout=2))
+    assert state["cancelled"]
+    assert streamer.stats()["disconnects"] == 1
+    assert streamer.stats()["active"] == 0
+    assert len(frames) < 10
@@ -0,0 +1,69 @@
+import asyncio
+
+from backend.core.startup import Warmup
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def flaky(failures):
+    calls = {"count": 0}
+
+    def loader():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise RuntimeError("unavailable")
+        return "loaded"
+
+    return loader
+
+
+def fast_warmup(retries=2):
+    return Warmup(retries=retries, backoff_seconds=0.001, max_backoff_seconds=0.002)
+
+
+def test_component_ready_after_transient_failures():
+    warmup = fast_warmup(retries=3)
+    assert run(warmup.run("chroma", flaky(2))) == "loaded"
+    state = warmup.components["chroma"]
+    assert (state.status, state.attempts, state.error) == ("ready", 3, None)
+    assert warmup.ready
+
+
+def test_optional_component_gives_up_after_retries():
+    warmup = fast_warmup()
+    assert run(warmup.run("query_cache", flaky(10), required=False)) is None
+    state = warmup.components["query_cache"]
+    assert (state.status, state.attempts, state.error) == ("failed", 2, "unavailable")
+
+
+def test_required_component_keeps_retrying_past_the_budget():
+    warmup = fast_warmup()
+    observed = []
+
+    async def scenario():
+        task = asyncio.create_task(warmup.run("rag_service", flaky(6)))
+        while warmup.components.get("rag_service") is None or warmup.components["rag_service"].attempts < 3:
+            await asyncio.sleep(0.001)
+        observed.append((warmup.components["rag_service"].status, warmup.ready))
+        return await task
+
+    assert run(scenario()) == "loaded"
+    # Reported as failed once the budget is spent, then recovers on its own
+    assert observed == [("failed", False)]
+    assert warmup.components["rag_service"].status == "ready"
+    assert warmup.components["rag_service"].attempts == 7
+    assert warmup.ready
+
+
+def test_ready_ignores_optional_components():
+    warmup = fast_warmup()
+
+    async def scenario():
+        await warmup.run("rag_service", flaky(0))
+        await warmup.run("verse_store", flaky(10), required=False)
+
+    run(scenario())
+    assert warmup.ready
+    assert warmup.report()["components"]["verse_store"]["status"] == "failed"